@@ -6,6 +6,12 @@ Instructions (READ THIS FIRST!)
 This Python module contains the code for Project 1. Please consult
 the project handout for instructions and details.
 
+The doctests in this module turn the world cache (see world_cache.py) off, so that running them
+does not write to the user's cache directory:
+
+    >>> import os
+    >>> os.environ['ADVENTURE_WORLD_CACHE'] = ''
+
 Copyright and Usage Information
 ===============================
 
@@ -19,10 +25,25 @@ This file is Copyright (c) 2025 CSC111 Teaching Team
 """
 from __future__ import annotations
 import json
-from typing import Optional
-
-from game_entities import Location, Item, LocationState
-from proj1_event_logger import Event, EventList
+import os
+from dataclasses import dataclass, field
+from typing import Any, Iterable, MutableMapping, Optional
+
+from commands import Command, CommandRegistry, Handler, MOVE
+from compact_world import compact_template
+from game_map import MapView
+from game_entities import Location, Item, ItemBag, ItemRegistry
+from instrumentation import Metrics, instrument
+from item_rules import Effect, RuleBook
+from output import BufferedSink, OutputSink, STDOUT
+from paged_world import paged_template
+from proj1_event_logger import EventList
+from routing import RoutingIndex
+from triggers import Trigger, TriggerSet
+from undo_history import DEFAULT_DEPTH, UndoHistory
+from world_binary import BinaryWorld, is_world_file
+from world_loader import load_game_data
+from world_template import shared_template
 
 
 class GameState:
@@ -49,18 +70,144 @@ class GameState:
         self.max_moves = 71
 
 
+def _menu_handler(game: AdventureGame, command: Command, log: EventList) -> None:
+    """Run a menu command."""
+    game.process_menu_action(command.text, log)
+
+
+def _move_handler(game: AdventureGame, command: Command, _: EventList) -> None:
+    """Run a movement command."""
+    game.move(command.target)
+
+
+def _take_handler(game: AdventureGame, command: Command, _: EventList) -> None:
+    """Run a 'take <item>' command."""
+    game.take_item(command.argument)
+
+
+def _use_handler(game: AdventureGame, command: Command, _: EventList) -> None:
+    """Run a 'use <item>' command."""
+    game.use_item(command.argument)
+
+
+def _retrieve_handler(game: AdventureGame, _: Command, __: EventList) -> None:
+    """Run a 'retrieve ...' special command."""
+    game.attempt_usb_retrieval()
+
+
+def _goto_handler(game: AdventureGame, command: Command, log: EventList) -> bool:
+    """Run a 'goto <location name>' command, rejecting it if the player does not walk anywhere."""
+    return game.go_to(command.argument, log)
+
+
+def default_commands() -> CommandRegistry:
+    """Return a new registry holding the handlers for every command in the base game."""
+    registry = CommandRegistry()
+    for menu_command in ["look", "inventory", "score", "undo", "redo", "log", "hint", "map", "quit", "take", "use"]:
+        registry.register_command(menu_command, _menu_handler)
+    registry.register_verb(MOVE, _move_handler)
+    registry.register_verb("take", _take_handler)
+    registry.register_verb("use", _use_handler)
+    registry.register_special("retrieve", _retrieve_handler)
+    registry.register_verb("goto", _goto_handler)
+    return registry
+
+
+DEFAULT_COMMANDS = default_commands()
+
+# The password that lets the player safely eject the USB in the Library
+USB_PASSWORD = "madagascar05252006"
+
+# The player wins by reaching exactly this score while at this location
+WINNING_SCORE = 30
+WIN_LOCATION_ID = 1
+
+WIN_MESSAGE = "\n🎉 Congratulations! You successfully submitted your assignment and won, you scored 100%! 🎉\n"
+LOSE_MESSAGE = "\nYou ran out of time! You failed to submit your assignment. Game Over."
+
+
+def _has_won(game: AdventureGame) -> bool:
+    """Return whether the player is at the winning location with the winning score."""
+    return game.current_location_id == WIN_LOCATION_ID and game.game_state.score == WINNING_SCORE
+
+
+def _win(game: AdventureGame) -> None:
+    """End the game with a win."""
+    game.end(WIN_MESSAGE, won=True)
+
+
+def _is_out_of_moves(game: AdventureGame) -> bool:
+    """Return whether the player has used up all their moves."""
+    return game.moves_left <= 0
+
+
+def _lose(game: AdventureGame) -> None:
+    """End the game with a loss."""
+    game.end(LOSE_MESSAGE)
+
+
+def default_triggers() -> TriggerSet:
+    """Return a new collection holding the triggers of the base game: winning, then running out of moves."""
+    return TriggerSet([Trigger('win', frozenset({'location', 'score'}), _has_won, (_win,)),
+                       Trigger('out_of_moves', frozenset({'moves'}), _is_out_of_moves, (_lose,))])
+
+
+DEFAULT_TRIGGERS = default_triggers()
+
+
+@dataclass
+class StepResult:
+    """The outcome of one call to AdventureGame.step.
+
+    Instance Attributes:
+        - command: The command that was entered
+        - valid: Whether the command was accepted (an invalid command changes nothing and costs no move)
+        - messages: The lines of text the game produced for the player, in order
+        - delta: A mapping from each game field that changed to its (old, new) values. The fields tracked are
+          'location', 'score', 'moves', 'inventory', 'flags' (the names of the flags that are set) and
+          'awaiting_password'.
+        - score_change: How much the score changed
+        - game_over: Whether the game has ended
+        - won: Whether the player has won
+    """
+    command: str
+    valid: bool
+    messages: list[str] = field(default_factory=list)
+    delta: dict[str, tuple[Any, Any]] = field(default_factory=dict)
+    score_change: int = 0
+    game_over: bool = False
+    won: bool = False
+
+
 class AdventureGame:
     """A text adventure game class storing all location, item and map data.
 
     Instance Attributes:
-        - _locations: A dictionary mapping location IDs to Location objects.
-        - _items: A list of all Item objects present in the game.
+        - _locations: A mapping from location IDs to Location objects, backed by a shared WorldTemplate.
+        - _items: A list of all Item objects present in the game, shared with other games in the same world.
+        - _registry: The lookup table from item names and aliases to Item objects.
+        - _rules: The world's compiled rules for taking and using items, shared with other games in the same world.
         - current_location_id: The ID of the player's current location.
         - ongoing: A boolean indicating whether the game is still in progress.
-        - inventory: A list of items currently in the player's possession.
+        - inventory: The canonical names of the items currently in the player's possession. Assigning any
+          iterable of names replaces the inventory with an ItemBag of those names.
         - score: The player's current score.
-        - cd_player_on: Whether the CD player in Khalid's Room is on.
-        - usb_ejected: Whether the USB has been safely ejected from the computer.
+        - flags: The flags read and changed by item rules and triggers, keyed by name. A flag that is not in the
+          dictionary is cleared.
+        - cd_player_on: Whether the CD player in Khalid's Room is on, kept as the 'cd_player_on' flag.
+        - usb_ejected: Whether the USB has been safely ejected from the computer, kept as the 'usb_ejected' flag.
+        - commands: The handlers for every command in the game. This is shared by default, so register new verbs
+          on a fresh registry (see default_commands) to change only this game.
+        - triggers: The triggers checked after every valid command, before the triggers declared in the world's
+          game data. This is shared by default, so add triggers to a fresh collection (see default_triggers) to
+          change only this game.
+        - log: The locations the player has moved through in this game, starting with the initial location.
+        - history: The changes made by this game's most recent commands, which the "undo" and "redo" commands
+          take back and make again.
+        - awaiting_password: Whether the next command passed to step is a password for the Library computer.
+        - won: Whether the player has won.
+        - lost: Whether the player has lost, rather than won or quit.
+        - output: Where messages produced outside of step are written. This prints immediately by default.
 
     Representation Invariants:
         - current_location_id in self._locations
@@ -68,62 +215,194 @@ class AdventureGame:
         - all(isinstance(item, Item) for item in self._items)
     """
 
-    _locations: dict[int, Location]
+    _locations: MutableMapping[int, Location]
     _items: list[Item]
+    _registry: ItemRegistry
+    _rules: RuleBook
     current_location_id: int
-    inventory: list[str]
-    cd_player_on: bool
-    usb_ejected: bool
+    _inventory: ItemBag
+    flags: dict[str, bool]
     game_state: GameState
-
-    def __init__(self, game_data_file: str, initial_location_id: int) -> None:
+    commands: CommandRegistry
+    triggers: TriggerSet
+    log: EventList
+    history: UndoHistory
+    awaiting_password: bool
+    won: bool
+    lost: bool
+    output: OutputSink
+    # Private Instance Attributes:
+    #   - _messages: The messages produced so far by the step in progress, or None outside of step
+    #   - _routes: The shortest routes between this game's locations, or None if no route has been needed yet
+    #   - _map: The map of this game, or None if the map has not been shown yet
+    #   - _world_triggers: The triggers declared in the world's game data, shared with other games in the same world
+    #   - _fired: The names of the triggers that have fired so far in this game
+    #   - _locations_changed: Whether a location has been locked, unlocked or visited since triggers were last checked
+    #   - _rewound: Whether the step in progress has undone or redone a command, so costs no move and is not recorded
+    _messages: Optional[list[str]]
+    _routes: Optional[RoutingIndex]
+    _map: Optional[MapView]
+    _world_triggers: TriggerSet
+    _fired: set[str]
+    _locations_changed: bool
+    _rewound: bool
+
+    def __init__(self, game_data_file: str, initial_location_id: int, memory_budget: Optional[int] = None,
+                 undo_depth: int = DEFAULT_DEPTH, compact: bool = False) -> None:
         """
         Initialize a new text adventure game, based on the data in the given file, setting starting location of game
         at the given initial location ID.
         (note: you are allowed to modify the format of the file as you see fit)
 
+        The static world is loaded only once per process and shared by every game created from the same file; this
+        game stores only the location state it changes.
+
+        If memory_budget is given, the world is played from a compiled world file and only about memory_budget bytes
+        of it are kept decoded, a region of the map at a time (see paged_world.py). If compact is True, the world is
+        instead kept in typed arrays, and only the locations this game uses are turned into objects (see
+        compact_world.py).
+
+        Up to undo_depth commands can be undone; an undo_depth of 0 turns undo off and saves recording the changes
+        each command makes.
+
         Preconditions:
-        - game_data_file is the filename of a valid game data JSON file
+        - game_data_file is the filename of a valid game data JSON file, or of a world file compiled from one
+        - memory_budget is None or memory_budget >= 0
+        - memory_budget is None or not compact
+        - undo_depth >= 0
         """
-        self._locations, self._items = self._load_game_data(game_data_file)
+        if memory_budget is not None:
+            template = paged_template(game_data_file, memory_budget)
+        elif compact:
+            template = compact_template(game_data_file)
+        else:
+            template = shared_template(game_data_file)
+        self._locations = template.new_session()
+        self._items = template.items
+        self._registry = template.registry
+        self._rules = template.rules
         self.current_location_id = initial_location_id
-        self.inventory = []
-        self.cd_player_on = False
-        self.usb_ejected = False
+        self.inventory = ItemBag()
+        self.flags = {}
         self.game_state = GameState()
+        self.commands = DEFAULT_COMMANDS
+        self.triggers = DEFAULT_TRIGGERS
+        self._world_triggers = template.triggers
+        self._fired = set()
+        self._locations_changed = False
+        self._rewound = False
+        self.history = UndoHistory(undo_depth)
+        self._locations.add_listener(self._location_changed)
+        self.awaiting_password = False
+        self.won = False
+        self.lost = False
+        self.output = STDOUT
+        self._messages = None
+        self._routes = None
+        self._map = None
+
+        # Events only store location ids; their descriptions are looked up in this game's locations when read
+        self.log = EventList(describe=self._locations.long_description)
+        self.log.add_location(initial_location_id)
+
+    @property
+    def locations(self) -> MutableMapping[int, Location]:
+        """The locations of this game, keyed by ID."""
+        return self._locations
+
+    @property
+    def routes(self) -> RoutingIndex:
+        """The shortest routes between this game's locations, which avoid locked locations."""
+        if self._routes is None:
+            self._routes = RoutingIndex(self._locations)
+        return self._routes
+
+    @property
+    def map_view(self) -> MapView:
+        """The map of this game, which caches its drawn tiles."""
+        if self._map is None:
+            self._map = MapView(self._locations)
+        return self._map
+
+    @property
+    def inventory(self) -> ItemBag:
+        """The items currently in the player's possession."""
+        return self._inventory
+
+    @inventory.setter
+    def inventory(self, items: Iterable[str]) -> None:
+        self._inventory = items if isinstance(items, ItemBag) else ItemBag(items)
+
+    @property
+    def fired_triggers(self) -> frozenset[str]:
+        """The names of the triggers that have fired so far in this game. Assigning any iterable of names replaces
+        them, for example when restoring a saved game."""
+        return frozenset(self._fired)
+
+    @fired_triggers.setter
+    def fired_triggers(self, names: Iterable[str]) -> None:
+        self._fired = set(names)
+
+    @property
+    def moves_left(self) -> int:
+        """The number of commands the player can still enter, including the next one.
+
+        As in the original game loop, the move for a turn counts as soon as the turn starts, and the game is lost
+        when a turn would start with game_state.max_moves moves. So the player can enter max_moves - 1 commands.
+
+        >>> game = AdventureGame('game_data.json', 1)
+        >>> game.moves_left, game.describe_turn()[0]
+        (70, 'Moves remaining: 70')
+        >>> results = [game.step("look") for _ in range(70)]
+        >>> results[68].game_over, results[69].game_over, results[69].won, game.game_state.ongoing
+        (False, True, False, False)
+        >>> results[69].messages[-1] == LOSE_MESSAGE
+        True
+        >>> game.step("look").valid
+        False
+        """
+        return self.game_state.max_moves - 1 - self.game_state.moves
+
+    @property
+    def cd_player_on(self) -> bool:
+        """Whether the CD player in Khalid's Room is on.
+
+        >>> game = AdventureGame('game_data.json', 1)
+        >>> game.cd_player_on = True
+        >>> game.flags
+        {'cd_player_on': True}
+        """
+        return self.flags.get('cd_player_on', False)
+
+    @cd_player_on.setter
+    def cd_player_on(self, value: bool) -> None:
+        self.flags['cd_player_on'] = value
+
+    @property
+    def usb_ejected(self) -> bool:
+        """Whether the USB has been safely ejected from the computer."""
+        return self.flags.get('usb_ejected', False)
+
+    @usb_ejected.setter
+    def usb_ejected(self, value: bool) -> None:
+        self.flags['usb_ejected'] = value
 
     @staticmethod
     def _load_game_data(filename: str) -> tuple[dict[int, Location], list[Item]]:
         """Load locations and items from a JSON file with the given filename and
         return a tuple consisting of (1) a dictionary of locations mapping each game location's ID to a Location object,
-        and (2) a list of all Item objects."""
-
-        with open(filename, 'r') as f:
-            data = json.load(f)  # This loads all the data from the JSON file
-
-        locations = {}
-        for loc_data in data['locations']:
-            location_obj = Location(
-                loc_data['id'],
-                loc_data['name'],
-                loc_data['brief_description'],
-                loc_data.get('long_description', None),
-                loc_data.get('available_commands', {}),
-                loc_data.get('special_commands', []),
-                LocationState(
-                    items=loc_data.get('items', []),
-                    locked=loc_data.get('locked', False),
-                    visited=loc_data.get('visited', False)
-                )
-            )
-            locations[loc_data['id']] = location_obj
-
-        items = []
-        for item_data in data['items']:
-            item_obj = Item(item_data['name'], item_data['description'], item_data['start_position'],
-                            item_data['target_position'], item_data['target_points'])
-            items.append(item_obj)
+        and (2) a list of all Item objects.
 
+        The file may also be a world file compiled by world_binary.compile_world, in which case each location is only
+        decoded the first time it is accessed. Otherwise, the file is parsed incrementally by
+        world_loader.load_game_data, which can also report progress and timings.
+        """
+
+        if is_world_file(filename):
+            world = BinaryWorld(filename)
+            return world.locations(), world.items()
+
+        locations, items, _ = load_game_data(filename)
         return locations, items
 
     def get_location(self, loc_id: Optional[int] = None) -> Location:
@@ -165,12 +444,17 @@ class AdventureGame:
         >>> game.inventory = ["key", "flashlight", "map"]
         >>> game.display_inventory()
         Inventory: key, flashlight, map
+
+        >>> game.inventory = ["key", "map", "key"]
+        >>> game.display_inventory()
+        Inventory: key (x2), map
         """
 
         if self.inventory:
-            print("Inventory:", ", ".join(self.inventory))
+            self._say("Inventory:", ", ".join(name if count == 1 else f"{name} (x{count})"
+                                              for name, count in self.inventory.items()))
         else:
-            print("Your inventory is empty.")
+            self._say("Your inventory is empty.")
 
     def display_score(self) -> None:
         """
@@ -190,7 +474,7 @@ class AdventureGame:
         Current Score: 30
         """
 
-        print(f"Current Score: {self.game_state.score}")
+        self._say(f"Current Score: {self.game_state.score}")
 
     def take_item(self, item_name: str) -> None:
         """
@@ -214,19 +498,28 @@ class AdventureGame:
         """
 
         curr_location = self.get_location()
+        item_name = self._registry.canonical_name(item_name)
 
-        if not self._can_take_item(item_name):
+        rule = self._rules.take.get((item_name, self.current_location_id))
+        if rule is not None and not rule.requires(self):
+            self._say(rule.refusal if rule.refusal is not None else f"You cannot take {item_name} here.")
             return  # Prevents taking restricted items
 
         if item_name in curr_location.state.items:
-            self.inventory.append(item_name)
+            self.inventory.add(item_name)
             curr_location.state.items.remove(item_name)
-            print(f"You have taken {item_name}.")
+            self.history.item_moved(self.current_location_id, item_name, -1)
+            self._say(f"You have taken {item_name}.")
+            if rule is not None:
+                self._apply_effects(rule.effects)
 
     def _can_take_item(self, item_name: str) -> bool:
         """
         Check if the item can be taken based on game rules.
 
+        An item can be taken anywhere unless the game data has a "take" rule for it at the current location, in
+        which case the rule's requirements must hold.
+
         >>> game = AdventureGame('game_data.json', 6)  # Start in the Library (location 6)
         >>> game.usb_ejected = False
         >>> game._can_take_item("usb")
@@ -244,8 +537,9 @@ class AdventureGame:
         True
         """
 
-        usb_location_id = 6
-        return not (item_name == "usb" and self.current_location_id == usb_location_id and not self.usb_ejected)
+        item_name = self._registry.canonical_name(item_name)
+        rule = self._rules.take.get((item_name, self.current_location_id))
+        return rule is None or rule.requires(self)
 
     def use_item(self, item_name: str) -> None:
         """
@@ -272,130 +566,74 @@ class AdventureGame:
         You do not have that item.
         """
 
-        hasan_room_id = 4
-        curr_location = self.get_location()
-        hasan_room = self._locations.get(hasan_room_id)
-
-        if item_name.lower() not in (i.lower() for i in self.inventory):
-            print("You do not have that item.")
+        item_name = self._registry.canonical_name(item_name)
+        if item_name not in self.inventory:
+            self._say("You do not have that item.")
             return
 
-        item_obj = next((item for item in self._items if item.name.lower() == item_name.lower()), None)
+        item_obj = self._registry.get(item_name)
         if not item_obj:
-            print("Error: Item not found in game data.")
+            self._say("Error: Item not found in game data.")
             return
 
-        if self._can_use_item(item_name, curr_location, hasan_room):
+        if self._can_use_item(item_name):
             self.game_state.score += item_obj.target_points
         else:
-            print("You cannot use this item here.")
+            self._say("You cannot use this item here.")
 
-    def _can_use_item(self, item_name: str, curr_location: Location, hasan_room: Location) -> bool:
+    def _can_use_item(self, item_name: str) -> bool:
         """
         Check if an item can be used in the current location and perform the action if possible.
 
-        >>> game = AdventureGame('game_data.json', 1)  # Start in the desk room
-        >>> desk_location = Location(1, "Desk Room", "A room with a desk.", None, {}, [], False, False, {})
-        >>> hasan_location = Location(4, "Hasan's Room", "A locked room.", None, {}, [], True, False, {})
+        An item can only be used where the game data has a "use" rule for it whose requirements hold. The rule is
+        found with a single lookup by item and location; if its requirements do not hold, its refusal is shown.
 
-        >>> game._can_use_item("lucky uoft mug", desk_location, hasan_location)
+        >>> game = AdventureGame('game_data.json', 1)  # Start in the desk room
+        >>> game._can_use_item("lucky uoft mug")
         You placed the Lucky UofT Mug on the desk beside your computer.
         True
 
-        >>> game._can_use_item("laptop charger", desk_location, hasan_location)
-        You plugged in your laptop charger. Your laptop is now charging.
-        True
-
-        >>> game._can_use_item("usb", desk_location, hasan_location)
-        You plugged the USB into your computer.
-        True
-        """
-
-        cd_player_room_id = 3
-        desk_room_id = 1
-        if item_name == "lockpick" and curr_location.id_num in {20, 21} and hasan_room.locked:
-            hasan_room.locked = False
-            print("You successfully unlocked Hasan's Room with the lockpick!")
-            return True
-        if item_name == "batteries" and curr_location.id_num == cd_player_room_id:
-            self.cd_player_on = True
-            print("You inserted the batteries into the CD player. It is now on!")
-            return True
-        if item_name == "movie cd":
-            return self._handle_movie_cd(curr_location)
-        if item_name in {"lucky uoft mug", "laptop charger", "usb"} and curr_location.id_num == desk_room_id:
-            return self._handle_special_items(item_name)
-
-        return False  # Item could not be used
-
-    def _handle_movie_cd(self, curr_location: Location) -> bool:
-        """
-        Handle the usage of the movie CD.
-
-        >>> game = AdventureGame('game_data.json', 3)  # Start in the CD player room
-        >>> location = Location(3, "CD Player Room", "A room with a CD player.", None, {}, [], False, False, {})
-
-        >>> game.cd_player_on = False
-        >>> game._handle_movie_cd(location)
-        You must turn on the CD player first, you need some batteries...
+        >>> game._can_use_item("lockpick")  # No rule for the lockpick here
         False
 
-        >>> game.cd_player_on = True
-        >>> game._handle_movie_cd(location)
-        The CD player starts playing: Madagascar!
-        True
-
-        >>> other_location = Location(2, "Another Room", "A random location.", None, {}, [], False, False, {})
-        >>> game._handle_movie_cd(other_location)  # Not in the CD player room
+        >>> game.current_location_id = 3  # Move to the CD player room
+        >>> game._can_use_item("movie cd")
+        You must turn on the CD player first, you need some batteries...
         False
-        """
-
-        cd_player_room_id = 3
-        if curr_location.id_num == cd_player_room_id and self.cd_player_on:
-            print("The CD player starts playing: Madagascar!")
-            return True
-        if curr_location.id_num == cd_player_room_id and not self.cd_player_on:
-            print("You must turn on the CD player first, you need some batteries...")
-            return False
-        return False
 
-    def _handle_special_items(self, item_name: str) -> bool:
-        """
-        Handle items that contribute to the win condition.
-
-        >>> game = AdventureGame('game_data.json', 1)  # Start in the player's room
-        >>> game._handle_special_items("lucky uoft mug")
-        You placed the Lucky UofT Mug on the desk beside your computer.
-        True
-
-        >>> game._handle_special_items("laptop charger")
-        You plugged in your laptop charger. Your laptop is now charging.
+        >>> game._can_use_item("batteries")
+        You inserted the batteries into the CD player. It is now on!
         True
 
-        >>> game._handle_special_items("usb")
-        You plugged the USB into your computer.
+        >>> game._can_use_item("movie cd")
+        The CD player starts playing: Madagascar!
         True
-
-        >>> game._handle_special_items("random item")  # Item not in special_items
-        False
         """
 
-        special_items = {
-            "lucky uoft mug": "You placed the Lucky UofT Mug on the desk beside your computer.",
-            "laptop charger": "You plugged in your laptop charger. Your laptop is now charging.",
-            "usb": "You plugged the USB into your computer."
-        }
+        item_name = self._registry.canonical_name(item_name)
+        rule = self._rules.use.get((item_name, self.current_location_id))
+        if rule is None:
+            return False  # Item could not be used
+        if not rule.requires(self):
+            if rule.refusal is not None:
+                self._say(rule.refusal)
+            return False
+        self._apply_effects(rule.effects)
+        return True
 
-        if item_name in special_items:
-            print(special_items[item_name])
-            self.check_win_condition()
-            return True
-        return False
+    def _apply_effects(self, effects: tuple[Effect, ...]) -> None:
+        """Apply the given item rule or trigger effects in order, showing the messages they produce."""
+        for effect in effects:
+            message = effect(self)
+            if message is not None:
+                self._say(message)
 
-    def attempt_usb_retrieval(self, password: str = None) -> None:
+    def attempt_usb_retrieval(self, password: Optional[str] = None) -> None:
         """
         Handle the process of safely retrieving the USB in the Library.
 
+        If no password is given, the game waits for one: the next command passed to step is taken as the password.
+
         >>> game = AdventureGame('game_data.json', 6)  # Start in the Library
         >>> game.usb_ejected = False
         >>> game.attempt_usb_retrieval("wrongpassword")
@@ -415,25 +653,31 @@ class AdventureGame:
         """
 
         if self.current_location_id != 6:
-            print("There's nothing to do here.")
+            self._say("There's nothing to do here.")
             return
 
         if self.usb_ejected:
-            print("The USB has been safely ejected. You can take it now.")
+            self._say("The USB has been safely ejected. You can take it now.")
             return
 
-        print("The computer warns: 'If you unplug it normally, it might corrupt. You may want to manually eject\n"
-              "it first, but you need to sign in.'")
-        print("Hint: No caps, no spaces, no special characters. Favorite movie + birthday")
+        self._say("The computer warns: 'If you unplug it normally, it might corrupt. You may want to manually eject\n"
+                  "it first, but you need to sign in.'")
+        self._say("Hint: No caps, no spaces, no special characters. Favorite movie + birthday")
+
+        if password is None:  # The player's next command is taken as the password
+            self.awaiting_password = True
+            self._say("Enter password:")
+            return
 
-        if password is None:  # Allow real input in gameplay
-            password = input("Enter password: ")
+        self._enter_password(password)
 
-        if password == "madagascar05252006":
+    def _enter_password(self, password: str) -> None:
+        """Try to sign in to the Library computer with the given password, ejecting the USB if it is correct."""
+        if password == USB_PASSWORD:
             self.usb_ejected = True
-            print("You have safely ejected the USB. You can now take it.")
+            self._say("You have safely ejected the USB. You can now take it.")
         else:
-            print("Incorrect password. Try again later.")
+            self._say("Incorrect password. Try again later.")
 
     def check_win_condition(self) -> bool:
         """
@@ -458,17 +702,21 @@ class AdventureGame:
         False
         """
 
-        your_room_id = 1
-        winning_score = 30
-        if self.current_location_id == your_room_id and self.game_state.score == winning_score:
-            print("\n🎉 Congratulations! You successfully submitted your assignment and won, you scored 100%! 🎉\n")
-            self.game_state.ongoing = False
+        if _has_won(self):
+            _win(self)
             return True
         return False
 
+    def end(self, message: str, won: bool = False) -> None:
+        """End the game, showing the given message, as a win if won is True and as a loss otherwise."""
+        self._say(message)
+        self.game_state.ongoing = False
+        self.won = won
+        self.lost = not won
+
     def process_menu_action(self, user_choice: str, log: EventList) -> None:
         """
-        Handle menu actions like inventory, score, log, quit, and undo.
+        Handle menu actions like inventory, score, log, quit, undo and redo.
 
         >>> game = AdventureGame('game_data.json', 1)  # Initialize game
         >>> log = EventList()
@@ -480,28 +728,75 @@ class AdventureGame:
         >>> game.process_menu_action("inventory", log)
         Your inventory is empty.
 
-        >>> game.game_state.moves = 3  # Simulate game progress
-        >>> game.process_menu_action("undo", log)
-
-        >>> game.game_state.moves  # Should be reduced by 2
-        1
+        >>> game.process_menu_action("undo", log)  # No command has been run yet
+        There is nothing to undo.
         """
 
         if user_choice == "log":
-            log.display_events()
+            for line in log.describe_events():
+                self._say(line)
         elif user_choice == "quit":
             self.game_state.ongoing = False
         elif user_choice == "undo":
-            if self.game_state.moves >= 2:
-                self.game_state.moves -= 2
-            log.remove_last_event()
-            self.current_location_id = log.last.id_num if log.last else 1
+            self.undo()
+        elif user_choice == "redo":
+            self.redo()
         elif user_choice == "inventory":
             self.display_inventory()
         elif user_choice == "score":
             self.display_score()
         elif user_choice == "look":
-            print(self.get_location().long_description)
+            self._say(self.get_location().long_description)
+        elif user_choice == "hint":
+            self.give_hint()
+        elif user_choice == "map":
+            self.show_map()
+
+    def undo(self) -> None:
+        """
+        Take back everything the most recent command changed, including the move it cost. Undoing costs no move.
+
+        >>> game = AdventureGame('game_data.json', 6)  # Start in the Library
+        >>> game.step("take lockpick").messages
+        ['You have taken lockpick.']
+        >>> game.undo()
+        >>> list(game.inventory), list(game.get_location().state.items), game.game_state.moves
+        ([], ['usb', 'lockpick'], 0)
+        >>> game.undo()
+        There is nothing to undo.
+        """
+        change = self.history.undo(self)
+        if change is None:
+            self._say("There is nothing to undo.")
+        else:
+            self._fired.difference_update(change.fired)
+        self._rewound = True
+
+    def redo(self) -> None:
+        """
+        Make again the changes of the most recently undone command. Redoing costs no move.
+
+        Every undone command can be redone until a command other than undo or redo is run.
+
+        >>> game = AdventureGame('game_data.json', 20, undo_depth=2)
+        >>> game.inventory = ["lockpick"]
+        >>> game.step("use lockpick").messages
+        ["You successfully unlocked Hasan's Room with the lockpick!"]
+        >>> game.undo()
+        >>> game.get_location(4).locked, list(game.inventory), game.game_state.moves
+        (True, ['lockpick'], 0)
+        >>> game.redo()
+        >>> game.get_location(4).locked, game.game_state.moves
+        (False, 1)
+        >>> game.redo()
+        There is nothing to redo.
+        """
+        change = self.history.redo(self)
+        if change is None:
+            self._say("There is nothing to redo.")
+        else:
+            self._fired.update(change.fired)
+        self._rewound = True
 
     def handle_take_or_use(self, user_choice: str) -> None:
         """
@@ -513,7 +808,7 @@ class AdventureGame:
         >>> game.handle_take_or_use("take key")
         You have taken key.
 
-        >>> game.inventory.append("flashlight")
+        >>> game.inventory.add("flashlight")
         >>> game.handle_take_or_use("use flashlight")
         Error: Item not found in game data.
 
@@ -539,21 +834,324 @@ class AdventureGame:
         You have taken usb.
         """
         library_room_id = 6
-        hasan_room_id = 4
         if self.current_location_id == library_room_id and user_choice == "take usb":
-            if self.usb_ejected:
-                self.take_item("usb")
-            else:
-                print("You cannot take the USB drive until you safely eject it.")
-        elif self.current_location_id == library_room_id and choice == "retrieve usb":
+            self.take_item("usb")
+        elif self.current_location_id == library_room_id and user_choice == "retrieve usb":
             self.attempt_usb_retrieval()
         elif user_choice in loc.available_commands:
-            next_location_id = loc.available_commands[user_choice]
-            next_location = self.get_location(next_location_id)
-            if next_location_id == hasan_room_id and getattr(next_location, 'locked', False):
-                print("The door is locked. You need something to unlock it.")
+            self.move(loc.available_commands[user_choice])
+
+    def _say(self, *parts: object) -> None:
+        """Show the given parts, separated by spaces, to the player.
+
+        During step, the message is added to the step's result; otherwise it is written to self.output.
+        """
+        message = " ".join(str(part) for part in parts)
+        if self._messages is None:
+            self.output.write(message)
+        else:
+            self._messages.append(message)
+
+    def _observe(self) -> dict[str, Any]:
+        """Return the current values of the fields reported in StepResult.delta."""
+        return {
+            'location': self.current_location_id,
+            'score': self.game_state.score,
+            'moves': self.game_state.moves,
+            'inventory': self.inventory.snapshot(),
+            'flags': frozenset(name for name, value in self.flags.items() if value),
+            'awaiting_password': self.awaiting_password
+        }
+
+    def step(self, command: str) -> StepResult:
+        """
+        Run one command and return its outcome, without printing anything or reading input.
+
+        A valid command costs one move, apart from "undo" and "redo", and apart from a password for the Library
+        computer, which is part of the "retrieve" command asking for it. Movement is recorded in self.log, the
+        changes made are recorded in self.history, and the game ends when the player wins or runs out of moves.
+
+        >>> game = AdventureGame('game_data.json', 1)
+        >>> result = game.step("go east")
+        >>> result.valid, result.delta['location'], result.messages
+        (True, (1, 20), [])
+        >>> game.step("fly").messages
+        ['That was an invalid option; try again.']
+        >>> game.step("score").messages
+        ['Current Score: 0']
+        >>> game.log.get_id_log()
+        [1, 20]
+        >>> game = AdventureGame('game_data.json', 6)
+        >>> moves_left = game.moves_left
+        >>> game.step("retrieve usb").messages[-1]
+        'Enter password:'
+        >>> game.step(USB_PASSWORD).messages
+        ['You have safely ejected the USB. You can now take it.']
+        >>> moves_left - game.moves_left
+        1
+        """
+        text = command.lower().strip()
+        before = self._observe()
+        self._messages = []
+        self.history.begin(self)
+        self._rewound = False
+        costs_move = True
+        try:
+            if not self.game_state.ongoing:
+                valid = False
+                self._say("The game is over.")
+            elif self.awaiting_password:
+                valid = True
+                costs_move = False  # The "retrieve" command asking for the password paid for the move
+                self.awaiting_password = False
+                self._enter_password(text)
+            else:
+                valid = self.dispatch(text, self.log)
+                if not valid and not self._messages:
+                    self._say("That was an invalid option; try again.")
+
+            recorded = valid and not self._rewound
+            after = self._finish_step(text, before, costs_move) if recorded else self._observe()
+            delta = {name: (before[name], after[name]) for name in before if before[name] != after[name]}
+            if recorded:
+                self.history.commit(self, delta)
             else:
-                self.current_location_id = next_location_id
+                self.history.cancel()
+            messages = self._messages
+        finally:
+            self._messages = None
+
+        return StepResult(text, valid, messages, delta, after['score'] - before['score'],
+                          not self.game_state.ongoing, self.won)
+
+    def _finish_step(self, command: str, before: dict[str, Any], costs_move: bool = True) -> dict[str, Any]:
+        """Record the move taken by a valid command, unless costs_move is False, then fire the triggers that depend on
+        the fields the command changed, given the values of the fields before it. Return the values of the fields
+        afterwards.
+
+        The values are the ones returned by _observe."""
+        if costs_move:
+            self.game_state.moves += 1
+        last_event = self.log.last
+        if last_event is not None and last_event.id_num != self.current_location_id:
+            self.log.add_location(self.current_location_id, command)
+
+        after = self._observe()
+        changed = [name for name, value in after.items() if before[name] != value]
+        if self._locations_changed:
+            changed.append('locations')
+            self._locations_changed = False
+        changed = frozenset(changed)
+        fired = False
+        for triggers in (self.triggers, self._world_triggers):
+            for trigger in triggers.watching(changed):
+                if not self.game_state.ongoing:
+                    break
+                if trigger.once and trigger.name in self._fired:
+                    continue
+                if trigger.condition(self):
+                    if trigger.name not in self._fired:
+                        self._fired.add(trigger.name)
+                        self.history.trigger_fired(trigger.name)
+                    self._apply_effects(trigger.effects)
+                    fired = True
+        return self._observe() if fired else after
+
+    def _location_changed(self, id_num: int, field_name: Optional[str]) -> None:
+        """Note that a location has been locked, unlocked, visited, assigned or deleted, for the triggers, and record
+        a change to whether it is locked or visited in the undo history."""
+        self._locations_changed = True
+        if field_name is not None:
+            self.history.flag_changed(id_num, field_name, getattr(self._locations[id_num].state, field_name))
+
+    def describe_location(self) -> str:
+        """
+        Return the description of the current location and mark it as visited. The long description is given on
+        the first visit, and the brief description afterwards.
+
+        >>> game = AdventureGame('game_data.json', 1)
+        >>> game.describe_location()
+        'Your private dorm room. Your laptop is here that you need to submit the assignment.'
+        >>> game.describe_location()
+        'You see a birthday photo with a number on the back... 05252006'
+        """
+        location = self.get_location()
+        description = location.brief_description if location.visited or location.long_description is None \
+            else location.long_description
+        location.visited = True
+        return description
+
+    def describe_turn(self) -> list[str]:
+        """
+        Return the lines shown to the player at the start of a turn: the moves remaining, the description of the
+        current location (marking it as visited) and the available commands.
+
+        >>> game = AdventureGame('game_data.json', 1)
+        >>> game.describe_turn()[-2:]
+        ['What to do? Choose from: look, inventory, score, undo, redo, log, hint, map, quit, take, use', '- go east']
+        """
+        location = self.get_location()
+        lines = [f"Moves remaining: {self.moves_left}",
+                 self.describe_location(),
+                 "What to do? Choose from: " + ", ".join(self.commands.command_names)]
+        for action in list(location.available_commands.keys()) + list(location.special_commands):
+            lines.append("- " + action)
+        return lines
+
+    def move(self, next_location_id: int) -> None:
+        """
+        Move the player to the location with the given ID, unless that location is locked.
+
+        >>> game = AdventureGame('game_data.json', 20)
+        >>> game.move(4)  # Hasan's room starts locked
+        The door is locked. You need something to unlock it.
+        >>> game.move(3)
+        >>> game.current_location_id
+        3
+        """
+        if self.get_location(next_location_id).locked:
+            self._say("The door is locked. You need something to unlock it.")
+        else:
+            self.current_location_id = next_location_id
+
+    def go_to(self, name: str, log: EventList) -> bool:
+        """
+        Walk to the nearest location with the given name along the shortest route that avoids locked locations,
+        and return whether the player walked anywhere. Each location passed through is recorded in log and marked
+        as visited, and every movement after the first costs a move (the step running the command pays for the
+        first). As after "go", the destination is marked as visited when it is next described.
+
+        >>> game = AdventureGame('game_data.json', 1)
+        >>> game.go_to("khalids room", game.log)
+        You walk to Khalids Room: go east, go east.
+        True
+        >>> game.log.get_id_log(), game.game_state.moves
+        ([1, 20, 3], 1)
+        >>> game.locations[20].state.visited, game.locations[3].state.visited
+        (True, False)
+        >>> game.go_to("hasans room", game.log)
+        You cannot get to hasans room from here.
+        False
+        >>> game.step("goto the moon")
+        StepResult(command='goto the moon', valid=False, messages=['There is no place called the moon.'], \
+delta={}, score_change=0, game_over=False, won=False)
+        """
+        routes = self.routes
+        candidates = set(routes.graph.find_names(name))
+        if not candidates:
+            self._say(f"There is no place called {name}.")
+            return False
+        destination = routes.nearest(self.current_location_id, candidates.__contains__)
+        if destination is None:
+            self._say(f"You cannot get to {name} from here.")
+            return False
+
+        route = routes.route(self.current_location_id, destination)
+        moves_left = self.moves_left
+        destination_name = self.get_location(destination).name
+        if not route:
+            self._say(f"You are already at {destination_name}.")
+            return False
+        if len(route) > moves_left:
+            self._say(f"{destination_name} is {len(route)} moves away, but you only have {moves_left} moves left.")
+            return False
+        self._say(f"You walk to {destination_name}: {', '.join(route)}.")
+        for i, command in enumerate(route):
+            if i > 0:
+                self.get_location().visited = True  # The player passed through here without a turn to describe it
+                self.game_state.moves += 1  # The step running this command pays for the first movement
+            self.move(self.get_location().available_commands[command])
+            log.add_location(self.current_location_id, command)
+        return True
+
+    def show_map(self) -> None:
+        """
+        Show the map of the area around the player.
+
+        >>> game = AdventureGame('game_data.json', 21)
+        >>> game.map_view.row_radius, game.map_view.column_radius = 1, 2
+        >>> game.show_map()
+        ? ? ? ? ?
+          X @ ? ?
+            ? ? ?
+        <BLANKLINE>
+        @ you  # visited  ? not visited  X locked
+        """
+        lines = self.map_view.render(self.current_location_id)
+        if not lines:
+            self._say("There is no map of this place.")
+        for line in lines:
+            self._say(line)
+
+    def give_hint(self) -> None:
+        """
+        Suggest where to go next: the nearest location holding an item to take, or where an item being carried
+        scores points.
+
+        >>> game = AdventureGame('game_data.json', 1)
+        >>> game.give_hint()
+        There is something to find at Library: go east, go east, go east, go east, go south, go east, go east.
+        >>> game.inventory = ["usb"]
+        >>> game.current_location_id = 20
+        >>> game.give_hint()
+        Bring usb to Your Room: go west.
+        """
+        here = self.current_location_id
+        if self.get_location().state.items:
+            self._say("There is something to take here.")
+            return
+
+        targets = {}
+        for name in self.inventory:
+            item = self._registry.get(name)
+            if item is not None and item.target_position is not None and item.target_points > 0:
+                targets.setdefault(item.target_position, name)
+
+        def is_wanted(id_num: int) -> bool:
+            """Return whether the location with the given ID is worth going to."""
+            return id_num != here and (id_num in targets or self._locations.has_items(id_num))
+
+        destination = self.routes.nearest(here, is_wanted)
+        if destination is None:
+            self._say("There is nothing left to find from here.")
+            return
+        route = ", ".join(self.routes.route(here, destination))
+        destination_name = self.get_location(destination).name
+        if destination in targets:
+            self._say(f"Bring {targets[destination]} to {destination_name}: {route}.")
+        else:
+            self._say(f"There is something to find at {destination_name}: {route}.")
+
+    def resolve_command(self, user_choice: str) -> Optional[tuple[Handler, Command]]:
+        """
+        Return the handler and parsed command for the given input at the current location, or None if the input
+        is not a valid command here.
+
+        >>> game = AdventureGame('game_data.json', 1)
+        >>> game.resolve_command("go east")[1]
+        Command(verb='move', argument='', text='go east', target=20)
+        >>> game.resolve_command("go north") is None
+        True
+        """
+        return self.commands.resolve(self._locations.commands_for(self.current_location_id), user_choice)
+
+    def dispatch(self, user_choice: str, log: EventList) -> bool:
+        """
+        Run the given command at the current location through its handler. Return whether the command was valid.
+
+        >>> game = AdventureGame('game_data.json', 1)
+        >>> game.dispatch("go east", EventList())
+        True
+        >>> game.current_location_id
+        20
+        >>> game.dispatch("fly", EventList())
+        False
+        """
+        resolved = self.resolve_command(user_choice)
+        if resolved is None:
+            return False
+        handler, command = resolved
+        return handler(self, command, log) is not False
 
 
 if __name__ == "__main__":
@@ -563,45 +1161,37 @@ if __name__ == "__main__":
     #     'max-line-length': 120,
     #     'disable': ['R1705', 'E9998', 'E9999']
     # })
-    game_log = EventList()
     game = AdventureGame('game_data.json', 1)
-    menu = ["look", "inventory", "score", "undo", "log", "quit", "take", "use"]
-    choice = None
+    game.output = BufferedSink()  # Each turn's text is written in one go, just before reading input
+    out = game.output
+    # Set ADVENTURE_METRICS to a filename to instrument this game and write its metrics there as JSON when it ends
+    metrics_file = os.environ.get('ADVENTURE_METRICS')
+    metrics = Metrics() if metrics_file else None
+    if metrics is not None:
+        instrument(game, metrics)
 
     while game.game_state.ongoing:
-        if game.check_win_condition() is True:
-            break
-        location = game.get_location()
-        event = Event(game.current_location_id, location.brief_description, choice)
-        game_log.add_event(event)
-        game.game_state.moves += 1
-        print(f"Moves remaining: {game.game_state.max_moves - game.game_state.moves}")
-
-        if game.game_state.moves >= game.game_state.max_moves:
-            print("\nYou ran out of time! You failed to submit your assignment. Game Over.")
-            game.game_state.ongoing = False
-            break
-
-        print(location.brief_description if location.state.visited or location.long_description is None
-              else location.long_description)
-        location.visited = True
-
-        print("What to do? Choose from:", ", ".join(menu))
-        for action in list(location.available_commands.keys()) + location.special_commands:
-            print("-", action)
-
-        choice = input("\nEnter action: ").lower().strip()
-        while (choice not in location.available_commands and choice not in menu
-               and choice not in location.special_commands
-               and not choice.startswith("take ") and not choice.startswith("use ")):
-            print("That was an invalid option; try again.")
-            choice = input("\nEnter action: ").lower().strip()
-
-        print("=========================")
-        print("You decided to:", choice)
-
-        if choice in menu:
-            game.process_menu_action(choice, game_log)
+        if game.awaiting_password:
+            out.flush()
+            result = game.step(input("> "))
         else:
-            game.handle_take_or_use(choice)
-            game.handle_special_actions(choice, location)
+            for line in game.describe_turn():
+                out.write(line)
+
+            out.flush()
+            result = game.step(input("\nEnter action: "))
+            while not result.valid:
+                out.write("\n".join(result.messages))
+                out.flush()
+                result = game.step(input("\nEnter action: "))
+
+            out.write("=========================")
+            out.write("You decided to: " + result.command)
+
+        for message in result.messages:
+            out.write(message)
+    out.flush()
+
+    if metrics is not None:
+        with open(metrics_file, 'w') as f:
+            json.dump(metrics.to_json(), f, indent=2)
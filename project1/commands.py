@@ -0,0 +1,185 @@
+"""CSC111 Project 1: Text Adventure Game - Commands
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the code that turns the player's input into commands and finds the
+handler for each command.
+
+Every location's movement and special commands are parsed once, when the location is loaded,
+into a table from command text to Command. At play time, a command is resolved with at most
+three dictionary lookups (the location's table, the commands available everywhere, then the
+verbs that take an argument such as "take <item>"), and is run by exactly one handler.
+
+New verbs are added by registering a handler with a CommandRegistry.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+from types import MappingProxyType
+from typing import Any, Callable, Mapping, NamedTuple, Optional
+
+# The verb given to a location's movement commands, whatever their text
+MOVE = 'move'
+
+
+class Command(NamedTuple):
+    """A parsed command.
+
+    Instance Attributes:
+        - verb: The first word of the command, or MOVE for a movement command
+        - argument: The rest of the command after the verb, or '' if there is none
+        - text: The full text of the command
+        - target: The ID of the location a movement command leads to, or None for other commands
+    """
+    verb: str
+    argument: str
+    text: str
+    target: Optional[int] = None
+
+
+# A command handler is called with the game, the command and the game's event log. It returns False if it rejects
+# the command, which then counts as invalid, and None otherwise
+Handler = Callable[[Any, Command, Any], Optional[bool]]
+
+
+def parse_command(text: str) -> Command:
+    """Return the command for the given input text, splitting off its first word as the verb.
+
+    >>> parse_command('take lucky uoft mug')
+    Command(verb='take', argument='lucky uoft mug', text='take lucky uoft mug', target=None)
+    >>> parse_command('look')
+    Command(verb='look', argument='', text='look', target=None)
+    """
+    verb, _, argument = text.partition(' ')
+    return Command(verb, argument.strip(), text)
+
+
+def compile_location_commands(available_commands: Mapping[str, int],
+                              special_commands: tuple[str, ...]) -> Mapping[str, Command]:
+    """Return the table of commands available only at a location with the given movement and special commands.
+
+    >>> table = compile_location_commands({'go east': 20}, ('retrieve usb',))
+    >>> table['go east']
+    Command(verb='move', argument='', text='go east', target=20)
+    >>> table['retrieve usb'].verb
+    'retrieve'
+    """
+    table = {text: parse_command(text) for text in special_commands}
+    for text, target in available_commands.items():
+        table[text] = Command(MOVE, '', text, target)
+    return MappingProxyType(table)
+
+
+class CommandRegistry:
+    """The handlers for every kind of command.
+
+    A handler registered with register_command runs for one exact command text anywhere in the world, such as
+    "look". A handler registered with register_verb runs for any command starting with that verb, such as
+    "take <item>", and for any of a location's special commands with that verb. A handler registered with
+    register_special only runs for a location's special commands with that verb, so the verb is not a command
+    anywhere else.
+
+    >>> registry = CommandRegistry()
+    >>> registry.register_command('look', lambda game, command, log: print('You look around.'))
+    >>> registry.register_verb('wave', lambda game, command, log: print('You wave at', command.argument))
+    >>> handler, command = registry.resolve({}, 'wave hello')
+    >>> handler(None, command, None)
+    You wave at hello
+    >>> registry.resolve({}, 'dance') is None
+    True
+    >>> registry.register_special('retrieve', lambda game, command, log: print('You retrieve', command.argument))
+    >>> registry.resolve({}, 'retrieve usb') is None
+    True
+    >>> handler, command = registry.resolve(compile_location_commands({}, ('retrieve usb',)), 'retrieve usb')
+    >>> handler(None, command, None)
+    You retrieve usb
+    """
+    # Private Instance Attributes:
+    #   - _commands: A mapping from each exact command text to its handler and parsed command
+    #   - _verbs: A mapping from each verb to its handler
+    #   - _specials: A mapping from each verb only used by special commands to its handler
+    _commands: dict[str, tuple[Handler, Command]]
+    _verbs: dict[str, Handler]
+    _specials: dict[str, Handler]
+
+    def __init__(self) -> None:
+        """Initialize a new registry with no handlers."""
+        self._commands = {}
+        self._verbs = {}
+        self._specials = {}
+
+    @property
+    def command_names(self) -> list[str]:
+        """The exact commands available everywhere, in the order they were registered."""
+        return list(self._commands)
+
+    def register_command(self, text: str, handler: Handler) -> None:
+        """Register handler to run whenever the player enters exactly the given text."""
+        self._commands[text] = (handler, parse_command(text))
+
+    def register_verb(self, verb: str, handler: Handler) -> None:
+        """Register handler to run for commands starting with the given verb.
+
+        Registering MOVE sets the handler for every location's movement commands.
+        """
+        self._verbs[verb] = handler
+
+    def register_special(self, verb: str, handler: Handler) -> None:
+        """Register handler to run for a location's special commands starting with the given verb, such as
+        "retrieve usb". Other commands starting with the verb are not valid."""
+        self._specials[verb] = handler
+
+    def map_handlers(self, function: Callable[[Handler], Handler]) -> CommandRegistry:
+        """Return a new registry for the same commands and verbs, with every handler replaced by function(handler).
+
+        >>> registry = CommandRegistry()
+        >>> registry.register_command('look', lambda game, command, log: print('You look around.'))
+        >>> loud = registry.map_handlers(lambda handler: lambda game, command, log: print('LOUDLY:', command.text))
+        >>> handler, command = loud.resolve({}, 'look')
+        >>> handler(None, command, None)
+        LOUDLY: look
+        """
+        registry = CommandRegistry()
+        replaced = {}
+        for text, (handler, command) in self._commands.items():
+            if handler not in replaced:
+                replaced[handler] = function(handler)
+            registry._commands[text] = (replaced[handler], command)
+        for verb, handler in self._verbs.items():
+            if handler not in replaced:
+                replaced[handler] = function(handler)
+            registry._verbs[verb] = replaced[handler]
+        for verb, handler in self._specials.items():
+            if handler not in replaced:
+                replaced[handler] = function(handler)
+            registry._specials[verb] = replaced[handler]
+        return registry
+
+    def resolve(self, location_commands: Mapping[str, Command], text: str) -> Optional[tuple[Handler, Command]]:
+        """Return the handler and parsed command for the given input text at a location with the given command
+        table, or None if the text is not a valid command there."""
+        command = location_commands.get(text)
+        if command is not None:
+            handler = self._specials.get(command.verb) or self._verbs.get(command.verb)
+            return (handler, command) if handler is not None else None
+
+        entry = self._commands.get(text)
+        if entry is not None:
+            return entry
+
+        command = parse_command(text)
+        if command.argument:
+            handler = self._verbs.get(command.verb)
+            if handler is not None:
+                return handler, command
+        return None
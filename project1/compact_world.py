@@ -0,0 +1,673 @@
+"""CSC111 Project 1: Text Adventure Game - Compact World Store
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains a compact in-memory store for very large worlds, which keeps every
+location and item in typed arrays instead of one Python object per location.
+
+A CompactWorld stores one column per field (struct of arrays):
+
+    ids                     one int32 per location
+    names, descriptions     the UTF-8 text of every location back to back, with an offset per location
+    exits                   every (command id, target id) pair, grouped by location, with the range
+                            of each location's exits in a start offset array
+    special commands        command ids, grouped the same way
+    flags                   one byte per location holding its locked and visited bits
+    grid positions          the row and column of each location, two int32 per location
+    items                   item bags, only for the locations that hold items
+
+Command strings are interned, since a world only uses a handful of distinct commands. A location
+costs a few dozen bytes plus its text, rather than the several hundred bytes of a Location with
+its state, dictionaries and strings, and searches over exits read neighbouring array slots rather
+than chasing pointers between objects.
+
+Locations and items are read through LocationView and ItemView, lightweight views that are
+Location and Item objects: every attribute of a Location or Item can be read as usual, and the
+locked, visited and items fields of a view's state can also be changed, which changes the store.
+
+A game can also be played on a CompactWorld: compact_template returns a WorldTemplate whose
+locations are converted from the store only when a game looks them up, and only the most
+recently used are kept converted. Route finding and the map read the store's exit and grid
+arrays directly, so they never convert a location.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import os
+from array import array
+from collections import OrderedDict, deque
+from types import MappingProxyType
+from typing import Any, Iterable, Iterator, Mapping, Optional
+
+from commands import compile_location_commands
+from game_entities import Item, ItemBag, ItemRegistry, Location, LocationState
+from world_binary import BinaryWorld, is_world_file, read_source_hash
+from world_loader import item_from_json, iter_game_data, location_from_json
+from world_template import LocationTemplate, WorldTemplate
+
+# The bits of a location's flags byte
+_LOCKED = 1
+_VISITED = 2
+
+# The number of LocationTemplates a CompactLocations keeps converted by default
+TEMPLATE_CACHE_SIZE = 4096
+# The number of Location objects each game keeps when playing a compact world
+SESSION_CACHE_SIZE = 1024
+
+
+class _StringColumn:
+    """A column of optional strings, stored as UTF-8 back to back in one buffer."""
+    # Private Instance Attributes:
+    #   - _data: The encoded strings, one after another
+    #   - _offsets: The offset in _data of each string, followed by the length of _data
+    #   - _missing: The indexes of the strings that are None
+    __slots__ = ('_data', '_offsets', '_missing')
+    _data: bytearray
+    _offsets: array
+    _missing: set[int]
+
+    def __init__(self) -> None:
+        """Initialize a new empty column."""
+        self._data = bytearray()
+        self._offsets = array('q', [0])
+        self._missing = set()
+
+    def append(self, value: Optional[str]) -> None:
+        """Add the given string to the end of this column."""
+        if value is None:
+            self._missing.add(len(self._offsets) - 1)
+        else:
+            self._data += value.encode('utf-8')
+        self._offsets.append(len(self._data))
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        """Return the string at the given index."""
+        if index in self._missing:
+            return None
+        return self._data[self._offsets[index]:self._offsets[index + 1]].decode('utf-8')
+
+    def nbytes(self) -> int:
+        """Return the number of bytes this column's buffers use."""
+        return len(self._data) + self._offsets.itemsize * len(self._offsets)
+
+
+class CompactWorld(Mapping[int, Location]):
+    """The locations and items of a world, stored column by column in typed arrays.
+
+    >>> world = CompactWorld.load('game_data.json')
+    >>> location = world[1]
+    >>> isinstance(location, Location), location.name, location.available_commands
+    (True, 'Your Room', {'go east': 20})
+    >>> world[4].locked
+    True
+    >>> world[4].state.locked = False
+    >>> world[4].locked, world.neighbours(1)
+    (False, [20])
+    >>> world.items[0].name
+    'usb'
+
+    Instance Attributes:
+        - items: A view of every item in the world, in order
+    """
+    items: list[ItemView]
+    # Private Instance Attributes:
+    #   - _ids: The ID of each location, indexed by location index
+    #   - _dense: The location index of each location ID, indexed by ID (-1 for no location), for IDs that are not
+    #             much larger than the number of locations
+    #   - _sparse: A mapping from every other location ID to its location index
+    #   - _names, _brief_descriptions, _long_descriptions: The text of each location, indexed by location index
+    #   - _exit_starts: The index in _exit_commands of each location's first exit, followed by the number of exits
+    #   - _exit_commands, _exit_targets: The command ID and target location ID of every exit
+    #   - _special_starts: The index in _special_commands of each location's first special command, followed by the
+    #                      number of special commands
+    #   - _special_commands: The command ID of every special command
+    #   - _commands: The interned command strings, indexed by command ID
+    #   - _command_ids: A mapping from each interned command string to its command ID
+    #   - _flags: The locked and visited bits of each location, indexed by location index
+    #   - _grid: The row and column of each location, two per location
+    #   - _off_grid: The location indexes of the locations without a grid position
+    #   - _items: The items at each location that holds any, keyed by location index
+    #   - _item_names, _item_descriptions: The text of each item, indexed by item index
+    #   - _item_numbers: The start position, target position (0 for None) and points of each item, three per item
+    #   - _item_aliases: The aliases of each item that has any, keyed by item index
+    _ids: array
+    _dense: array
+    _sparse: dict[int, int]
+    _names: _StringColumn
+    _brief_descriptions: _StringColumn
+    _long_descriptions: _StringColumn
+    _exit_starts: array
+    _exit_commands: array
+    _exit_targets: array
+    _special_starts: array
+    _special_commands: array
+    _commands: list[str]
+    _command_ids: dict[str, int]
+    _flags: bytearray
+    _grid: array
+    _off_grid: set[int]
+    _items: dict[int, ItemBag]
+    _item_names: _StringColumn
+    _item_descriptions: _StringColumn
+    _item_numbers: array
+    _item_aliases: dict[int, tuple[str, ...]]
+
+    def __init__(self, locations: Iterable[Location] = (), items: Iterable[Item] = ()) -> None:
+        """Initialize a new store holding the given locations and items.
+
+        The locations are copied into the store one at a time, so they can be produced lazily.
+        """
+        self._ids = array('i')
+        self._dense = array('i')
+        self._sparse = {}
+        self._names = _StringColumn()
+        self._brief_descriptions = _StringColumn()
+        self._long_descriptions = _StringColumn()
+        self._exit_starts = array('I', [0])
+        self._exit_commands = array('I')
+        self._exit_targets = array('i')
+        self._special_starts = array('I', [0])
+        self._special_commands = array('I')
+        self._commands = []
+        self._command_ids = {}
+        self._flags = bytearray()
+        self._grid = array('i')
+        self._off_grid = set()
+        self._items = {}
+        self._item_names = _StringColumn()
+        self._item_descriptions = _StringColumn()
+        self._item_numbers = array('i')
+        self._item_aliases = {}
+        self.items = []
+        for location in locations:
+            self.add_location(location)
+        for item in items:
+            self.add_item(item)
+
+    @staticmethod
+    def load(filename: str, other: Optional[dict[str, Any]] = None) -> CompactWorld:
+        """Load a new store from the given game data JSON file or compiled world file, without ever holding more
+        than one Location object at a time.
+
+        If other is given, the value of every other top-level key of the game data (such as "rules") is stored in it.
+        """
+        if is_world_file(filename):
+            world = BinaryWorld(filename)
+            try:
+                if other is not None:
+                    other.update(world.other())
+                return CompactWorld((world.location(id_num) for id_num in world.location_ids()), world.items())
+            finally:
+                world.close()
+
+        store = CompactWorld()
+        with open(filename, 'r') as f:
+            for key, value in iter_game_data(f, {'locations', 'items'}):
+                if key == 'locations':
+                    store.add_location(location_from_json(value))
+                elif key == 'items':
+                    store.add_item(item_from_json(value))
+                elif other is not None:
+                    other[key] = value
+        return store
+
+    def add_location(self, location: Location) -> None:
+        """Copy the given location into this store.
+
+        Preconditions:
+            - location.id_num not in self
+        """
+        index = len(self._ids)
+        id_num = location.id_num
+        self._ids.append(id_num)
+        if 0 <= id_num < 2 * index + 1024:
+            if id_num >= len(self._dense):
+                self._dense.extend(array('i', [-1]) * (id_num + 1 - len(self._dense)))
+            self._dense[id_num] = index
+        else:
+            self._sparse[id_num] = index
+        self._names.append(location.name)
+        self._brief_descriptions.append(location.brief_description)
+        self._long_descriptions.append(location.long_description)
+        for command, target in location.available_commands.items():
+            self._exit_commands.append(self._intern(command))
+            self._exit_targets.append(target)
+        self._exit_starts.append(len(self._exit_commands))
+        for command in location.special_commands:
+            self._special_commands.append(self._intern(command))
+        self._special_starts.append(len(self._special_commands))
+        self._flags.append((_LOCKED if location.state.locked else 0) | (_VISITED if location.state.visited else 0))
+        if location.grid_position is None:
+            self._off_grid.add(index)
+        self._grid.extend(location.grid_position or (0, 0))
+        if location.state.items:
+            self._items[index] = location.state.items.copy()
+
+    def add_item(self, item: Item) -> None:
+        """Copy the given item into this store."""
+        index = len(self.items)
+        self._item_names.append(item.name)
+        self._item_descriptions.append(item.description)
+        self._item_numbers.extend((item.start_position, item.target_position or 0, item.target_points))
+        if item.aliases:
+            self._item_aliases[index] = tuple(item.aliases)
+        self.items.append(ItemView(self, index))
+
+    def nbytes(self) -> int:
+        """Return an estimate of the number of bytes used by the arrays and text of this store, not counting the item
+        bags of locations that hold items."""
+        arrays = (self._ids, self._dense, self._exit_starts, self._exit_commands, self._exit_targets,
+                  self._special_starts, self._special_commands, self._grid)
+        return (sum(a.itemsize * len(a) for a in arrays) + len(self._flags) + self._names.nbytes()
+                + self._brief_descriptions.nbytes() + self._long_descriptions.nbytes() + 100 * len(self._sparse))
+
+    def __getitem__(self, id_num: int) -> LocationView:
+        """Return a view of the location with the given ID."""
+        return LocationView(self, self._position(id_num))
+
+    def __contains__(self, id_num: object) -> bool:
+        """Return whether there is a location with the given ID."""
+        return isinstance(id_num, int) and self._find(id_num) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        """Return an iterator over the location IDs, in the order they were added."""
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        """Return the number of locations."""
+        return len(self._ids)
+
+    def exits(self, id_num: int) -> list[tuple[str, int]]:
+        """Return the (command, target ID) pairs of the location with the given ID."""
+        index = self._position(id_num)
+        start, end = self._exit_starts[index], self._exit_starts[index + 1]
+        return [(self._commands[command_id], target)
+                for command_id, target in zip(self._exit_commands[start:end], self._exit_targets[start:end])]
+
+    def neighbours(self, id_num: int) -> list[int]:
+        """Return the IDs of the locations the location with the given ID has exits to."""
+        index = self._position(id_num)
+        return self._exit_targets[self._exit_starts[index]:self._exit_starts[index + 1]].tolist()
+
+    def reachable(self, source: int, skip_locked: bool = True) -> list[int]:
+        """Return the IDs of the locations reachable from source, closest first. Unless skip_locked is False, locked
+        locations are neither entered nor searched through.
+
+        >>> world = CompactWorld.load('game_data.json')
+        >>> reachable = world.reachable(1)
+        >>> reachable[:3], 4 in reachable, 4 in world.reachable(1, skip_locked=False)
+        ([1, 20, 3], False, True)
+        """
+        starts, targets, flags = self._exit_starts, self._exit_targets, self._flags
+        seen = {source}
+        order = [source]
+        queue = deque([self._position(source)])
+        while queue:
+            index = queue.popleft()
+            for target in targets[starts[index]:starts[index + 1]]:
+                if target in seen:
+                    continue
+                target_index = self._find(target)
+                if target_index is None or (skip_locked and flags[target_index] & _LOCKED):
+                    continue
+                seen.add(target)
+                order.append(target)
+                queue.append(target_index)
+        return order
+
+    def _find(self, id_num: int) -> Optional[int]:
+        """Return the location index of the location with the given ID, or None if there is none."""
+        if 0 <= id_num < len(self._dense):
+            index = self._dense[id_num]
+            return index if index >= 0 else None
+        return self._sparse.get(id_num)
+
+    def _position(self, id_num: int) -> int:
+        """Return the location index of the location with the given ID, raising KeyError if there is none."""
+        index = self._find(id_num)
+        if index is None:
+            raise KeyError(id_num)
+        return index
+
+    def _intern(self, command: str) -> int:
+        """Return the ID of the given command, interning it if it has not been seen before."""
+        command_id = self._command_ids.get(command)
+        if command_id is None:
+            command_id = len(self._commands)
+            self._commands.append(command)
+            self._command_ids[command] = command_id
+        return command_id
+
+
+class LocationView(Location):
+    """A Location whose fields are read from a CompactWorld.
+
+    The commands and text of a view are read-only; available_commands and special_commands return new containers.
+    The fields of its state can be changed, which changes the store.
+    """
+    # Private Instance Attributes:
+    #   - _world: The store holding this location
+    #   - _index: The location index of this location in the store
+    __slots__ = ('_world', '_index')
+    _world: CompactWorld
+    _index: int
+
+    def __init__(self, world: CompactWorld, index: int) -> None:
+        """Initialize a view of the location with the given index in the given store."""
+        # Location.__init__ is deliberately not called: every field is read from the store
+        self._world = world
+        self._index = index
+
+    @property
+    def id_num(self) -> int:
+        """The unique ID of this location."""
+        return self._world._ids[self._index]
+
+    @property
+    def name(self) -> str:
+        """The name of this location."""
+        return self._world._names[self._index]
+
+    @property
+    def brief_description(self) -> str:
+        """A short description of this location."""
+        return self._world._brief_descriptions[self._index]
+
+    @property
+    def long_description(self) -> Optional[str]:
+        """A detailed description of this location, or None."""
+        return self._world._long_descriptions[self._index]
+
+    @property
+    def available_commands(self) -> dict[str, int]:
+        """A new dictionary mapping this location's movement commands to location IDs."""
+        return dict(self._world.exits(self.id_num))
+
+    @property
+    def special_commands(self) -> list[str]:
+        """A new list of the special actions a player can take at this location."""
+        world = self._world
+        start, end = world._special_starts[self._index], world._special_starts[self._index + 1]
+        return [world._commands[command_id] for command_id in world._special_commands[start:end]]
+
+    @property
+    def grid_position(self) -> Optional[tuple[int, int]]:
+        """The (row, column) of this location on the map, or None if it is not on the map."""
+        if self._index in self._world._off_grid:
+            return None
+        return self._world._grid[2 * self._index], self._world._grid[2 * self._index + 1]
+
+    @property
+    def state(self) -> StateView:
+        """The state of this location."""
+        return StateView(self._world, self._index)
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether other is a view of the same location in the same store."""
+        return isinstance(other, LocationView) and other._world is self._world and other._index == self._index
+
+    def __hash__(self) -> int:
+        """Return a hash of this view."""
+        return hash((id(self._world), self._index))
+
+
+class StateView(LocationState):
+    """A LocationState whose fields are read from and written to a CompactWorld."""
+    # Private Instance Attributes:
+    #   - _world: The store holding this state
+    #   - _index: The location index of this state's location in the store
+    __slots__ = ('_world', '_index')
+    _world: CompactWorld
+    _index: int
+
+    def __init__(self, world: CompactWorld, index: int) -> None:
+        """Initialize a view of the state of the location with the given index in the given store."""
+        # LocationState.__init__ is deliberately not called: every field is read from the store
+        self._world = world
+        self._index = index
+
+    @property
+    def items(self) -> ItemBag:
+        """The names of the items at this location. The bag is stored the first time it is accessed, so it can be
+        changed in place."""
+        items = self._world._items.get(self._index)
+        if items is None:
+            items = self._world._items[self._index] = ItemBag()
+        return items
+
+    @items.setter
+    def items(self, value: ItemBag) -> None:
+        self._world._items[self._index] = value
+
+    @property
+    def locked(self) -> bool:
+        """Whether this location is locked."""
+        return bool(self._world._flags[self._index] & _LOCKED)
+
+    @locked.setter
+    def locked(self, value: bool) -> None:
+        self._set_flag(_LOCKED, value)
+
+    @property
+    def visited(self) -> bool:
+        """Whether this location has been visited."""
+        return bool(self._world._flags[self._index] & _VISITED)
+
+    @visited.setter
+    def visited(self, value: bool) -> None:
+        self._set_flag(_VISITED, value)
+
+    def _set_flag(self, bit: int, value: bool) -> None:
+        """Set or clear the given bit of this location's flags."""
+        flags = self._world._flags
+        flags[self._index] = flags[self._index] | bit if value else flags[self._index] & ~bit
+
+
+class ItemView(Item):
+    """An Item whose fields are read from a CompactWorld. Its fields are read-only."""
+    # Private Instance Attributes:
+    #   - _world: The store holding this item
+    #   - _index: The item index of this item in the store
+    __slots__ = ('_world', '_index')
+    _world: CompactWorld
+    _index: int
+
+    def __init__(self, world: CompactWorld, index: int) -> None:
+        """Initialize a view of the item with the given index in the given store."""
+        # Item.__init__ is deliberately not called: every field is read from the store
+        self._world = world
+        self._index = index
+
+    @property
+    def name(self) -> str:
+        """The name of this item."""
+        return self._world._item_names[self._index]
+
+    @property
+    def description(self) -> str:
+        """A short description of this item."""
+        return self._world._item_descriptions[self._index]
+
+    @property
+    def start_position(self) -> int:
+        """The ID of the location where this item starts."""
+        return self._world._item_numbers[3 * self._index]
+
+    @property
+    def target_position(self) -> Optional[int]:
+        """The ID of the location where this item should be returned, or None."""
+        return self._world._item_numbers[3 * self._index + 1] or None
+
+    @property
+    def target_points(self) -> int:
+        """The number of points this item contributes if placed correctly."""
+        return self._world._item_numbers[3 * self._index + 2]
+
+    @property
+    def aliases(self) -> list[str]:
+        """A new list of the other names the player can use to refer to this item."""
+        return list(self._world._item_aliases.get(self._index, ()))
+
+
+class CompactLocations(Mapping):
+    """A read-only mapping from location ID to LocationTemplate, backed by a CompactWorld.
+
+    Each template is converted from the store the first time it is looked up, and only the most recently used
+    templates are kept. The store itself must not be changed while this mapping is in use.
+
+    >>> world = CompactWorld.load('game_data.json')
+    >>> locations = CompactLocations(world, ItemRegistry(world.items), capacity=1)
+    >>> locations[1].name, locations.exits(1)
+    ('Your Room', (('go east', 20),))
+    >>> locations[20].name, locations.converted
+    ('Dorms West', 1)
+    >>> locations.starting_state(4)
+    (True, False, True)
+
+    Instance Attributes:
+        - capacity: The maximum number of templates kept converted
+    """
+    capacity: int
+    # Private Instance Attributes:
+    #   - _world: The store the templates are converted from
+    #   - _registry: The lookup table used to give the items of each location their canonical names
+    #   - _templates: The templates kept converted, keyed by location ID, least recently used first
+    _world: CompactWorld
+    _registry: ItemRegistry
+    _templates: OrderedDict[int, LocationTemplate]
+
+    def __init__(self, world: CompactWorld, registry: ItemRegistry, capacity: int = TEMPLATE_CACHE_SIZE) -> None:
+        """Initialize a new mapping over the given store, keeping at most capacity templates converted.
+
+        Preconditions:
+            - capacity > 0
+        """
+        self.capacity = capacity
+        self._world = world
+        self._registry = registry
+        self._templates = OrderedDict()
+
+    @property
+    def converted(self) -> int:
+        """The number of templates currently kept converted."""
+        return len(self._templates)
+
+    def __getitem__(self, id_num: int) -> LocationTemplate:
+        """Return the template of the location with the given ID, converting it if it is not kept."""
+        template = self._templates.get(id_num)
+        if template is not None:
+            self._templates.move_to_end(id_num)
+            return template
+        if not isinstance(id_num, int):
+            raise KeyError(id_num)
+        template = self._convert(self._world[id_num])
+        self._templates[id_num] = template
+        if len(self._templates) > self.capacity:
+            self._templates.popitem(last=False)
+        return template
+
+    def _convert(self, view: LocationView) -> LocationTemplate:
+        """Return the template of the location the given view reads."""
+        world = self._world
+        items = world._items.get(view._index)
+        available_commands = view.available_commands
+        special_commands = tuple(view.special_commands)
+        flags = world._flags[view._index]
+        return LocationTemplate(view.id_num, view.name, view.brief_description, view.long_description,
+                                MappingProxyType(available_commands), special_commands,
+                                ItemBag(self._registry.canonical_name(name) for name in items.elements()).snapshot()
+                                if items else (),
+                                bool(flags & _LOCKED), bool(flags & _VISITED),
+                                compile_location_commands(available_commands, special_commands), view.grid_position)
+
+    def exits(self, id_num: int) -> tuple[tuple[str, int], ...]:
+        """Return the (command, destination ID) pairs of the location with the given ID, read from the store's exit
+        arrays. Raise KeyError if there is no such location."""
+        return tuple(self._world.exits(id_num))
+
+    def names(self) -> Iterator[tuple[int, str]]:
+        """Return an iterator over the (location ID, name) of every location, without converting any."""
+        world = self._world
+        return ((id_num, world._names[index]) for index, id_num in enumerate(world._ids))
+
+    def grid_positions(self) -> Iterator[tuple[int, tuple[int, int]]]:
+        """Return an iterator over the (location ID, grid position) of every location on the map, without converting
+        any."""
+        world = self._world
+        for index, id_num in enumerate(world._ids):
+            if index not in world._off_grid:
+                yield id_num, (world._grid[2 * index], world._grid[2 * index + 1])
+
+    def starting_state(self, id_num: int) -> tuple[bool, bool, bool]:
+        """Return whether the location with the given ID is locked, is visited and has any items when a game starts,
+        without converting it. Raise KeyError if there is no such location."""
+        index = self._world._position(id_num)
+        flags = self._world._flags[index]
+        return bool(flags & _LOCKED), bool(flags & _VISITED), bool(self._world._items.get(index))
+
+    def __contains__(self, id_num: object) -> bool:
+        """Return whether there is a location with the given ID, without converting it."""
+        return id_num in self._world
+
+    def __iter__(self) -> Iterator[int]:
+        """Return an iterator over all location IDs."""
+        return iter(self._world)
+
+    def __len__(self) -> int:
+        """Return the number of locations."""
+        return len(self._world)
+
+
+class CompactTemplate(WorldTemplate):
+    """The template of a world kept in a CompactWorld, which reads the starting state of a location from the store
+    without converting it.
+
+    Instance Attributes:
+        - locations: The locations of the world, converted from the store on demand
+    """
+    locations: CompactLocations
+
+    def starting_state(self, id_num: int) -> tuple[bool, bool, bool]:
+        """Return whether the location with the given ID is locked, is visited and has any items when a game starts,
+        without converting it."""
+        return self.locations.starting_state(id_num)
+
+
+# The compact templates loaded so far, keyed by (absolute filename, size, modification time)
+_COMPACT: dict[tuple[str, int, int], CompactTemplate] = {}
+
+
+def compact_template(filename: str) -> CompactTemplate:
+    """Return a world template for the given game data JSON file or compiled world file that keeps the world in a
+    CompactWorld, loading it only if this process has not already done so.
+
+    >>> template = compact_template('game_data.json')
+    >>> template is compact_template('game_data.json')
+    True
+    >>> template.locations[1].name, ('movie cd', 3) in template.rules.use
+    ('Your Room', True)
+    """
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    template = _COMPACT.get(key)
+    if template is None:
+        for old_key in [k for k in _COMPACT if k[0] == path]:
+            del _COMPACT[old_key]
+        other = {}
+        world = CompactWorld.load(path, other)
+        registry = ItemRegistry(world.items)
+        template = CompactTemplate(CompactLocations(world, registry), world.items, registry, other,
+                                   SESSION_CACHE_SIZE, read_source_hash(path))
+        _COMPACT[key] = template
+    return template
@@ -0,0 +1,416 @@
+"""CSC111 Project 1: Text Adventure Game - Event Journal
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains an append-only journal that records the games being played to disk,
+so that they can be rebuilt after a crash.
+
+Every game attached to a journal gets a session ID, and each valid command it runs is appended
+as a record of the command and the location it led to. Games are deterministic, so replaying a
+session's commands in a new game rebuilds its position, inventory, score and event log exactly.
+
+Many games share one journal, and their records are buffered in memory and written together by
+commit, with a single fsync for the whole batch (group commit). Records cost about 20 bytes each,
+so thousands of sessions can share one disk. The journal is split into numbered segment files of
+about segment_size bytes each. Only the buffered records are kept in memory, and once every
+session with records in a segment has ended, the segment is deleted.
+
+Each segment starts with MAGIC and VERSION, followed by records laid out as
+
+    length (2 bytes) | CRC-32 of payload (4 bytes) | payload
+
+where the payload is a record type followed by the session ID and the record's fields. A record
+that was only partly written when the process died fails its length or CRC check, and is
+discarded along with everything after it when the journal is reopened.
+
+    python event_journal.py journal_dir game_data.json
+
+lists the sessions in journal_dir that never ended, with the position replaying each one reaches.
+
+The doctests in this module turn the world cache (see world_cache.py) off, so that running them
+does not write to the user's cache directory:
+
+    >>> import os
+    >>> os.environ['ADVENTURE_WORLD_CACHE'] = ''
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import struct
+import threading
+import zlib
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from adventure import AdventureGame
+from proj1_event_logger import EventList
+from world_template import SessionLocations
+
+MAGIC = b'AGJ'
+VERSION = 1
+DEFAULT_SEGMENT_SIZE = 4 * 1024 * 1024
+
+# Record types
+_START = 1
+_STEP = 2
+_END = 3
+
+_HEADER = struct.Struct('<HI')
+_START_FIELDS = struct.Struct('<Bii8s')
+_STEP_FIELDS = struct.Struct('<BiiH')
+_END_FIELDS = struct.Struct('<Bi')
+
+# The fingerprint recorded for games that are not backed by a shared world template
+_NO_FINGERPRINT = bytes(8)
+
+
+class JournalError(Exception):
+    """Raised when a journal cannot be read, or a session does not replay to the positions it recorded."""
+
+
+@dataclass
+class JournaledSession:
+    """The records of one session in a journal.
+
+    Instance Attributes:
+        - session_id: The ID of the session
+        - initial_location_id: The location the game started at
+        - fingerprint: The fingerprint of the world the game was played in
+        - steps: The (command, location ID after the command) pair of each valid command, in order
+        - ended: Whether the session ended normally
+    """
+    session_id: int
+    initial_location_id: int
+    fingerprint: bytes
+    steps: list[tuple[str, int]] = field(default_factory=list)
+    ended: bool = False
+
+
+class EventJournal:
+    """A segmented, append-only journal of the games being played.
+
+    >>> import tempfile
+    >>> directory = tempfile.mkdtemp()
+    >>> journal = EventJournal(directory)
+    >>> game = AdventureGame('game_data.json', 1)
+    >>> session_id = journal.attach(game)
+    >>> for command in ["go east", "fly", "score"]:
+    ...     result = game.step(command)
+    >>> journal.commit()
+    >>> journal.close()
+
+    >>> reopened = EventJournal(directory)
+    >>> reopened.live_sessions() == [session_id]
+    True
+    >>> replayed = replay('game_data.json', reopened.read_session(session_id))
+    >>> replayed.current_location_id, replayed.game_state.moves, replayed.log.get_id_log()
+    (20, 2, [1, 20])
+
+    Instance Attributes:
+        - directory: The directory holding the segment files
+        - segment_size: The size in bytes past which a new segment is started
+    """
+    directory: str
+    segment_size: int
+    # Private Instance Attributes:
+    #   - _lock: Guards the buffer, which commit may write from another thread while records are appended
+    #   - _buffer: The encoded records appended since the last commit
+    #   - _buffer_sessions: The sessions with records in _buffer
+    #   - _buffer_ended: The sessions whose end is recorded in _buffer
+    #   - _appended: The number of records appended since the journal was opened
+    #   - _committed: The number of those records that have been written and synced to disk
+    #   - _committing: The most recent commit started by sync, or None
+    #   - _file: The segment being written
+    #   - _segment: The number of the segment being written
+    #   - _segment_bytes: The size of the segment being written
+    #   - _segment_sessions: The sessions with records in each segment on disk, keyed by segment number
+    #   - _live: The sessions that have started but not ended
+    #   - _next_session: The ID the next session attached will get
+    _lock: threading.Lock
+    _buffer: bytearray
+    _buffer_sessions: set[int]
+    _buffer_ended: set[int]
+    _appended: int
+    _committed: int
+    _committing: Optional[asyncio.Future]
+    _file: Optional[object]
+    _segment: int
+    _segment_bytes: int
+    _segment_sessions: dict[int, set[int]]
+    _live: set[int]
+    _next_session: int
+
+    def __init__(self, directory: str, segment_size: int = DEFAULT_SEGMENT_SIZE) -> None:
+        """Open the journal in the given directory, creating it if it does not exist.
+
+        Existing segments are scanned (without keeping their records) to find the sessions that never ended, and a
+        partly written record at the end of the last segment is cut off. New records go to a new segment.
+        """
+        self.directory = directory
+        self.segment_size = segment_size
+        self._lock = threading.Lock()
+        self._buffer = bytearray()
+        self._buffer_sessions = set()
+        self._buffer_ended = set()
+        self._appended = 0
+        self._committed = 0
+        self._committing = None
+        self._segment_sessions = {}
+        self._live = set()
+        self._next_session = 1
+        os.makedirs(directory, exist_ok=True)
+
+        segments = self._segment_numbers()
+        for number in segments:
+            sessions = set()
+            end = 0
+            for end, payload in _read_segment(self._segment_path(number)):
+                kind, session_id = _END_FIELDS.unpack_from(payload)
+                sessions.add(session_id)
+                if kind == _START:
+                    self._live.add(session_id)
+                    self._next_session = max(self._next_session, session_id + 1)
+                elif kind == _END:
+                    self._live.discard(session_id)
+            if number == segments[-1] and end < os.path.getsize(self._segment_path(number)):
+                os.truncate(self._segment_path(number), max(end, len(MAGIC) + 1))
+            self._segment_sessions[number] = sessions
+
+        self._segment = segments[-1] if segments else 0
+        self._open_segment()
+        self._collect()
+
+    def live_sessions(self) -> list[int]:
+        """Return the IDs of the sessions that have started but not ended, in order."""
+        return sorted(self._live)
+
+    def attach(self, game: AdventureGame, session_id: Optional[int] = None) -> int:
+        """Journal every valid command the given game runs from now on, and return its session ID.
+
+        If session_id is given, the game continues that session (as after replay); otherwise a new session is started
+        at the game's current location. Like instrumentation, this replaces game.step on the game itself.
+        """
+        if session_id is None:
+            session_id = self._next_session
+            self._next_session += 1
+            locations = game.locations
+            fingerprint = locations.template.fingerprint if isinstance(locations, SessionLocations) \
+                else _NO_FINGERPRINT
+            self._append(session_id, _START_FIELDS.pack(_START, session_id, game.current_location_id, fingerprint))
+            self._live.add(session_id)
+
+        step = game.step
+
+        def journaled_step(command: str) -> object:
+            result = step(command)
+            if result.valid:
+                encoded = result.command.encode('utf-8')[:0xFFFF - _STEP_FIELDS.size]
+                self._append(session_id, _STEP_FIELDS.pack(_STEP, session_id, game.current_location_id,
+                                                            len(encoded)) + encoded)
+            if result.game_over:
+                self.end_session(session_id)
+            return result
+
+        game.step = journaled_step
+        return session_id
+
+    def end_session(self, session_id: int) -> None:
+        """Record that the given session has ended, so that it is not replayed and its segments can be deleted.
+        Ending a session that has already ended does nothing."""
+        if session_id in self._live:
+            self._live.discard(session_id)
+            self._append(session_id, _END_FIELDS.pack(_END, session_id), ended=True)
+
+    @property
+    def pending(self) -> int:
+        """The number of records appended but not yet committed."""
+        return self._appended - self._committed
+
+    def commit(self) -> None:
+        """Write every record appended so far to disk with a single write and fsync, and start a new segment if the
+        current one is full. This is safe to call from another thread while records are being appended."""
+        with self._lock:
+            data, sessions, ended = self._buffer, self._buffer_sessions, self._buffer_ended
+            target = self._appended
+            self._buffer, self._buffer_sessions, self._buffer_ended = bytearray(), set(), set()
+        if data:
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._segment_bytes += len(data)
+            self._segment_sessions[self._segment].update(sessions)
+        self._committed = target
+        if self._segment_bytes >= self.segment_size:
+            self._file.close()
+            self._open_segment()
+            self._collect()
+        elif ended:
+            self._collect()
+
+    async def sync(self) -> None:
+        """Wait until every record appended so far is on disk.
+
+        Callers that arrive while a commit is running wait for it and then share the next one, so one fsync covers
+        every session that appended in the meantime.
+        """
+        target = self._appended
+        while self._committed < target:
+            if self._committing is None or self._committing.done():
+                self._committing = asyncio.ensure_future(asyncio.to_thread(self.commit))
+            await asyncio.shield(self._committing)
+
+    def close(self) -> None:
+        """Commit any buffered records and close the journal."""
+        self.commit()
+        self._file.close()
+
+    def read_session(self, session_id: int) -> JournaledSession:
+        """Return the records of the given session, reading them from disk.
+
+        Raise JournalError if the journal has no such session.
+        """
+        session = None
+        for number in self._segment_numbers():
+            if session_id not in self._segment_sessions.get(number, ()):
+                continue
+            for _, payload in _read_segment(self._segment_path(number)):
+                kind, record_session = _END_FIELDS.unpack_from(payload)
+                if record_session != session_id:
+                    continue
+                if kind == _START:
+                    _, _, location_id, fingerprint = _START_FIELDS.unpack_from(payload)
+                    session = JournaledSession(session_id, location_id, fingerprint)
+                elif session is None:
+                    raise JournalError(f'session {session_id} has records before its start')
+                elif kind == _STEP:
+                    _, _, location_id, length = _STEP_FIELDS.unpack_from(payload)
+                    start = _STEP_FIELDS.size
+                    session.steps.append((payload[start:start + length].decode('utf-8'), location_id))
+                elif kind == _END:
+                    session.ended = True
+        if session is None:
+            raise JournalError(f'the journal has no session {session_id}')
+        return session
+
+    def _append(self, session_id: int, payload: bytes, ended: bool = False) -> None:
+        """Buffer a record with the given payload for the next commit."""
+        with self._lock:
+            self._buffer += _HEADER.pack(len(payload), zlib.crc32(payload))
+            self._buffer += payload
+            self._buffer_sessions.add(session_id)
+            if ended:
+                self._buffer_ended.add(session_id)
+            self._appended += 1
+
+    def _open_segment(self) -> None:
+        """Start writing a new segment after the current one."""
+        self._segment += 1
+        self._file = open(self._segment_path(self._segment), 'wb', buffering=0)
+        self._file.write(MAGIC + bytes([VERSION]))
+        self._segment_bytes = len(MAGIC) + 1
+        self._segment_sessions[self._segment] = set()
+
+    def _collect(self) -> None:
+        """Delete the segments, other than the one being written, whose sessions have all ended."""
+        for number in [number for number, sessions in self._segment_sessions.items()
+                       if number != self._segment and not sessions & self._live]:
+            os.remove(self._segment_path(number))
+            del self._segment_sessions[number]
+
+    def _segment_numbers(self) -> list[int]:
+        """Return the numbers of the segments in this journal's directory, in order."""
+        return sorted(int(name[:-len('.journal')]) for name in os.listdir(self.directory)
+                      if name.endswith('.journal') and name[:-len('.journal')].isdigit())
+
+    def _segment_path(self, number: int) -> str:
+        """Return the path of the segment with the given number."""
+        return os.path.join(self.directory, f'{number:08d}.journal')
+
+
+def _read_segment(path: str) -> Iterator[tuple[int, bytes]]:
+    """Yield the offset just past each intact record in the given segment, with the record's payload, stopping at
+    the first record that is truncated or fails its CRC check.
+
+    Raise JournalError if the file is not a journal segment.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise JournalError(f'{path} is not a journal segment')
+    if data[len(MAGIC)] != VERSION:
+        raise JournalError(f'{path} has unsupported journal version {data[len(MAGIC)]}')
+    position = len(MAGIC) + 1
+    while position + _HEADER.size <= len(data):
+        length, crc = _HEADER.unpack_from(data, position)
+        start = position + _HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < max(length, _END_FIELDS.size) or zlib.crc32(payload) != crc:
+            return
+        position = start + length
+        yield position, payload
+
+
+def replay(game_data_file: str, session: JournaledSession, log_capacity: Optional[int] = None) -> AdventureGame:
+    """Return a new game in the given world, rebuilt by running every command the given session recorded.
+
+    Locations are marked as visited as they were when the player was shown them. If log_capacity is given, the
+    rebuilt game keeps only its most recent log_capacity events in memory; the full history stays in the journal.
+
+    Raise JournalError if the session was recorded in a different world, or a command does not lead to the
+    location it led to when it was recorded.
+    """
+    game = AdventureGame(game_data_file, session.initial_location_id)
+    locations = game.locations
+    fingerprint = locations.template.fingerprint if isinstance(locations, SessionLocations) else _NO_FINGERPRINT
+    if fingerprint != session.fingerprint:
+        raise JournalError(f'session {session.session_id} was recorded in a different world than {game_data_file}')
+    if log_capacity is not None:
+        log = EventList(log_capacity, game.log.describe)
+        for event in game.log:
+            log.add_event(event)
+        game.log = log
+
+    game.describe_location()
+    for index, (command, location_id) in enumerate(session.steps):
+        result = game.step(command)
+        if not result.valid or game.current_location_id != location_id:
+            raise JournalError(f'step {index} of session {session.session_id} ({command!r}) did not replay to '
+                               f'location {location_id}')
+        if game.game_state.ongoing and not game.awaiting_password:
+            game.describe_location()
+    return game
+
+
+if __name__ == "__main__":
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (Delete the "#" and space before each line.)
+    # IMPORTANT: keep this code indented inside the "if __name__ == '__main__'" block
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'disable': ['R1705', 'E9998', 'E9999']
+    # })
+    parser = argparse.ArgumentParser(description='List and replay the unfinished sessions in a game journal.')
+    parser.add_argument('journal', help='the journal directory')
+    parser.add_argument('game_data', help='the game data JSON file the sessions were played in')
+    args = parser.parse_args()
+
+    journal = EventJournal(args.journal)
+    for live_id in journal.live_sessions():
+        recovered = replay(args.game_data, journal.read_session(live_id))
+        print(f"Session {live_id}: location {recovered.current_location_id}, "
+              f"{recovered.game_state.moves} moves, score {recovered.game_state.score}")
+    journal.close()
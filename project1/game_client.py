@@ -0,0 +1,148 @@
+"""CSC111 Project 1: Text Adventure Game - Load Testing Client
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains a client for game_server that plays many sessions at once, to
+load-test a server on one machine.
+
+Every session connects, plays the same list of commands and disconnects, timing how long the
+server takes to answer each command. For example, to run 5000 sessions with at most 1000
+connected at a time:
+
+    python game_client.py --port 7111 --sessions 5000 --concurrency 1000
+
+Thousands of concurrent connections may need a higher open file limit (ulimit -n).
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from game_server import PROMPT
+
+DEFAULT_COMMANDS = ["look", "go east", "go east", "go south", "inventory", "go north", "go west", "score"]
+
+
+@dataclass
+class LoadTestStats:
+    """The results of a load test.
+
+    Instance Attributes:
+        - sessions: The number of sessions that completed
+        - failures: The number of sessions that failed to connect or were cut off
+        - latencies: The seconds the server took to answer each command, over all sessions
+        - elapsed: The number of seconds the whole test took
+    """
+    sessions: int = 0
+    failures: int = 0
+    latencies: list[float] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def percentile(self, p: float) -> float:
+        """Return the given percentile (between 0 and 100) of the command latencies, in seconds."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def summary(self) -> str:
+        """Return a one-line summary of these results."""
+        rate = len(self.latencies) / self.elapsed if self.elapsed > 0 else 0.0
+        return (f"{self.sessions} sessions ({self.failures} failed), {len(self.latencies)} commands "
+                f"in {self.elapsed:.2f}s = {rate:.0f} commands/s; latency p50 {self.percentile(50) * 1000:.2f}ms, "
+                f"p99 {self.percentile(99) * 1000:.2f}ms")
+
+
+async def play_session(commands: list[str], host: str = '127.0.0.1', port: int = 7111,
+                       path: Optional[str] = None) -> list[float]:
+    """Play one session with the given commands and return the server's response time for each command.
+
+    The session stops early if the server ends the game.
+    """
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    latencies = []
+    try:
+        await reader.readuntil(PROMPT)
+        for command in commands:
+            start = time.perf_counter()
+            writer.write(command.encode('utf-8') + b'\n')
+            await writer.drain()
+            try:
+                await reader.readuntil(PROMPT)
+            except asyncio.IncompleteReadError:
+                break  # The game ended and the server closed the connection
+            finally:
+                latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+    return latencies
+
+
+async def load_test(sessions: int, concurrency: int, commands: list[str], host: str = '127.0.0.1',
+                    port: int = 7111, path: Optional[str] = None) -> LoadTestStats:
+    """Play the given number of sessions, at most concurrency at a time, and return the results."""
+    stats = LoadTestStats()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one_session() -> None:
+        """Play one session within the concurrency limit."""
+        async with limit:
+            try:
+                stats.latencies.extend(await play_session(commands, host, port, path))
+                stats.sessions += 1
+            except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                stats.failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_session() for _ in range(sessions)))
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+if __name__ == "__main__":
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (Delete the "#" and space before each line.)
+    # IMPORTANT: keep this code indented inside the "if __name__ == '__main__'" block
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'disable': ['R1705', 'E9998', 'E9999']
+    # })
+    parser = argparse.ArgumentParser(description='Load-test a game server with many concurrent sessions.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7111)
+    parser.add_argument('--unix', default=None, help='connect to this Unix socket path instead of TCP')
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=500)
+    parser.add_argument('--commands', default=None, help='a JSON file holding the list of commands to play')
+    args = parser.parse_args()
+
+    session_commands = DEFAULT_COMMANDS
+    if args.commands is not None:
+        with open(args.commands) as f:
+            session_commands = json.load(f)
+    print(asyncio.run(load_test(args.sessions, args.concurrency, session_commands, args.host, args.port,
+                                args.unix)).summary())
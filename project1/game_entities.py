@@ -19,24 +19,133 @@ please consult our Course Syllabus.
 This file is Copyright (c) 2025 CSC111 Teaching Team
 """
 
-from typing import Optional
+from __future__ import annotations
+from typing import Iterable, Iterator, Optional
+
+
+class ItemBag:
+    """A collection of item names that may hold several of the same item.
+
+    Names are kept in the order they were first added, and adding, removing and membership tests all take
+    constant time. Iterating over a bag gives each distinct name once.
+
+    >>> bag = ItemBag(["key", "map", "key"])
+    >>> list(bag), bag.count("key"), len(bag)
+    (['key', 'map'], 2, 3)
+    >>> bag.remove("key")
+    >>> "key" in bag, bag.count("key")
+    (True, 1)
+    >>> bag.remove("key")
+    >>> "key" in bag
+    False
+    >>> bag.snapshot()
+    (('map', 1),)
+    """
+    # Private Instance Attributes:
+    #   - _counts: A mapping from each name in this bag to how many of it there are, in insertion order
+    __slots__ = ('_counts',)
+    _counts: dict[str, int]
+
+    def __init__(self, names: Iterable[str] = ()) -> None:
+        """Initialize a new bag holding one of each name in names (duplicates add up)."""
+        self._counts = {}
+        for name in names:
+            self.add(name)
+
+    @staticmethod
+    def from_snapshot(snapshot: Iterable[tuple[str, int]]) -> ItemBag:
+        """Return a new bag with the contents recorded by snapshot()."""
+        bag = ItemBag()
+        bag._counts = dict(snapshot)
+        return bag
+
+    def add(self, name: str, quantity: int = 1) -> None:
+        """Add quantity of the given item to this bag.
+
+        Preconditions:
+            - quantity > 0
+        """
+        self._counts[name] = self._counts.get(name, 0) + quantity
+
+    def remove(self, name: str, quantity: int = 1) -> None:
+        """Remove quantity of the given item from this bag.
+
+        Raise ValueError if this bag holds fewer than quantity of the item.
+
+        Preconditions:
+            - quantity > 0
+        """
+        count = self._counts.get(name, 0)
+        if count < quantity:
+            raise ValueError(f'{name!r} is not in this bag')
+        if count == quantity:
+            del self._counts[name]
+        else:
+            self._counts[name] = count - quantity
+
+    def count(self, name: str) -> int:
+        """Return how many of the given item this bag holds."""
+        return self._counts.get(name, 0)
+
+    def items(self) -> Iterable[tuple[str, int]]:
+        """Return the (name, quantity) pairs in this bag, in order."""
+        return self._counts.items()
+
+    def elements(self) -> Iterator[str]:
+        """Return an iterator over the names in this bag, repeating each name once per item held."""
+        for name, count in self._counts.items():
+            for _ in range(count):
+                yield name
+
+    def snapshot(self) -> tuple[tuple[str, int], ...]:
+        """Return an immutable record of this bag's contents."""
+        return tuple(self._counts.items())
+
+    def copy(self) -> ItemBag:
+        """Return a copy of this bag."""
+        return ItemBag.from_snapshot(self._counts.items())
+
+    def __contains__(self, name: object) -> bool:
+        """Return whether this bag holds at least one of the given item."""
+        return name in self._counts
+
+    def __iter__(self) -> Iterator[str]:
+        """Return an iterator over the distinct names in this bag, in order."""
+        return iter(self._counts)
+
+    def __len__(self) -> int:
+        """Return the total number of items in this bag."""
+        return sum(self._counts.values())
+
+    def __bool__(self) -> bool:
+        """Return whether this bag holds any items."""
+        return bool(self._counts)
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether other is a bag with the same contents (ignoring order)."""
+        return isinstance(other, ItemBag) and self._counts == other._counts
+
+    def __repr__(self) -> str:
+        """Return a representation of this bag."""
+        return f'ItemBag({list(self.elements())!r})'
 
 
 class LocationState:
     """Represents the state of a location in the game.
 
     Instance Attributes:
-        - items: A list of item names available at this location.
+        - items: The names of the items available at this location.
         - locked: Whether this location is locked and requires an item to unlock.
         - visited: Whether this location has been visited before.
     """
-    items: list[str]
+    __slots__ = ('items', 'locked', 'visited')
+    items: ItemBag
     locked: bool
     visited: bool
 
-    def __init__(self, items: Optional[list[str]] = None, locked: bool = False, visited: bool = False) -> None:
+    def __init__(self, items: Optional[Iterable[str]] = None, locked: bool = False, visited: bool = False) -> None:
         """Initialize the state of a location."""
-        self.items = items if items else []
+        self.items = items if isinstance(items, ItemBag) else ItemBag(items if items else [])
         self.locked = locked
         self.visited = visited
 
@@ -52,10 +161,14 @@ class Location:
         - available_commands: A dictionary mapping commands (e.g., 'go east') to location IDs.
         - special_commands: Special actions a player can take in this location.
         - state: The state of this location (includes items, locked status, and visited status).
+        - grid_position: The (row, column) of this location on the map, with rows increasing southwards and columns
+          eastwards, or None if it is not on the map.
 
     Representation Invariants:
         - self.id_num > 0
     """
+    __slots__ = ('id_num', 'name', 'brief_description', 'long_description', 'available_commands', 'special_commands',
+                 'state', 'grid_position')
 
     id_num: int
     name: str
@@ -64,10 +177,11 @@ class Location:
     available_commands: dict[str, int]
     special_commands: list[str]
     state: LocationState
+    grid_position: Optional[tuple[int, int]]
 
     def __init__(self, id_num: int, name: str, brief_description: str, long_description: Optional[str] = None,
                  available_commands: Optional[dict[str, int]] = None, special_commands: Optional[list[str]] = None,
-                 state: Optional[LocationState] = None) -> None:
+                 state: Optional[LocationState] = None, grid_position: Optional[tuple[int, int]] = None) -> None:
         """Initialize a new location."""
         self.id_num = id_num
         self.name = name
@@ -76,6 +190,25 @@ class Location:
         self.available_commands = available_commands if available_commands else {}
         self.special_commands = special_commands if special_commands else []
         self.state = state if state else LocationState()
+        self.grid_position = grid_position
+
+    @property
+    def locked(self) -> bool:
+        """Whether this location is locked. This is stored in self.state."""
+        return self.state.locked
+
+    @locked.setter
+    def locked(self, value: bool) -> None:
+        self.state.locked = value
+
+    @property
+    def visited(self) -> bool:
+        """Whether this location has been visited. This is stored in self.state."""
+        return self.state.visited
+
+    @visited.setter
+    def visited(self, value: bool) -> None:
+        self.state.visited = value
 
 
 class Item:
@@ -87,26 +220,89 @@ class Item:
         - start_position: The ID of the location where this item starts (must be > 0)
         - target_position: The ID of the location where this item should be returned (if applicable, must be > 0)
         - target_points: The number of points this item contributes if placed correctly
+        - aliases: Other names the player can use to refer to this item
 
     Representation Invariants:
         - self.start_position > 0
         - self.target_position is None or self.target_position > 0
     """
+    __slots__ = ('name', 'description', 'start_position', 'target_position', 'target_points', 'aliases')
 
     name: str
     description: str
     start_position: int
     target_position: Optional[int]
     target_points: int
+    aliases: list[str]
 
     def __init__(self, name: str, description: str, start_position: int, target_position: Optional[int],
-                 target_points: int) -> None:
+                 target_points: int, aliases: Optional[list[str]] = None) -> None:
         """Initialize a new item."""
         self.name = name
         self.description = description
         self.start_position = start_position
         self.target_position = target_position
         self.target_points = target_points
+        self.aliases = aliases if aliases else []
+
+
+class ItemRegistry:
+    """A lookup table from item names to Item objects, built once when a world is loaded.
+
+    Names are case-folded and have their surrounding whitespace removed, so "Lucky UofT Mug" and "lucky uoft mug"
+    refer to the same item. Each item's aliases are registered alongside its name.
+
+    >>> registry = ItemRegistry([Item("Lucky UofT Mug", "A mug.", 7, 1, 10, ["mug"])])
+    >>> registry.get("LUCKY UOFT MUG").name
+    'Lucky UofT Mug'
+    >>> registry.canonical_name("Mug")
+    'lucky uoft mug'
+    >>> registry.canonical_name("Key")  # Names of unknown items are only case-folded
+    'key'
+    >>> registry.get("key") is None
+    True
+    """
+    # Private Instance Attributes:
+    #   - _items: A mapping from every case-folded name and alias to its Item
+    #   - _canonical: A mapping from every case-folded name and alias to the case-folded name of its Item
+    _items: dict[str, Item]
+    _canonical: dict[str, str]
+
+    def __init__(self, items: list[Item]) -> None:
+        """Initialize a new registry of the given items.
+
+        If two items share a name or alias, the one that comes first wins.
+        """
+        self._items = {}
+        self._canonical = {}
+        for item in items:
+            canonical = self.fold(item.name)
+            for name in [item.name] + item.aliases:
+                key = self.fold(name)
+                if key not in self._items:
+                    self._items[key] = item
+                    self._canonical[key] = canonical
+
+    @staticmethod
+    def fold(name: str) -> str:
+        """Return the given name with case and surrounding whitespace removed."""
+        return name.strip().casefold()
+
+    def canonical_name(self, name: str) -> str:
+        """Return the canonical name of the item with the given name or alias.
+
+        The canonical name is the item's case-folded name. If no item has the given name, it is returned case-folded.
+        """
+        key = self.fold(name)
+        return self._canonical.get(key, key)
+
+    def get(self, name: str) -> Optional[Item]:
+        """Return the item with the given name or alias, or None if there is no such item."""
+        return self._items.get(self.fold(name))
+
+    def __contains__(self, name: str) -> bool:
+        """Return whether an item has the given name or alias."""
+        return self.fold(name) in self._items
 
 
 if __name__ == "__main__":
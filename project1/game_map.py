@@ -0,0 +1,137 @@
+"""CSC111 Project 1: Text Adventure Game - Map
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the code that draws the ASCII map of the area around the player.
+
+Each position on the map is drawn as one tile:
+
+    @   the player
+    #   a location the player has visited
+    ?   a location the player has not visited yet
+    X   a locked location
+        (a space) no location
+
+Drawing a tile looks its locations up in the world's SpatialIndex and reads their state, so
+tiles are cached once drawn. A game's MapView listens to its SessionLocations and drops a
+cached tile only when a location on it is locked, unlocked, visited or replaced; the player's
+marker is placed on top of the cached tiles. Drawing the map therefore only costs a lookup per
+tile once the area around the player has been seen.
+
+The doctests in this module turn the world cache (see world_cache.py) off, so that running them
+does not write to the user's cache directory:
+
+    >>> import os
+    >>> os.environ['ADVENTURE_WORLD_CACHE'] = ''
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+from typing import Optional
+
+from spatial_index import SpatialIndex, spatial_index
+from world_template import SessionLocations
+
+# The number of rows and columns shown on each side of the player
+ROW_RADIUS = 3
+COLUMN_RADIUS = 6
+
+PLAYER = '@'
+VISITED = '#'
+UNVISITED = '?'
+LOCKED = 'X'
+EMPTY = ' '
+LEGEND = f"{PLAYER} you  {VISITED} visited  {UNVISITED} not visited  {LOCKED} locked"
+
+
+class MapView:
+    """The map of one game, with its drawn tiles cached.
+
+    >>> from world_template import shared_template
+    >>> session = shared_template('game_data.json').new_session()
+    >>> view = MapView(session, 1, 2)
+    >>> session[20].state.visited = True
+    >>> view.render(21)[:3]
+    ['? # ? ? ?', '  X @ ? ?', '    ? ? ?']
+    >>> session[4].state.locked = False  # Only the tile of location 4 is redrawn
+    >>> view.render(21)[1]
+    '  ? @ ? ?'
+
+    Instance Attributes:
+        - row_radius: The number of rows shown above and below the player
+        - column_radius: The number of columns shown to the left and right of the player
+    """
+    row_radius: int
+    column_radius: int
+    # Private Instance Attributes:
+    #   - _locations: The locations of the game
+    #   - _index: The spatial index of the game's world
+    #   - _tiles: The tiles drawn so far, keyed by grid position
+    _locations: SessionLocations
+    _index: SpatialIndex
+    _tiles: dict[tuple[int, int], str]
+
+    def __init__(self, locations: SessionLocations, row_radius: int = ROW_RADIUS,
+                 column_radius: int = COLUMN_RADIUS) -> None:
+        """Initialize a new map of the given locations, showing row_radius rows and column_radius columns on each
+        side of the player."""
+        self.row_radius = row_radius
+        self.column_radius = column_radius
+        self._locations = locations
+        self._index = spatial_index(locations.template)
+        self._tiles = {}
+        locations.add_listener(self._location_changed)
+
+    @property
+    def cached_tiles(self) -> int:
+        """The number of tiles currently cached."""
+        return len(self._tiles)
+
+    def render(self, current_location_id: int) -> list[str]:
+        """Return the lines of the map around the location with the given ID, followed by a blank line and the
+        legend, or an empty list if that location is not on the map."""
+        position = self._index.position(current_location_id)
+        if position is None:
+            return []
+        player_row, player_column = position
+        lines = []
+        for row in range(player_row - self.row_radius, player_row + self.row_radius + 1):
+            tiles = []
+            for column in range(player_column - self.column_radius, player_column + self.column_radius + 1):
+                if row == player_row and column == player_column:
+                    tiles.append(PLAYER)
+                else:
+                    tile = self._tiles.get((row, column))
+                    if tile is None:
+                        tile = self._tiles[(row, column)] = self._draw(row, column)
+                    tiles.append(tile)
+            lines.append(' '.join(tiles).rstrip())
+        return lines + ['', LEGEND]
+
+    def _draw(self, row: int, column: int) -> str:
+        """Return the tile for the given grid position."""
+        ids = [id_num for id_num in self._index.at(row, column) if id_num in self._locations]
+        if not ids:
+            return EMPTY
+        if any(self._locations.is_locked(id_num) for id_num in ids):
+            return LOCKED
+        if any(self._locations.is_visited(id_num) for id_num in ids):
+            return VISITED
+        return UNVISITED
+
+    def _location_changed(self, id_num: int, _: Optional[str]) -> None:
+        """Drop the cached tile of the given location, whose locked or visited status has changed or which has been
+        assigned or deleted."""
+        position = self._index.position(id_num)
+        if position is not None:
+            self._tiles.pop(position, None)
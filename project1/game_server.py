@@ -0,0 +1,289 @@
+"""CSC111 Project 1: Text Adventure Game - Game Server
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains an asyncio server that hosts many games in one process, one
+AdventureGame per connection, over TCP or a Unix socket.
+
+The protocol is line based: the server sends the text of each turn followed by the PROMPT, and
+the client replies with one command per line. Games are run with AdventureGame.step, so the
+event loop never blocks on a player. Each session is closed after IDLE_TIMEOUT seconds without
+input, writes wait for the client to drain its socket (so one slow client cannot make the server
+buffer without bound), and the server shuts down gracefully on SIGINT or SIGTERM: it stops
+accepting connections, tells every player, and waits briefly for sessions to finish.
+
+With --metrics-port, every game is instrumented (see instrumentation.py) and the metrics are
+served over HTTP on that port, in the Prometheus text format at /metrics and as JSON at
+/metrics.json. With --journal, every valid command is recorded in an EventJournal (see
+event_journal.py) in that directory, and each reply is only sent once its command is on disk.
+
+    python game_server.py game_data.json --port 7111
+    python game_server.py game_data.json --unix /tmp/adventure.sock
+    python game_server.py game_data.json --port 7111 --metrics-port 9111
+    python game_server.py game_data.json --port 7111 --journal /var/lib/adventure/journal
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import signal
+from typing import Optional
+
+from adventure import AdventureGame
+from event_journal import EventJournal
+from instrumentation import Metrics, instrument, record_session
+from world_template import shared_template
+
+# Sent after each turn's text when the server is waiting for a command
+PROMPT = b'\n> '
+IDLE_TIMEOUT = 300.0
+MAX_LINE = 1024
+# The number of connections the operating system queues before the server accepts them
+BACKLOG = 4096
+
+
+class GameServer:
+    """A server hosting one AdventureGame per connection.
+
+    Instance Attributes:
+        - game_data_file: The game data file every game is created from
+        - initial_location_id: The location every game starts at
+        - idle_timeout: The number of seconds a session may wait for input, or for the player to read its output,
+          before it is closed
+        - max_sessions: The maximum number of sessions at once; connections beyond this are turned away
+        - metrics: The metrics every game records into, or None if games are not instrumented
+        - journal: The journal every game is recorded in, or None if games are not journaled
+    """
+    game_data_file: str
+    initial_location_id: int
+    idle_timeout: float
+    max_sessions: int
+    metrics: Optional[Metrics]
+    journal: Optional[EventJournal]
+    # Private Instance Attributes:
+    #   - _server: The listening asyncio server, or None if it is not running
+    #   - _sessions: The task and writer of every open session
+    #   - _closing: Whether the server is shutting down
+    _server: Optional[asyncio.AbstractServer]
+    _sessions: dict[asyncio.Task, asyncio.StreamWriter]
+    _closing: bool
+
+    def __init__(self, game_data_file: str, initial_location_id: int = 1, idle_timeout: float = IDLE_TIMEOUT,
+                 max_sessions: int = 10000, metrics: Optional[Metrics] = None,
+                 journal: Optional[EventJournal] = None) -> None:
+        """Initialize a new server. The world is loaded immediately, so the first player does not wait for it."""
+        self.game_data_file = game_data_file
+        self.initial_location_id = initial_location_id
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.metrics = metrics
+        self.journal = journal
+        self._server = None
+        self._sessions = {}
+        self._closing = False
+        shared_template(game_data_file)
+
+    @property
+    def session_count(self) -> int:
+        """The number of sessions currently open."""
+        return len(self._sessions)
+
+    @property
+    def sockets(self) -> list:
+        """The sockets the server is listening on."""
+        return list(self._server.sockets) if self._server is not None else []
+
+    async def start(self, host: str = '127.0.0.1', port: int = 7111, path: Optional[str] = None) -> None:
+        """Start listening on the given Unix socket path, or on the given TCP host and port if no path is given."""
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=path, limit=MAX_LINE, backlog=BACKLOG)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port, limit=MAX_LINE, backlog=BACKLOG)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Run one player's game until it ends, the player disconnects or goes idle, or the server shuts down."""
+        if self._closing or len(self._sessions) >= self.max_sessions:
+            writer.write(b'The server is full. Try again later.\n')
+            await _close(writer)
+            return
+
+        task = asyncio.current_task()
+        self._sessions[task] = writer
+        try:
+            await self._play(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.TimeoutError:
+            writer.transport.abort()  # The client stopped reading, so the output waiting for it would never be sent
+        finally:
+            del self._sessions[task]
+            await _close(writer)
+
+    async def _play(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Run the game loop for one connection."""
+        game = AdventureGame(self.game_data_file, self.initial_location_id)
+        if self.metrics is not None:
+            instrument(game, self.metrics)
+        session_id = self.journal.attach(game) if self.journal is not None else None
+        try:
+            await self._run_game(game, reader, writer)
+        finally:
+            if self.metrics is not None and game.game_state.ongoing:
+                record_session(self.metrics, game, 'abandoned')
+            if session_id is not None:
+                self.journal.end_session(session_id)
+
+    async def _run_game(self, game: AdventureGame, reader: asyncio.StreamReader,
+                        writer: asyncio.StreamWriter) -> None:
+        """Play the given game with the player on the given connection."""
+        await _send(writer, game.describe_turn(), PROMPT, self.idle_timeout)
+
+        while game.game_state.ongoing and not self._closing:
+            try:
+                line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                await _send(writer, ["You were idle for too long. Goodbye."], timeout=self.idle_timeout)
+                return
+            except (ValueError, asyncio.LimitOverrunError):
+                await _send(writer, ["That line was too long. Goodbye."], timeout=self.idle_timeout)
+                return
+            if not line:
+                return  # The player disconnected
+
+            result = game.step(line.decode('utf-8', errors='replace'))
+            if self.journal is not None and self.journal.pending:
+                await self.journal.sync()
+            lines = list(result.messages)
+            if result.valid and game.game_state.ongoing and not game.awaiting_password:
+                lines.extend(game.describe_turn())
+            await _send(writer, lines, PROMPT if game.game_state.ongoing else b'',
+                        self.idle_timeout)
+
+    async def shutdown(self, grace: float = 5.0) -> None:
+        """Stop accepting connections, tell every player the server is closing, and wait up to grace seconds for
+        sessions to finish before cancelling them."""
+        self._closing = True
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+        for writer in list(self._sessions.values()):
+            try:
+                writer.write(b'\nThe server is shutting down. Goodbye.\n')
+            except ConnectionError:
+                pass
+            writer.close()  # The player's pending readline then sees the end of the connection
+
+        tasks = list(self._sessions)
+        if tasks:
+            _, still_running = await asyncio.wait(tasks, timeout=grace)
+            for task in still_running:
+                task.cancel()
+            await asyncio.gather(*still_running, return_exceptions=True)
+
+
+async def _send(writer: asyncio.StreamWriter, lines: list[str], prompt: bytes = b'',
+                timeout: Optional[float] = None) -> None:
+    """Write the given lines and prompt in one call, then wait until the client has drained its socket enough.
+
+    Raise asyncio.TimeoutError if the client has not done so within timeout seconds.
+    """
+    writer.write(''.join(line + '\n' for line in lines).encode('utf-8') + prompt)
+    await asyncio.wait_for(writer.drain(), timeout)
+
+
+async def _close(writer: asyncio.StreamWriter) -> None:
+    """Close the given connection, ignoring errors from a client that has already gone."""
+    try:
+        writer.close()
+        await writer.wait_closed()
+    except (ConnectionError, OSError):
+        pass
+
+
+async def start_metrics_server(metrics: Metrics, host: str = '127.0.0.1', port: int = 9111) -> asyncio.AbstractServer:
+    """Start serving the given metrics over HTTP: as JSON at /metrics.json, and in the Prometheus text format at
+    every other path."""
+    async def respond(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 5.0)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            await _close(writer)
+            return
+        parts = request.split(b' ', 2)
+        if len(parts) > 1 and parts[1].split(b'?')[0] == b'/metrics.json':
+            body, content_type = json.dumps(metrics.to_json()).encode('utf-8'), 'application/json'
+        else:
+            body, content_type = metrics.to_prometheus().encode('utf-8'), 'text/plain; version=0.0.4'
+        writer.write(f'HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n'
+                     f'Connection: close\r\n\r\n'.encode('ascii') + body)
+        await _close(writer)
+
+    return await asyncio.start_server(respond, host, port)
+
+
+async def serve(game_data_file: str, host: str = '127.0.0.1', port: int = 7111, path: Optional[str] = None,
+                idle_timeout: float = IDLE_TIMEOUT, max_sessions: int = 10000,
+                metrics_port: Optional[int] = None, journal_directory: Optional[str] = None) -> None:
+    """Run a game server until it receives SIGINT or SIGTERM, then shut it down gracefully. If metrics_port is
+    given, instrument every game and serve the metrics on that port, and if journal_directory is given, journal
+    every game there."""
+    metrics = Metrics() if metrics_port is not None else None
+    journal = EventJournal(journal_directory) if journal_directory is not None else None
+    server = GameServer(game_data_file, idle_timeout=idle_timeout, max_sessions=max_sessions, metrics=metrics,
+                        journal=journal)
+    await server.start(host, port, path)
+    print("Serving on", path if path is not None else f"{host}:{port}")
+    metrics_server = None
+    if metrics is not None:
+        metrics_server = await start_metrics_server(metrics, host, metrics_port)
+        print(f"Serving metrics on {host}:{metrics_port}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    print(f"Shutting down {server.session_count} sessions...")
+    await server.shutdown()
+    if metrics_server is not None:
+        metrics_server.close()
+        await metrics_server.wait_closed()
+    if journal is not None:
+        journal.close()
+
+
+if __name__ == "__main__":
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (Delete the "#" and space before each line.)
+    # IMPORTANT: keep this code indented inside the "if __name__ == '__main__'" block
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'disable': ['R1705', 'E9998', 'E9999']
+    # })
+    parser = argparse.ArgumentParser(description='Host many text adventure games over TCP or a Unix socket.')
+    parser.add_argument('game_data', help='the game data JSON file or compiled world file')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7111)
+    parser.add_argument('--unix', default=None, help='listen on this Unix socket path instead of TCP')
+    parser.add_argument('--idle-timeout', type=float, default=IDLE_TIMEOUT)
+    parser.add_argument('--max-sessions', type=int, default=10000)
+    parser.add_argument('--metrics-port', type=int, default=None, help='instrument games and serve metrics here')
+    parser.add_argument('--journal', default=None, help='journal every game in this directory')
+    args = parser.parse_args()
+    asyncio.run(serve(args.game_data, args.host, args.port, args.unix, args.idle_timeout, args.max_sessions,
+                      args.metrics_port, args.journal))
@@ -0,0 +1,356 @@
+"""CSC111 Project 1: Text Adventure Game - Saved Games
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the code that saves an AdventureGame to a compact snapshot and
+restores a game from one.
+
+A snapshot only records how a game differs from the starting state of its world, so saving a
+game takes microseconds and a few hundred bytes however large the world is. All integers are
+written as variable-length integers (signed ones zigzag-encoded first), and the snapshot is laid
+out as follows:
+
+    header          MAGIC, VERSION and the 8-byte fingerprint of the world the game is played in
+    game            current location, status bits, score, moves and move limit
+    inventory       (item, quantity) pairs
+    locations       for each location whose state differs from the world's starting state, the
+                    fields that differ
+    log             the log's capacity, its command strings, then each event's location and
+                    command
+    triggers        the names of the triggers that have fired, so that a trigger that fires only
+                    once does not fire again after the game is restored
+    flags           the names of the game flags that are set
+
+Items are written as their index in the world's item list where possible, and as their name
+otherwise. Event descriptions are not saved, since they are always looked up from the event's
+location. Games whose locations have been replaced outright, rather than changed through
+their state, cannot be saved.
+
+The doctests in this module turn the world cache (see world_cache.py) off, so that running them
+does not write to the user's cache directory:
+
+    >>> import os
+    >>> os.environ['ADVENTURE_WORLD_CACHE'] = ''
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+from typing import Iterable
+from weakref import WeakKeyDictionary
+
+from adventure import AdventureGame
+from game_entities import ItemBag
+from proj1_event_logger import EventList
+from world_template import SessionLocations, WorldTemplate
+
+MAGIC = b'AGS'
+VERSION = 1
+
+# The bits of the game status byte
+_ONGOING = 1
+_AWAITING_PASSWORD = 2
+_WON = 4
+_LOST = 8
+
+# The bits of a location's field mask: which fields are saved, then the values of the boolean fields
+_ITEMS = 1
+_LOCKED = 2
+_VISITED = 4
+_LOCKED_VALUE = 8
+_VISITED_VALUE = 16
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot is malformed, of an unsupported version, or was saved in a different world."""
+
+
+def save_game(game: AdventureGame) -> bytes:
+    """Return a snapshot of the given game.
+
+    >>> game = AdventureGame('game_data.json', 1)
+    >>> len(save_game(game))
+    27
+    >>> result = game.step("go east")
+    >>> restored = restore_game('game_data.json', save_game(game))
+    >>> restored.current_location_id, restored.game_state.moves, restored.log.get_id_log()
+    (20, 1, [1, 20])
+    >>> from triggers import compile_triggers
+    >>> game.triggers = compile_triggers([{'name': 'deadline', 'when': [{'moves_at_least': 61}],
+    ...                                    'effects': [{'say': 'Hurry!'}]}], game.locations.template.registry)
+    >>> game.game_state.moves = 60
+    >>> game.step("score").messages[-1]
+    'Hurry!'
+    >>> restored = restore_game('game_data.json', save_game(game))
+    >>> restored.fired_triggers
+    frozenset({'deadline'})
+    >>> restored.triggers = game.triggers
+    >>> restored.step("score").messages
+    ['Current Score: 0']
+    >>> game.flags['fire_alarm'] = True
+    >>> restore_game('game_data.json', save_game(game)).flags
+    {'fire_alarm': True}
+    """
+    session = _session_of(game)
+    if session.replaced:
+        raise SnapshotError(f'locations {sorted(session.replaced)} were replaced and cannot be saved')
+    template = session.template
+    item_indexes = _item_indexes(template)
+
+    out = bytearray(MAGIC)
+    out.append(VERSION)
+    out += template.fingerprint
+
+    state = game.game_state
+    _write_int(out, game.current_location_id)
+    out.append((_ONGOING if state.ongoing else 0) | (_AWAITING_PASSWORD if game.awaiting_password else 0)
+               | (_WON if game.won else 0) | (_LOST if game.lost else 0))
+    _write_int(out, state.score)
+    _write_int(out, state.moves)
+    _write_int(out, state.max_moves)
+    _write_bag(out, game.inventory.items(), item_indexes)
+
+    changed = []
+    for id_num, changes in session.overlay.items():
+        start = template.locations[id_num]
+        mask = 0
+        if 'items' in changes and changes['items'].snapshot() != start.items:
+            mask |= _ITEMS
+        if changes.get('locked', start.locked) != start.locked:
+            mask |= _LOCKED | (_LOCKED_VALUE if changes['locked'] else 0)
+        if changes.get('visited', start.visited) != start.visited:
+            mask |= _VISITED | (_VISITED_VALUE if changes['visited'] else 0)
+        if mask:
+            changed.append((id_num, mask, changes.get('items')))
+    _write_uint(out, len(changed))
+    for id_num, mask, items in changed:
+        _write_int(out, id_num)
+        out.append(mask)
+        if mask & _ITEMS:
+            _write_bag(out, items.items(), item_indexes)
+
+    _write_log(out, game.log)
+    fired = sorted(game.fired_triggers)
+    _write_uint(out, len(fired))
+    for name in fired:
+        _write_str(out, name)
+    flags = sorted(name for name, value in game.flags.items() if value)
+    _write_uint(out, len(flags))
+    for name in flags:
+        _write_str(out, name)
+    return bytes(out)
+
+
+def restore_game(game_data_file: str, data: bytes) -> AdventureGame:
+    """Return a new game in the given world, in the state recorded by the given snapshot.
+
+    Raise SnapshotError if the snapshot is malformed or was saved in a different world.
+    """
+    reader = _Reader(data)
+    if reader.read_bytes(len(MAGIC)) != MAGIC:
+        raise SnapshotError('not a saved game')
+    version = reader.read_bytes(1)[0]
+    if version != VERSION:
+        raise SnapshotError(f'unsupported saved game version {version}')
+    fingerprint = reader.read_bytes(8)
+
+    game = AdventureGame(game_data_file, reader.read_int())
+    session = _session_of(game)
+    if fingerprint != session.template.fingerprint:
+        raise SnapshotError(f'this game was saved in a different world than {game_data_file}')
+    template = session.template
+    items = [template.registry.canonical_name(item.name) for item in template.items]
+
+    status = reader.read_bytes(1)[0]
+    game.game_state.ongoing = bool(status & _ONGOING)
+    game.awaiting_password = bool(status & _AWAITING_PASSWORD)
+    game.won = bool(status & _WON)
+    game.lost = bool(status & _LOST)
+    game.game_state.score = reader.read_int()
+    game.game_state.moves = reader.read_int()
+    game.game_state.max_moves = reader.read_int()
+    game.inventory = reader.read_bag(items)
+
+    for _ in range(reader.read_uint()):
+        id_num = reader.read_int()
+        if id_num not in session.template.locations:
+            raise SnapshotError(f'location {id_num} is not in this world')
+        state = session[id_num].state
+        mask = reader.read_bytes(1)[0]
+        if mask & _ITEMS:
+            state.items = reader.read_bag(items)
+        if mask & _LOCKED:
+            state.locked = bool(mask & _LOCKED_VALUE)
+        if mask & _VISITED:
+            state.visited = bool(mask & _VISITED_VALUE)
+
+    game.log = reader.read_log(session)
+    game.fired_triggers = [reader.read_str() for _ in range(reader.read_uint())]
+    game.flags = dict.fromkeys((reader.read_str() for _ in range(reader.read_uint())), True)
+    if not reader.at_end():
+        raise SnapshotError('unexpected data at the end of the saved game')
+    return game
+
+
+def _session_of(game: AdventureGame) -> SessionLocations:
+    """Return the locations of the given game, checking that they are backed by a shared world template."""
+    if not isinstance(game.locations, SessionLocations):
+        raise SnapshotError('only games backed by a shared world template can be saved')
+    return game.locations
+
+
+# The index of each item name in each world's item list
+_ITEM_INDEXES: WeakKeyDictionary[WorldTemplate, dict[str, int]] = WeakKeyDictionary()
+
+
+def _item_indexes(template: WorldTemplate) -> dict[str, int]:
+    """Return a mapping from the canonical name of each item in the given world to its index in the world's item
+    list.
+
+    >>> from world_template import shared_template
+    >>> indexes = _item_indexes(shared_template('game_data.json'))
+    >>> 'lucky uoft mug' in indexes
+    True
+    """
+    indexes = _ITEM_INDEXES.get(template)
+    if indexes is None:
+        indexes = {}
+        for index, item in enumerate(template.items):
+            indexes.setdefault(template.registry.canonical_name(item.name), index)
+        _ITEM_INDEXES[template] = indexes
+    return indexes
+
+
+def _write_uint(out: bytearray, value: int) -> None:
+    """Append the given non-negative integer to out as a variable-length integer."""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _write_int(out: bytearray, value: int) -> None:
+    """Append the given integer to out, zigzag-encoded so that small negative numbers stay short."""
+    _write_uint(out, value << 1 if value >= 0 else (-value << 1) - 1)
+
+
+def _write_str(out: bytearray, value: str) -> None:
+    """Append the given string to out as its length and UTF-8 bytes."""
+    encoded = value.encode('utf-8')
+    _write_uint(out, len(encoded))
+    out += encoded
+
+
+def _write_bag(out: bytearray, contents: Iterable[tuple[str, int]], item_indexes: dict[str, int]) -> None:
+    """Append the given (name, quantity) pairs to out. A name is written as 1 + its item index where possible,
+    and as 0 followed by the name otherwise."""
+    contents = list(contents)
+    _write_uint(out, len(contents))
+    for name, quantity in contents:
+        index = item_indexes.get(name)
+        if index is None:
+            out.append(0)
+            _write_str(out, name)
+        else:
+            _write_uint(out, index + 1)
+        _write_uint(out, quantity)
+
+
+def _write_log(out: bytearray, log: EventList) -> None:
+    """Append the given event log to out, straight from its location and command id arrays."""
+    ids, command_ids, commands = log.get_raw_log()
+    _write_uint(out, log.capacity or 0)
+    _write_uint(out, len(commands))
+    for command in commands:
+        _write_str(out, command)
+    _write_uint(out, len(ids))
+    for id_num, command_id in zip(ids, command_ids):
+        _write_int(out, id_num)
+        _write_uint(out, command_id + 1)
+
+
+class _Reader:
+    """A cursor over the bytes of a snapshot."""
+    # Private Instance Attributes:
+    #   - _data: The snapshot being read
+    #   - _position: The index of the next byte to read
+    _data: bytes
+    _position: int
+
+    def __init__(self, data: bytes) -> None:
+        """Initialize a new reader at the start of the given snapshot."""
+        self._data = data
+        self._position = 0
+
+    def at_end(self) -> bool:
+        """Return whether every byte has been read."""
+        return self._position == len(self._data)
+
+    def read_bytes(self, size: int) -> bytes:
+        """Read the next size bytes."""
+        end = self._position + size
+        if end > len(self._data):
+            raise SnapshotError('the saved game is truncated')
+        value = self._data[self._position:end]
+        self._position = end
+        return value
+
+    def read_uint(self) -> int:
+        """Read a variable-length non-negative integer."""
+        value = shift = 0
+        while True:
+            if self._position >= len(self._data):
+                raise SnapshotError('the saved game is truncated')
+            byte = self._data[self._position]
+            self._position += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def read_int(self) -> int:
+        """Read a zigzag-encoded variable-length integer."""
+        value = self.read_uint()
+        return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+    def read_str(self) -> str:
+        """Read a length-prefixed UTF-8 string."""
+        return self.read_bytes(self.read_uint()).decode('utf-8')
+
+    def read_bag(self, items: list[str]) -> ItemBag:
+        """Read (name, quantity) pairs into a new ItemBag, looking item indexes up in the given list of canonical
+        item names."""
+        bag = ItemBag()
+        for _ in range(self.read_uint()):
+            index = self.read_uint()
+            if index == 0:
+                name = self.read_str()
+            elif index <= len(items):
+                name = items[index - 1]
+            else:
+                raise SnapshotError(f'item {index - 1} is not in this world')
+            bag.add(name, self.read_uint())
+        return bag
+
+    def read_log(self, session: SessionLocations) -> EventList:
+        """Read an event log, taking each event's description from its location in the given session."""
+        capacity = self.read_uint()
+        commands = [self.read_str() for _ in range(self.read_uint())]
+        ids = []
+        command_ids = []
+        for _ in range(self.read_uint()):
+            ids.append(self.read_int())
+            command_id = self.read_uint()
+            if command_id > len(commands):
+                raise SnapshotError('an event refers to a command that was not saved')
+            command_ids.append(command_id - 1)
+        return EventList.from_raw_log(ids, command_ids, commands, capacity or None, session.long_description)
@@ -0,0 +1,339 @@
+"""CSC111 Project 1: Text Adventure Game - Instrumentation
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the counters and latency histograms that show how games are being
+played, and the code that attaches them to an AdventureGame.
+
+Instrumentation is opt in and per game: instrument(game, metrics) replaces step and the command
+handlers of that one game with timed versions that record into metrics, and uninstrument(game)
+puts the originals back. The handlers timed are the ones in the game's CommandRegistry, which
+are the only code dispatch runs for a command. Games that are not instrumented run exactly the same code as before, so
+instrumentation costs nothing when it is off. The game server instruments its games with --metrics-port, and
+adventure.py instruments the game it runs when the ADVENTURE_METRICS environment variable names a file to write the
+metrics to.
+
+The following metrics are recorded:
+
+    adventure_commands_total         counter, by command type and whether it was valid
+    adventure_command_seconds        histogram of step latency, by command type
+    adventure_handler_seconds        histogram of handler latency, by handler (such as "take" or
+                                     "menu")
+    adventure_sessions_total         counter of finished games, by outcome (won, lost, quit or abandoned)
+    adventure_session_moves          histogram of the moves taken in each finished game
+
+The command type is the verb of the command (such as "take" or "look"), "move" for movement,
+"password" for a password and "invalid" for input that is not a command, so there are only as
+many types as there are verbs. Metrics can be exported as JSON or in the Prometheus text format.
+
+The doctests in this module turn the world cache (see world_cache.py) off, so that running them
+does not write to the user's cache directory:
+
+    >>> import os
+    >>> os.environ['ADVENTURE_WORLD_CACHE'] = ''
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import bisect
+import functools
+import math
+import time
+from typing import Any, Optional
+from weakref import WeakKeyDictionary
+
+from commands import CommandRegistry, Handler
+
+# The upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 0.1, 1.0)
+# The upper bounds of the session moves histogram buckets
+MOVES_BUCKETS = (5, 10, 20, 30, 40, 50, 60, 70, 80, 100)
+
+_HELP = {
+    'adventure_commands_total': 'Commands entered, by command type and whether they were valid.',
+    'adventure_command_seconds': 'Time taken by AdventureGame.step, by command type.',
+    'adventure_handler_seconds': 'Time taken by each command handler.',
+    'adventure_sessions_total': 'Games finished, by outcome.',
+    'adventure_session_moves': 'Moves taken in each finished game.'
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Histogram:
+    """A histogram of observed values with fixed buckets.
+
+    >>> histogram = Histogram((1, 10))
+    >>> for value in [0.5, 3, 30]:
+    ...     histogram.observe(value)
+    >>> histogram.counts, histogram.count, histogram.total
+    ([1, 1, 1], 3, 33.5)
+
+    Instance Attributes:
+        - buckets: The upper bound of each bucket, in increasing order
+        - counts: The number of values in each bucket, with one more bucket at the end for values above every bound
+        - count: The number of values observed
+        - total: The sum of the values observed
+    """
+    buckets: tuple[float, ...]
+    counts: list[int]
+    count: int
+    total: float
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        """Initialize a new empty histogram with the given bucket bounds."""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record the given value."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> float:
+        """Return an estimate of the given quantile (between 0 and 1): the upper bound of the bucket it falls in."""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target and seen > 0:
+                return bound
+        return math.inf
+
+
+class Metrics:
+    """A collection of labelled counters and histograms.
+
+    >>> metrics = Metrics()
+    >>> metrics.inc('adventure_commands_total', command='look', valid='true')
+    >>> metrics.value('adventure_commands_total', command='look', valid='true')
+    1
+    >>> print(metrics.to_prometheus())
+    # HELP adventure_commands_total Commands entered, by command type and whether they were valid.
+    # TYPE adventure_commands_total counter
+    adventure_commands_total{command="look",valid="true"} 1
+    <BLANKLINE>
+    """
+    # Private Instance Attributes:
+    #   - _counters: The value of each counter, keyed by name and then by labels
+    #   - _histograms: Each histogram, keyed by name and then by labels
+    _counters: dict[str, dict[Labels, float]]
+    _histograms: dict[str, dict[Labels, Histogram]]
+
+    def __init__(self) -> None:
+        """Initialize a new collection with no metrics."""
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        """Add amount to the counter with the given name and labels."""
+        series = self._counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, buckets: tuple[float, ...] = LATENCY_BUCKETS, **labels: str) -> None:
+        """Record value in the histogram with the given name and labels, creating it with the given buckets if it
+        does not exist yet."""
+        series = self._histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def value(self, name: str, **labels: str) -> float:
+        """Return the value of the counter with the given name and labels, or 0 if it has not been counted."""
+        return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        """Return the histogram with the given name and labels, or None if nothing has been recorded in it."""
+        return self._histograms.get(name, {}).get(tuple(sorted(labels.items())))
+
+    def invalid_rate(self) -> float:
+        """Return the fraction of commands entered that were invalid.
+
+        >>> metrics = Metrics()
+        >>> metrics.inc('adventure_commands_total', 3, command='move', valid='true')
+        >>> metrics.inc('adventure_commands_total', command='invalid', valid='false')
+        >>> metrics.invalid_rate()
+        0.25
+        """
+        series = self._counters.get('adventure_commands_total', {})
+        total = sum(series.values())
+        invalid = sum(count for labels, count in series.items() if ('valid', 'false') in labels)
+        return invalid / total if total else 0.0
+
+    def to_json(self) -> dict[str, Any]:
+        """Return every metric as a JSON-serializable dictionary."""
+        counters = {name: [{'labels': dict(labels), 'value': value} for labels, value in series.items()]
+                    for name, series in self._counters.items()}
+        histograms = {name: [{'labels': dict(labels), 'buckets': list(histogram.buckets),
+                              'counts': histogram.counts, 'count': histogram.count, 'sum': histogram.total,
+                              'p50': _finite(histogram.quantile(0.5)), 'p99': _finite(histogram.quantile(0.99))}
+                             for labels, histogram in series.items()]
+                      for name, series in self._histograms.items()}
+        return {'counters': counters, 'histograms': histograms, 'invalid_rate': self.invalid_rate()}
+
+    def to_prometheus(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        for name, series in self._counters.items():
+            _describe(lines, name, 'counter')
+            for labels, value in series.items():
+                lines.append(f'{name}{_format_labels(labels)} {_format_number(value)}')
+        for name, series in self._histograms.items():
+            _describe(lines, name, 'histogram')
+            for labels, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (math.inf,), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == math.inf else _format_number(bound)
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", le),))} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_number(histogram.total)}')
+                lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _finite(value: float) -> Optional[float]:
+    """Return value, or None if it is infinite, since JSON has no infinity."""
+    return value if value != math.inf else None
+
+
+def _describe(lines: list[str], name: str, kind: str) -> None:
+    """Append the HELP and TYPE lines of the given metric to lines."""
+    if name in _HELP:
+        lines.append(f'# HELP {name} {_HELP[name]}')
+    lines.append(f'# TYPE {name} {kind}')
+
+
+def _format_labels(labels: Labels) -> str:
+    """Return the given labels in Prometheus syntax, or '' if there are none."""
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+def _format_number(value: float) -> str:
+    """Return the given number as Prometheus writes it."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def handler_name(handler: Handler) -> str:
+    """Return the name a command handler's latency is recorded under: its function name without the leading
+    underscore and the "_handler" suffix.
+
+    >>> from adventure import DEFAULT_COMMANDS
+    >>> handler, _ = DEFAULT_COMMANDS.resolve({}, 'take usb')
+    >>> handler_name(handler)
+    'take'
+    """
+    name = getattr(handler, '__name__', type(handler).__name__).lstrip('_')
+    return name[:-len('_handler')] if name.endswith('_handler') else name
+
+
+def _timed_handler(handler: Handler, metrics: Metrics) -> Handler:
+    """Return a version of the given command handler that records its latency in metrics."""
+    name = handler_name(handler)
+
+    @functools.wraps(handler)
+    def timed(game: Any, command: Any, log: Any) -> Optional[bool]:
+        start = time.perf_counter()
+        try:
+            return handler(game, command, log)
+        finally:
+            metrics.observe('adventure_handler_seconds', time.perf_counter() - start, handler=name)
+    return timed
+
+
+# The command registry each instrumented game had before it was instrumented
+_ORIGINAL_COMMANDS: WeakKeyDictionary[Any, CommandRegistry] = WeakKeyDictionary()
+
+
+def instrument(game: Any, metrics: Metrics) -> None:
+    """Record the commands, handler latencies and outcome of the given AdventureGame in metrics, until
+    uninstrument is called.
+
+    >>> from adventure import AdventureGame
+    >>> game, metrics = AdventureGame('game_data.json', 1), Metrics()
+    >>> instrument(game, metrics)
+    >>> for command in ["go east", "fly", "take usb", "quit"]:
+    ...     result = game.step(command)
+    >>> metrics.value('adventure_commands_total', command='move', valid='true')
+    1
+    >>> metrics.invalid_rate()
+    0.25
+    >>> metrics.histogram('adventure_handler_seconds', handler='take').count
+    1
+    >>> metrics.histogram('adventure_handler_seconds', handler='menu').count
+    1
+    >>> metrics.value('adventure_sessions_total', outcome='quit')
+    1
+    >>> uninstrument(game)
+    >>> from adventure import DEFAULT_COMMANDS
+    >>> 'step' in vars(game), game.commands is DEFAULT_COMMANDS
+    (False, True)
+    >>> from triggers import compile_triggers
+    >>> game = AdventureGame('game_data.json', 1)
+    >>> game.triggers = compile_triggers([{'name': 'trapped', 'when': [{'at': 20}], 'effects': [{'lose': 'Trapped!'}]}],
+    ...                                  game.locations.template.registry)
+    >>> instrument(game, metrics)
+    >>> game.step("go east").game_over, game.moves_left > 0
+    (True, True)
+    >>> metrics.value('adventure_sessions_total', outcome='lost')
+    1
+    """
+    step = game.step
+    finished = False
+
+    @functools.wraps(step)
+    def timed_step(command: str) -> Any:
+        nonlocal finished
+        if game.awaiting_password:
+            kind = 'password'
+        else:
+            resolved = game.resolve_command(command.lower().strip())
+            kind = resolved[1].verb if resolved is not None else 'invalid'
+        start = time.perf_counter()
+        result = step(command)
+        elapsed = time.perf_counter() - start
+        if not result.valid:
+            kind = 'invalid'
+        metrics.inc('adventure_commands_total', command=kind, valid='true' if result.valid else 'false')
+        metrics.observe('adventure_command_seconds', elapsed, command=kind)
+        if result.game_over and not finished:
+            finished = True
+            record_session(metrics, game, 'won' if game.won else 'lost' if game.lost else 'quit')
+        return result
+
+    game.step = timed_step
+    _ORIGINAL_COMMANDS[game] = game.commands
+    game.commands = game.commands.map_handlers(lambda handler: _timed_handler(handler, metrics))
+
+
+def record_session(metrics: Metrics, game: Any, outcome: str) -> None:
+    """Record that the given game has ended with the given outcome, such as 'won' or 'abandoned'."""
+    metrics.inc('adventure_sessions_total', outcome=outcome)
+    metrics.observe('adventure_session_moves', game.game_state.moves, MOVES_BUCKETS)
+
+
+def uninstrument(game: Any) -> None:
+    """Stop recording metrics for the given game."""
+    vars(game).pop('step', None)
+    commands = _ORIGINAL_COMMANDS.pop(game, None)
+    if commands is not None:
+        game.commands = commands
+
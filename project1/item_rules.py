@@ -0,0 +1,297 @@
+"""CSC111 Project 1: Text Adventure Game - Item Rules
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the code that turns the item rules declared in a game data file into
+a lookup table used by the "take" and "use" commands.
+
+The "rules" array of a game data file holds one object per rule, for example:
+
+    {"action": "use", "item": "movie cd", "locations": [3],
+     "requires": [{"flag": "cd_player_on"}],
+     "effects": [{"say": "The CD player starts playing: Madagascar!"}],
+     "refusal": "You must turn on the CD player first, you need some batteries..."}
+
+A "use" rule says where an item can be used: using an item anywhere without a rule fails. A
+"take" rule restricts where an item can be taken: taking an item anywhere without a rule is
+always allowed. When every requirement holds, the effects are applied in order (and, for a "use"
+rule, the item's target points are scored); otherwise the refusal is shown, if there is one.
+
+Requirements:   {"locked": id}, {"unlocked": id}, {"visited": id}, {"flag": name},
+                {"not_flag": name}, {"has": item}, {"at": id}, {"moves_at_least": moves},
+                {"score_at_least": points}
+Effects:        {"say": text}, {"lock": id}, {"unlock": id}, {"set": name}, {"clear": name},
+                {"give": item}, {"score": points}, {"check_win": true}, {"win": text},
+                {"lose": text}
+
+The same requirements and effects are used by the triggers declared in a game data file (see
+triggers.py).
+
+A flag can have any name: it is kept in the game's flags dictionary, and is cleared until a rule
+or trigger sets it. Every rule is compiled once, when the world is loaded, into closures stored
+under its (item, location ID) keys, so running a command looks its rule up with a single
+dictionary lookup.
+
+The doctests in this module turn the world cache (see world_cache.py) off, so that running them
+does not write to the user's cache directory:
+
+    >>> import os
+    >>> os.environ['ADVENTURE_WORLD_CACHE'] = ''
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from game_entities import ItemRegistry
+
+USE = 'use'
+TAKE = 'take'
+
+# A requirement is called with the game and returns whether it holds
+Requirement = Callable[[Any], bool]
+# An effect is called with the game, changes it, and returns a message to show the player or None
+Effect = Callable[[Any], Optional[str]]
+
+
+@dataclass(frozen=True)
+class ItemRule:
+    """A compiled rule for taking or using one item at one location.
+
+    Instance Attributes:
+        - requires: Returns whether the rule's requirements hold in the given game
+        - effects: The rule's effects, in the order they are applied
+        - refusal: The message shown when the requirements do not hold, or None
+    """
+    requires: Requirement
+    effects: tuple[Effect, ...]
+    refusal: Optional[str]
+
+
+class RuleBook:
+    """The compiled item rules of a world.
+
+    >>> from game_entities import Item
+    >>> rules = RuleBook([{'action': 'use', 'item': 'Key', 'locations': [2, 3], 'requires': [{'locked': 4}],
+    ...                    'effects': [{'unlock': 4}, {'say': 'Click.'}]}], ItemRegistry([Item('key', '', 1, 2, 0)]))
+    >>> sorted(rules.use)
+    [('key', 2), ('key', 3)]
+    >>> rules.take
+    {}
+
+    Instance Attributes:
+        - use: The rules for using each item, keyed by (canonical item name, location ID)
+        - take: The rules for taking each item, keyed by (canonical item name, location ID)
+    """
+    use: dict[tuple[str, int], ItemRule]
+    take: dict[tuple[str, int], ItemRule]
+
+    def __init__(self, rules: Iterable[dict[str, Any]] = (), registry: Optional[ItemRegistry] = None) -> None:
+        """Initialize a new rule book by compiling the given rules, as written in a game data file. Item names are
+        made canonical with registry.
+
+        Raise ValueError if a rule is malformed, or if two rules share an action, item and location.
+        """
+        self.use = {}
+        self.take = {}
+        registry = registry or ItemRegistry([])
+        for spec in rules:
+            table = {USE: self.use, TAKE: self.take}.get(spec.get('action'))
+            if table is None:
+                raise ValueError(f"item rule has unknown action {spec.get('action')!r}")
+            rule = ItemRule(compile_requirements(spec.get('requires', []), registry),
+                            compile_effects(spec.get('effects', []), registry), spec.get('refusal'))
+            item = registry.canonical_name(spec['item'])
+            for location_id in spec['locations']:
+                if (item, location_id) in table:
+                    raise ValueError(f"more than one {spec['action']} rule for {item!r} at location {location_id}")
+                table[(item, location_id)] = rule
+
+
+def compile_requirements(specs: list[dict[str, Any]], registry: ItemRegistry) -> Requirement:
+    """Return a single requirement that holds when every requirement in specs holds.
+
+    Raise ValueError if a requirement is malformed.
+
+    >>> requirement = compile_requirements([{'moves_at_least': 2}, {'at': 1}], ItemRegistry([]))
+    >>> from adventure import AdventureGame
+    >>> game = AdventureGame('game_data.json', 1)
+    >>> requirement(game)
+    False
+    >>> game.game_state.moves = 2
+    >>> requirement(game)
+    True
+    """
+    checks = tuple(_compile(_REQUIREMENTS, spec, registry) for spec in specs)
+    if not checks:
+        return lambda game: True
+    if len(checks) == 1:
+        return checks[0]
+    return lambda game: all(check(game) for check in checks)
+
+
+def compile_effects(specs: list[dict[str, Any]], registry: ItemRegistry) -> tuple[Effect, ...]:
+    """Return the effects in specs, in order.
+
+    Raise ValueError if an effect is malformed.
+    """
+    return tuple(_compile(_EFFECTS, spec, registry) for spec in specs)
+
+
+def _compile(builders: dict[str, Callable[[Any, ItemRegistry], Callable]], spec: dict[str, Any],
+             registry: ItemRegistry) -> Callable:
+    """Return the closure for the given requirement or effect, built by the builder for its single key."""
+    if len(spec) != 1:
+        raise ValueError(f'item rule requirements and effects must have exactly one key, not {spec!r}')
+    [(kind, argument)] = spec.items()
+    if kind not in builders:
+        raise ValueError(f'unknown item rule requirement or effect {kind!r}')
+    return builders[kind](argument, registry)
+
+
+def _flag(name: str) -> str:
+    """Return name, raising ValueError if it is not a valid flag name."""
+    if not isinstance(name, str) or not name:
+        raise ValueError(f'item rule flags must be named by a non-empty string, not {name!r}')
+    return name
+
+
+def _is_locked(location_id: int, _: ItemRegistry) -> Requirement:
+    """Return a requirement that the given location is locked."""
+    return lambda game: game.locations[location_id].state.locked
+
+
+def _is_unlocked(location_id: int, _: ItemRegistry) -> Requirement:
+    """Return a requirement that the given location is not locked."""
+    return lambda game: not game.locations[location_id].state.locked
+
+
+def _is_visited(location_id: int, _: ItemRegistry) -> Requirement:
+    """Return a requirement that the given location has been visited."""
+    return lambda game: game.locations[location_id].state.visited
+
+
+def _flag_is_set(name: str, _: ItemRegistry) -> Requirement:
+    """Return a requirement that the given flag is set."""
+    name = _flag(name)
+    return lambda game: game.flags.get(name, False)
+
+
+def _flag_is_clear(name: str, _: ItemRegistry) -> Requirement:
+    """Return a requirement that the given flag is not set."""
+    name = _flag(name)
+    return lambda game: not game.flags.get(name, False)
+
+
+def _has(item: str, registry: ItemRegistry) -> Requirement:
+    """Return a requirement that the player has the given item."""
+    name = registry.canonical_name(item)
+    return lambda game: name in game.inventory
+
+
+def _is_at(location_id: int, _: ItemRegistry) -> Requirement:
+    """Return a requirement that the player is at the given location."""
+    return lambda game: game.current_location_id == location_id
+
+
+def _moves_at_least(moves: int, _: ItemRegistry) -> Requirement:
+    """Return a requirement that the player has taken at least the given number of moves."""
+    return lambda game: game.game_state.moves >= moves
+
+
+def _score_at_least(points: int, _: ItemRegistry) -> Requirement:
+    """Return a requirement that the player has scored at least the given number of points."""
+    return lambda game: game.game_state.score >= points
+
+
+def _say(text: str, _: ItemRegistry) -> Effect:
+    """Return an effect that shows the given text."""
+    return lambda game: text
+
+
+def _lock(location_id: int, _: ItemRegistry) -> Effect:
+    """Return an effect that locks the given location."""
+    def effect(game: Any) -> None:
+        game.locations[location_id].state.locked = True
+    return effect
+
+
+def _unlock(location_id: int, _: ItemRegistry) -> Effect:
+    """Return an effect that unlocks the given location."""
+    def effect(game: Any) -> None:
+        game.locations[location_id].state.locked = False
+    return effect
+
+
+def _set(name: str, _: ItemRegistry) -> Effect:
+    """Return an effect that sets the given flag."""
+    name = _flag(name)
+
+    def effect(game: Any) -> None:
+        game.flags[name] = True
+    return effect
+
+
+def _clear(name: str, _: ItemRegistry) -> Effect:
+    """Return an effect that clears the given flag."""
+    name = _flag(name)
+
+    def effect(game: Any) -> None:
+        game.flags[name] = False
+    return effect
+
+
+def _give(item: str, registry: ItemRegistry) -> Effect:
+    """Return an effect that puts the given item in the player's inventory."""
+    name = registry.canonical_name(item)
+
+    def effect(game: Any) -> None:
+        game.inventory.add(name)
+    return effect
+
+
+def _score(points: int, _: ItemRegistry) -> Effect:
+    """Return an effect that adds points to the score."""
+    def effect(game: Any) -> None:
+        game.game_state.score += points
+    return effect
+
+
+def _check_win(_: Any, __: ItemRegistry) -> Effect:
+    """Return an effect that checks whether the player has won."""
+    def effect(game: Any) -> None:
+        game.check_win_condition()
+    return effect
+
+
+def _win(text: str, _: ItemRegistry) -> Effect:
+    """Return an effect that ends the game with a win, showing the given text."""
+    def effect(game: Any) -> None:
+        game.end(text, won=True)
+    return effect
+
+
+def _lose(text: str, _: ItemRegistry) -> Effect:
+    """Return an effect that ends the game with a loss, showing the given text."""
+    def effect(game: Any) -> None:
+        game.end(text)
+    return effect
+
+
+# The builder of each kind of requirement and effect, called with its argument and the world's item registry
+_REQUIREMENTS = {'locked': _is_locked, 'unlocked': _is_unlocked, 'visited': _is_visited, 'flag': _flag_is_set,
+                 'not_flag': _flag_is_clear, 'has': _has, 'at': _is_at, 'moves_at_least': _moves_at_least,
+                 'score_at_least': _score_at_least}
+_EFFECTS = {'say': _say, 'lock': _lock, 'unlock': _unlock, 'set': _set, 'clear': _clear, 'give': _give,
+            'score': _score, 'check_win': _check_win, 'win': _win, 'lose': _lose}
@@ -0,0 +1,165 @@
+"""CSC111 Project 1: Text Adventure Game - Output Sinks
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the output sinks that every message shown to the player is written
+to.
+
+A sink receives whole lines through write and decides when (and whether) they actually reach
+the player. StdoutSink prints each line immediately, exactly like print, so doctests keep
+working. The other sinks buffer a turn's lines and write them all at once when flushed, capture
+them in memory, send them over a socket, or throw them away.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import socket
+import sys
+from abc import ABC, abstractmethod
+from typing import Optional, TextIO
+
+
+class OutputSink(ABC):
+    """An abstract destination for the lines of text shown to the player.
+
+    Every subclass must define write, or it cannot be instantiated.
+
+    >>> class SilentSink(OutputSink):
+    ...     pass
+    >>> SilentSink()  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    TypeError: Can't instantiate abstract class SilentSink...
+    """
+
+    @abstractmethod
+    def write(self, line: str) -> None:
+        """Write one line of text (without its trailing newline) to this sink."""
+
+    def flush(self) -> None:
+        """Deliver any lines this sink is holding. By default, lines are delivered as they are written."""
+
+
+class StdoutSink(OutputSink):
+    """A sink that prints every line as soon as it is written, exactly like print.
+
+    The current sys.stdout is looked up on every write, so output redirected by doctest or
+    contextlib.redirect_stdout is captured as usual.
+
+    >>> StdoutSink().write("Hello")
+    Hello
+    """
+
+    def write(self, line: str) -> None:
+        """Print the given line."""
+        print(line)
+
+
+class BufferedSink(OutputSink):
+    """A sink that holds lines until it is flushed, then writes them all to its stream in a single call.
+
+    >>> sink = BufferedSink()
+    >>> sink.write("Moves remaining: 70")
+    >>> sink.write("A hallway leading to dorm rooms.")
+    >>> sink.flush()
+    Moves remaining: 70
+    A hallway leading to dorm rooms.
+    """
+    # Private Instance Attributes:
+    #   - _stream: The stream lines are flushed to, or None for the current sys.stdout
+    #   - _lines: The lines written since the last flush
+    _stream: Optional[TextIO]
+    _lines: list[str]
+
+    def __init__(self, stream: Optional[TextIO] = None) -> None:
+        """Initialize a new sink flushing to the given stream, or to sys.stdout if no stream is given."""
+        self._stream = stream
+        self._lines = []
+
+    def write(self, line: str) -> None:
+        """Hold the given line until the next flush."""
+        self._lines.append(line)
+
+    def _take(self) -> str:
+        """Return the held lines as one string, and stop holding them."""
+        text = '\n'.join(self._lines) + '\n'
+        self._lines = []
+        return text
+
+    def flush(self) -> None:
+        """Write all held lines to the stream at once."""
+        if not self._lines:
+            return
+        stream = self._stream if self._stream is not None else sys.stdout
+        stream.write(self._take())
+        stream.flush()
+
+
+class CaptureSink(OutputSink):
+    """A sink that keeps every line written to it in memory.
+
+    Instance Attributes:
+        - lines: The lines written so far
+
+    >>> sink = CaptureSink()
+    >>> sink.write("You have taken usb.")
+    >>> sink.lines
+    ['You have taken usb.']
+    """
+    lines: list[str]
+
+    def __init__(self) -> None:
+        """Initialize a new, empty capturing sink."""
+        self.lines = []
+
+    def write(self, line: str) -> None:
+        """Keep the given line."""
+        self.lines.append(line)
+
+    def getvalue(self) -> str:
+        """Return everything written so far, one line per line."""
+        return ''.join(line + '\n' for line in self.lines)
+
+    def clear(self) -> None:
+        """Forget every line written so far."""
+        self.lines = []
+
+
+class NullSink(OutputSink):
+    """A sink that discards everything written to it, for benchmarks."""
+
+    def write(self, line: str) -> None:
+        """Discard the given line."""
+
+
+class SocketSink(BufferedSink):
+    """A sink that holds lines until it is flushed, then sends them all over a connected socket in one call."""
+    # Private Instance Attributes:
+    #   - _socket: The connected socket lines are sent to
+    #   - _encoding: The encoding used for the sent text
+    _socket: socket.socket
+    _encoding: str
+
+    def __init__(self, sock: socket.socket, encoding: str = 'utf-8') -> None:
+        """Initialize a new sink sending to the given connected socket."""
+        super().__init__()
+        self._socket = sock
+        self._encoding = encoding
+
+    def flush(self) -> None:
+        """Send all held lines at once."""
+        if self._lines:
+            self._socket.sendall(self._take().encode(self._encoding))
+
+
+# The sink used when no other is given
+STDOUT = StdoutSink()
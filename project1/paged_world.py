@@ -0,0 +1,316 @@
+"""CSC111 Project 1: Text Adventure Game - Demand-Paged Worlds
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the code that plays a compiled world too large to keep in memory,
+holding only the parts of it near the players.
+
+The map is divided into square regions of REGION_SIZE rows by REGION_SIZE columns, and every
+location belongs to the region its grid_position falls in. (Locations that are not on the map
+are grouped into regions of their own, REGION_SIZE * REGION_SIZE locations at a time, in ID
+order.) A region's locations are only decoded from the world file when one of them is first
+looked up, and the regions around it are read ahead while they fit. Once the decoded regions go
+over the memory budget, the least recently used ones are dropped and decoded again if they are
+needed later.
+
+Only the static data of the world is paged. Everything a game changes about a location is kept
+in that game's SessionLocations overlay, which is never dropped, so a game does not notice when
+the regions it has been playing in are evicted and loaded again.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import os
+from array import array
+from collections import OrderedDict
+from typing import Callable, Iterator, Mapping, Optional
+
+from game_entities import ItemRegistry, Location
+from world_binary import BinaryWorld, is_world_file
+from world_cache import world_file
+from world_template import LocationTemplate, WorldTemplate
+
+# The number of rows and columns covered by each region
+REGION_SIZE = 32
+# The default memory budget for the decoded regions of a world, in bytes
+DEFAULT_BUDGET = 64 * 1024 * 1024
+# The number of Location objects each game keeps when playing a paged world
+SESSION_CACHE_SIZE = 1024
+
+# The approximate size of a decoded LocationTemplate apart from its strings, and of each of its commands, in bytes
+_LOCATION_BYTES = 700
+_COMMAND_BYTES = 200
+
+
+class PagedLocations(Mapping):
+    """A read-only mapping from location ID to location, backed by a BinaryWorld and decoded a region at a time.
+
+    >>> import tempfile
+    >>> from world_cache import warm
+    >>> world = BinaryWorld(warm('game_data.json', tempfile.mkdtemp()))
+    >>> locations = PagedLocations(world, region_size=2, budget=0)
+    >>> locations[21].name
+    'Dorms Central'
+    >>> locations.loaded_regions, locations.loads
+    (1, 1)
+    >>> locations[1].name  # Another region, so the region of location 21 is evicted to stay near the budget
+    'Your Room'
+    >>> locations.loaded_regions, locations.evictions
+    (1, 1)
+
+    Instance Attributes:
+        - region_size: The number of rows and columns covered by each region
+        - budget: The approximate number of bytes the decoded regions may take up
+        - loads: The number of regions decoded because a location in them was looked up
+        - prefetches: The number of regions decoded because a neighbouring region was looked up
+        - evictions: The number of regions dropped to stay within the budget
+    """
+    region_size: int
+    budget: int
+    loads: int
+    prefetches: int
+    evictions: int
+    # Private Instance Attributes:
+    #   - _world: The world file locations are decoded from
+    #   - _convert: A function applied to each decoded Location, or None
+    #   - _region_of: The region number of each location, by record index
+    #   - _members: The record indexes of the locations in each region, by region number
+    #   - _keys: The (row, column) of each region on the map, or None for a region of locations not on the map,
+    #            by region number
+    #   - _numbers: The region number of each region on the map, keyed by its (row, column)
+    #   - _pages: The decoded locations of each loaded region, keyed by region number, least recently used first
+    #   - _sizes: The approximate size in bytes of each loaded region, keyed by region number
+    #   - _resident: The approximate size in bytes of all loaded regions
+    _world: BinaryWorld
+    _convert: Optional[Callable[[Location], object]]
+    _region_of: array
+    _members: list[array]
+    _keys: list[Optional[tuple[int, int]]]
+    _numbers: dict[tuple[int, int], int]
+    _pages: OrderedDict[int, dict[int, object]]
+    _sizes: dict[int, int]
+    _resident: int
+
+    def __init__(self, world: BinaryWorld, convert: Optional[Callable[[Location], object]] = None,
+                 region_size: int = REGION_SIZE, budget: int = DEFAULT_BUDGET) -> None:
+        """Initialize a new mapping over the given world, reading only the grid position of each location.
+
+        If convert is given, each decoded Location is passed through it and the result is stored instead.
+
+        Preconditions:
+            - region_size > 0
+            - budget >= 0
+        """
+        self.region_size = region_size
+        self.budget = budget
+        self.loads = self.prefetches = self.evictions = 0
+        self._world = world
+        self._convert = convert
+        self._region_of = array('i')
+        self._members = []
+        self._keys = []
+        self._numbers = {}
+        self._pages = OrderedDict()
+        self._sizes = {}
+        self._resident = 0
+
+        off_grid = None
+        for i, position in enumerate(world.grid_positions()):
+            if position is not None:
+                key = (position[0] // region_size, position[1] // region_size)
+                number = self._numbers.get(key)
+                if number is None:
+                    number = self._numbers[key] = self._new_region(key)
+            else:
+                if off_grid is None or len(self._members[off_grid]) >= region_size * region_size:
+                    off_grid = self._new_region(None)
+                number = off_grid
+            self._region_of.append(number)
+            self._members[number].append(i)
+
+    def _new_region(self, key: Optional[tuple[int, int]]) -> int:
+        """Add an empty region with the given key and return its number."""
+        self._members.append(array('i'))
+        self._keys.append(key)
+        return len(self._keys) - 1
+
+    @property
+    def loaded_regions(self) -> int:
+        """The number of regions currently decoded."""
+        return len(self._pages)
+
+    @property
+    def resident_bytes(self) -> int:
+        """The approximate number of bytes taken up by the decoded regions."""
+        return self._resident
+
+    def __getitem__(self, id_num: int) -> object:
+        """Return the location with the given ID, decoding its region if needed."""
+        number = self._region_of[self._record_index(id_num)]
+        page = self._pages.get(number)
+        if page is None:
+            page = self._load(number)
+            self.loads += 1
+            self._prefetch(number)
+            self._evict(number)
+        else:
+            self._pages.move_to_end(number)
+        return page[id_num]
+
+    def grid_positions(self) -> Iterator[tuple[int, tuple[int, int]]]:
+        """Return an iterator over the (location ID, grid position) of every location on the map, without decoding
+        any region."""
+        for id_num, position in zip(self._world.location_ids(), self._world.grid_positions()):
+            if position is not None:
+                yield id_num, position
+
+    def exits(self, id_num: int) -> tuple[tuple[str, int], ...]:
+        """Return the (command, destination ID) pairs of the location with the given ID, without decoding its region.
+
+        Raise KeyError if there is no such location.
+        """
+        return self._world.exits_at(self._record_index(id_num))
+
+    def names(self) -> Iterator[tuple[int, str]]:
+        """Return an iterator over the (location ID, name) of every location, without decoding any region."""
+        return zip(self._world.location_ids(), self._world.names())
+
+    def starting_state(self, id_num: int) -> tuple[bool, bool, bool]:
+        """Return whether the location with the given ID is locked, is visited and has any items when a game starts,
+        without decoding its region.
+
+        Raise KeyError if there is no such location.
+        """
+        return self._world.state_at(self._record_index(id_num))
+
+    def _record_index(self, id_num: int) -> int:
+        """Return the record index of the location with the given ID, raising KeyError if there is none."""
+        i = self._world.record_index(id_num) if isinstance(id_num, int) else None
+        if i is None:
+            raise KeyError(id_num)
+        return i
+
+    def __contains__(self, id_num: object) -> bool:
+        """Return whether there is a location with the given ID, without decoding it."""
+        return isinstance(id_num, int) and id_num in self._world
+
+    def __iter__(self) -> Iterator[int]:
+        """Return an iterator over all location IDs."""
+        return self._world.location_ids()
+
+    def __len__(self) -> int:
+        """Return the number of locations."""
+        return len(self._world)
+
+    def _load(self, number: int) -> dict[int, object]:
+        """Decode the region with the given number and add it as the most recently used region."""
+        page = {}
+        size = 0
+        for i in self._members[number]:
+            location = self._world.location_at(i)
+            size += (_LOCATION_BYTES + _COMMAND_BYTES * len(location.available_commands) + len(location.name)
+                     + len(location.brief_description) + len(location.long_description or ''))
+            page[location.id_num] = location if self._convert is None else self._convert(location)
+        self._pages[number] = page
+        self._sizes[number] = size
+        self._resident += size
+        return page
+
+    def _prefetch(self, number: int) -> None:
+        """Decode the regions around the region with the given number that are not loaded yet, as long as they fit
+        in the budget. They are used less recently than that region, so they are evicted first."""
+        key = self._keys[number]
+        if key is None:
+            return
+        for row in range(key[0] - 1, key[0] + 2):
+            for column in range(key[1] - 1, key[1] + 2):
+                neighbour = self._numbers.get((row, column))
+                if neighbour is None or neighbour in self._pages:
+                    continue
+                if self._resident >= self.budget:
+                    return
+                self._load(neighbour)
+                self._pages.move_to_end(neighbour, last=False)
+                self.prefetches += 1
+
+    def _evict(self, keep: int) -> None:
+        """Drop the least recently used regions other than keep until the decoded regions fit in the budget."""
+        while self._resident > self.budget and len(self._pages) > 1:
+            number = next(iter(self._pages))
+            if number == keep:
+                self._pages.move_to_end(number)
+                continue
+            del self._pages[number]
+            self._resident -= self._sizes.pop(number)
+            self.evictions += 1
+
+
+class PagedTemplate(WorldTemplate):
+    """The template of a world whose locations are paged in from a world file, which reads the starting state of
+    a location from the file without decoding its region.
+
+    >>> import tempfile
+    >>> from world_cache import warm
+    >>> template = paged_template(warm('game_data.json', tempfile.mkdtemp()))
+    >>> template.starting_state(4), template.starting_state(1)
+    ((True, False, True), (False, False, False))
+    >>> template.locations.loads
+    0
+
+    Instance Attributes:
+        - locations: The paged locations of the world
+    """
+    locations: PagedLocations
+
+    def starting_state(self, id_num: int) -> tuple[bool, bool, bool]:
+        """Return whether the location with the given ID is locked, is visited and has any items when a game starts,
+        without decoding its region."""
+        return self.locations.starting_state(id_num)
+
+
+# The paged templates loaded so far, keyed by (absolute filename of the game data or world file, size, modification
+# time, budget)
+_PAGED: dict[tuple[str, int, int, int], PagedTemplate] = {}
+
+
+def paged_template(filename: str, budget: int = DEFAULT_BUDGET) -> PagedTemplate:
+    """Return a world template for the given file that keeps only about budget bytes of its locations decoded,
+    loading it only if this process has not already done so with the same budget.
+
+    A game data JSON file is compiled into the world cache first (see world_cache.py), unless it is already there,
+    or into a temporary world file if the cache is turned off or cannot be written.
+
+    >>> import tempfile
+    >>> from world_cache import warm
+    >>> compiled = warm('game_data.json', tempfile.mkdtemp())
+    >>> template = paged_template(compiled)
+    >>> template is paged_template(compiled)
+    True
+    >>> template.locations[1].name
+    'Your Room'
+    """
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns, budget)
+    template = _PAGED.get(key)
+    if template is None:
+        for old_key in [k for k in _PAGED if k[0] == path and k[3] == budget]:
+            del _PAGED[old_key]
+        world = BinaryWorld(path if is_world_file(path) else world_file(path))
+        items = world.items()
+        registry = ItemRegistry(items)
+        template = PagedTemplate(PagedLocations(world, lambda loc: LocationTemplate.from_location(loc, registry),
+                                                budget=budget),
+                                 items, registry, world.other(), SESSION_CACHE_SIZE, world.source_hash)
+        _PAGED[key] = template
+    return template
@@ -0,0 +1,248 @@
+"""CSC111 Project 1: Text Adventure Game - Batch Simulator
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains code that replays a whole corpus of recorded walkthroughs with
+AdventureGameSimulation and checks each one against its expected location log.
+
+Walkthroughs are read from either a JSON Lines file (one walkthrough per line) or a directory of
+.json/.jsonl files. Each walkthrough is a JSON object of the form
+
+    {"name": "win", "commands": ["go east", ...], "expected_log": [1, 20, ...], "initial_location": 1}
+
+where "name" and "initial_location" (default 1) are optional.
+
+The walkthroughs are spread over a pool of worker processes. Each worker loads the game world
+once, when it starts, and reuses it for every walkthrough it runs. Results are reported as soon
+as they are ready, so a large corpus can be monitored while it runs:
+
+    python proj1_batch.py game_data.json walkthroughs.jsonl --workers 8
+
+The doctests in this module turn the world cache (see world_cache.py) off, so that running them
+does not write to the user's cache directory:
+
+    >>> import os
+    >>> os.environ['ADVENTURE_WORLD_CACHE'] = ''
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+from proj1_simulation import AdventureGameSimulation
+from world_template import shared_template
+
+
+@dataclass
+class WalkthroughResult:
+    """The outcome of replaying one walkthrough.
+
+    Instance Attributes:
+        - name: The name of the walkthrough
+        - passed: Whether the replay produced the expected location log
+        - actual_log: The location log the replay produced, or None if it raised an error
+        - error: A description of the error the replay raised, or None
+    """
+    name: str
+    passed: bool
+    actual_log: Optional[list[int]]
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchStats:
+    """Running totals for a batch of walkthroughs.
+
+    Instance Attributes:
+        - total: The number of walkthroughs replayed so far
+        - passed: The number that produced their expected log
+        - failed: The number that produced a different log
+        - errors: The number that raised an error
+        - elapsed: The number of seconds since the batch started
+    """
+    total: int = 0
+    passed: int = 0
+    failed: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """The number of walkthroughs replayed per second."""
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+    def record(self, result: WalkthroughResult) -> None:
+        """Add the given result to these totals."""
+        self.total += 1
+        if result.passed:
+            self.passed += 1
+        elif result.error is not None:
+            self.errors += 1
+        else:
+            self.failed += 1
+
+
+def load_walkthroughs(path: str) -> Iterator[dict]:
+    """Return an iterator over the walkthroughs in the given JSON Lines file or directory, reading lazily.
+
+    Walkthroughs without a name are named after their file and line number. A file or line that is not a valid
+    walkthrough is yielded as a walkthrough holding only its name and an error, which replay reports as failed.
+    """
+    if os.path.isdir(path):
+        filenames = sorted(os.path.join(path, name) for name in os.listdir(path)
+                           if name.endswith('.json') or name.endswith('.jsonl'))
+    else:
+        filenames = [path]
+
+    for filename in filenames:
+        with open(filename, 'r') as f:
+            if filename.endswith('.json'):
+                yield _parse_walkthrough(f.read(), os.path.basename(filename))
+                continue
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    yield _parse_walkthrough(line, f'{os.path.basename(filename)}:{line_number}')
+
+
+def _parse_walkthrough(text: str, default_name: str) -> dict:
+    """Return the walkthrough in the given JSON text, named default_name if it has no name, or a walkthrough holding
+    only that name and an error if the text is not a JSON object.
+
+    >>> _parse_walkthrough('{"commands": [', 'w.jsonl:3')['name']
+    'w.jsonl:3'
+    """
+    try:
+        walkthrough = json.loads(text)
+    except json.JSONDecodeError as error:
+        return {'name': default_name, 'error': f'JSONDecodeError: {error}'}
+    if not isinstance(walkthrough, dict):
+        return {'name': default_name, 'error': 'a walkthrough must be a JSON object'}
+    walkthrough.setdefault('name', default_name)
+    return walkthrough
+
+
+# The game data file used by this worker process
+_worker_game_data: Optional[str] = None
+
+
+def _init_worker(game_data_file: str) -> None:
+    """Load the game world once in a new worker process."""
+    global _worker_game_data
+    _worker_game_data = game_data_file
+    shared_template(game_data_file)
+
+
+def replay(game_data_file: str, walkthrough: dict) -> WalkthroughResult:
+    """Replay the given walkthrough in the given world and compare its location log with the expected one.
+
+    >>> replay('game_data.json', {'name': 'w', 'commands': ['go east'], 'expected_log': [1, 20]}).passed
+    True
+    >>> replay('game_data.json', {'name': 'w', 'commands': ['go east']}).error
+    "KeyError: 'expected_log'"
+    """
+    name = walkthrough.get('name', '')
+    if 'error' in walkthrough:  # The walkthrough could not be read (see load_walkthroughs)
+        return WalkthroughResult(name, False, None, walkthrough['error'])
+    try:
+        simulation = AdventureGameSimulation(game_data_file, walkthrough.get('initial_location', 1),
+                                             walkthrough['commands'])
+        actual_log = simulation.get_id_log()
+        passed = actual_log == walkthrough['expected_log']
+    except Exception as error:  # A broken walkthrough must not stop the batch
+        return WalkthroughResult(name, False, None, f'{type(error).__name__}: {error}')
+    return WalkthroughResult(name, passed, actual_log)
+
+
+def _replay_chunk(walkthroughs: list[dict]) -> list[WalkthroughResult]:
+    """Replay a chunk of walkthroughs in this worker's world."""
+    return [replay(_worker_game_data, walkthrough) for walkthrough in walkthroughs]
+
+
+def run_batch(game_data_file: str, walkthroughs: Iterable[dict], workers: Optional[int] = None,
+              chunk_size: int = 64) -> Iterator[WalkthroughResult]:
+    """Replay the given walkthroughs over a pool of worker processes, yielding each result as soon as it is ready.
+
+    Walkthroughs are sent to the workers chunk_size at a time, and only a few chunks per worker are in flight at
+    once, so the corpus is never read into memory all at once. Results are yielded in completion order.
+
+    Preconditions:
+        - workers is None or workers > 0
+        - chunk_size > 0
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = 2 * workers
+    walkthroughs = iter(walkthroughs)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(game_data_file,)) as executor:
+        pending: set[Future] = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_pending:
+                chunk = list(islice(walkthroughs, chunk_size))
+                if chunk:
+                    pending.add(executor.submit(_replay_chunk, chunk))
+                else:
+                    exhausted = True
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Run the batch simulator from the command line. Return 0 if every walkthrough passed, and 1 otherwise."""
+    parser = argparse.ArgumentParser(description='Replay a corpus of walkthroughs and check their location logs.')
+    parser.add_argument('game_data', help='the game data JSON file or compiled world file')
+    parser.add_argument('walkthroughs', help='a JSON Lines file or a directory of walkthrough files')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes (default: CPUs)')
+    parser.add_argument('--chunk-size', type=int, default=64, help='walkthroughs sent to a worker at a time')
+    parser.add_argument('--report-every', type=int, default=10000, help='print running totals this often')
+    args = parser.parse_args(argv)
+
+    stats = BatchStats()
+    start = time.perf_counter()
+    for result in run_batch(args.game_data, load_walkthroughs(args.walkthroughs), args.workers, args.chunk_size):
+        stats.record(result)
+        if result.error is not None:
+            print(f"ERROR {result.name}: {result.error}")
+        elif not result.passed:
+            print(f"FAIL {result.name}: got {result.actual_log}")
+        if stats.total % args.report_every == 0:
+            stats.elapsed = time.perf_counter() - start
+            print(f"... {stats.total} replayed, {stats.throughput:.0f}/s")
+    stats.elapsed = time.perf_counter() - start
+
+    print(f"{stats.total} walkthroughs: {stats.passed} passed, {stats.failed} failed, {stats.errors} errors "
+          f"in {stats.elapsed:.2f}s ({stats.throughput:.0f}/s)")
+    return 0 if stats.passed == stats.total else 1
+
+
+if __name__ == "__main__":
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (Delete the "#" and space before each line.)
+    # IMPORTANT: keep this code indented inside the "if __name__ == '__main__'" block
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'disable': ['R1705', 'E9998', 'E9999']
+    # })
+    raise SystemExit(main())
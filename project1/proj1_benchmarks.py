@@ -0,0 +1,342 @@
+"""CSC111 Project 1: Text Adventure Game - Benchmarks
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains a benchmark suite that times the game on synthetic worlds of
+several sizes, so that code which stops scaling is found before it reaches players.
+
+Each synthetic world is a square grid of locations in the game_data.json format, where every
+location records its grid_position and can be left by "go north", "go south", "go east" and
+"go west". Worlds are generated deterministically from a seed, so every run times the same
+worlds, and are written once to a cache directory and reused by later runs.
+
+For each world size the suite times loading the world with _load_game_data, creating
+AdventureGames (both the first game in a process, which loads the world, and later games, which
+share it), and the latency of AdventureGame.step, and measures how many walkthroughs per second
+AdventureGameSimulation replays. Each world is timed with an empty world cache (see
+world_cache.py) of its own, so the first game always starts cold, and loading the world again
+from the cache, as a new process would, is timed separately. EventList is timed separately at
+growing lengths. The results are written as JSON, and a previous results file can be given to
+report regressions:
+
+    python proj1_benchmarks.py --scales 10,1000,100000 --output after.json --compare before.json
+
+The 1,000,000 location world takes about a minute and a few gigabytes of memory to load.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Optional
+
+from adventure import AdventureGame
+from proj1_event_logger import Event, EventList
+from proj1_simulation import AdventureGameSimulation
+from world_cache import CACHE_ENVIRONMENT_VARIABLE
+from world_template import WorldTemplate
+
+# The world sizes benchmarked by default, in locations
+SCALES = [10, 1000, 100000, 1000000]
+# The event list lengths benchmarked
+EVENT_LIST_LENGTHS = [1000, 10000, 100000, 1000000]
+# How much slower (or, for throughputs, how much lower) a result may be than its baseline before it is reported
+REGRESSION_THRESHOLD = 1.25
+# The version of generate_location's output, part of cached world filenames so that worlds generated by an older
+# version are not reused
+GENERATOR_VERSION = 2
+
+_DIRECTIONS = [("go north", 0, -1), ("go south", 0, 1), ("go east", 1, 0), ("go west", -1, 0)]
+
+
+def generate_location(id_num: int, width: int, size: int, rng: random.Random) -> dict[str, Any]:
+    """Return the game data for the location with the given ID in a grid of the given width and size.
+
+    Location IDs start at 1 and run along the rows of the grid. About one location in fifty is locked, except the
+    first, and about one in twenty holds an item.
+
+    >>> generate_location(5, 3, 9, random.Random(0))['available_commands']
+    {'go north': 2, 'go south': 8, 'go east': 6, 'go west': 4}
+    >>> generate_location(5, 3, 9, random.Random(0))['grid_position']
+    [1, 1]
+    """
+    x, y = (id_num - 1) % width, (id_num - 1) // width
+    commands = {}
+    for command, dx, dy in _DIRECTIONS:
+        nx, ny = x + dx, y + dy
+        neighbour = ny * width + nx + 1
+        if 0 <= nx < width and 0 <= ny and neighbour <= size:
+            commands[command] = neighbour
+
+    location = {
+        'id': id_num,
+        'name': f'Room {x},{y}',
+        'brief_description': f'Room {x},{y}.',
+        'long_description': f'A plain room at {x},{y} of a very large building.',
+        'available_commands': commands,
+        'grid_position': [y, x]
+    }
+    if id_num > 1 and rng.random() < 0.02:
+        location['locked'] = True
+    if rng.random() < 0.05:
+        location['items'] = [f'item {id_num}']
+    return location
+
+
+def write_world(filename: str, size: int, seed: int = 0) -> None:
+    """Write a synthetic grid world with the given number of locations to the given file, one location at a time.
+
+    The same size and seed always give the same world.
+    """
+    rng = random.Random(seed)
+    width = max(1, math.isqrt(size - 1) + 1)
+    item_ids = []
+    tmp_name = filename + '.tmp'
+    with open(tmp_name, 'w') as f:
+        f.write('{"locations": [\n')
+        for id_num in range(1, size + 1):
+            location = generate_location(id_num, width, size, rng)
+            if 'items' in location:
+                item_ids.append(id_num)
+            f.write(json.dumps(location))
+            f.write(',\n' if id_num < size else '\n')
+        f.write('], "items": [\n')
+        for i, id_num in enumerate(item_ids):
+            f.write(json.dumps({'name': f'item {id_num}', 'description': 'A synthetic item.',
+                                'start_position': id_num, 'target_position': rng.randint(1, size),
+                                'target_points': rng.choice([0, 10])}))
+            f.write(',\n' if i < len(item_ids) - 1 else '\n')
+        f.write(']}\n')
+    os.replace(tmp_name, filename)
+
+
+def world_file(directory: str, size: int, seed: int = 0) -> str:
+    """Return the filename of the synthetic world with the given size and seed, generating it if it is not already
+    in the given directory."""
+    filename = os.path.join(directory, f'world_v{GENERATOR_VERSION}_{size}_{seed}.json')
+    if not os.path.exists(filename):
+        os.makedirs(directory, exist_ok=True)
+        write_world(filename, size, seed)
+    return filename
+
+
+def random_walk(game: AdventureGame, length: int, rng: random.Random) -> list[str]:
+    """Return a list of length commands that moves around the given game's world from its current location,
+    with an occasional "look" or "inventory". The game itself is not changed."""
+    commands = []
+    location_id = game.current_location_id
+    for _ in range(length):
+        exits = [(command, target) for command, target in game.get_location(location_id).available_commands.items()
+                 if not game.get_location(target).locked]
+        if not exits or rng.random() < 0.1:
+            commands.append(rng.choice(["look", "inventory"]))
+        else:
+            command, location_id = rng.choice(exits)
+            commands.append(command)
+    return commands
+
+
+def _best_of(function: Callable[[], Any], repeat: int) -> float:
+    """Return the fewest seconds any of repeat calls to function took."""
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _percentile(samples: list[float], p: float) -> float:
+    """Return the given percentile (between 0 and 100) of the given samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def bench_world(filename: str, steps: int = 10000, walkthroughs: int = 200, seed: int = 0) -> dict[str, float]:
+    """Return the timings for the world in the given file. Games in this process must not have loaded it yet.
+
+    Times are in seconds (_s) or microseconds (_us), and throughputs are per second (_per_s). The world cache is
+    pointed at a new, empty directory while the world is timed, so first_game_cold_s does not depend on earlier
+    runs.
+    """
+    cache = tempfile.mkdtemp(prefix='adventure_benchmark_cache')
+    saved = os.environ.get(CACHE_ENVIRONMENT_VARIABLE)
+    os.environ[CACHE_ENVIRONMENT_VARIABLE] = cache
+    try:
+        return _bench_world(filename, steps, walkthroughs, seed)
+    finally:
+        if saved is None:
+            del os.environ[CACHE_ENVIRONMENT_VARIABLE]
+        else:
+            os.environ[CACHE_ENVIRONMENT_VARIABLE] = saved
+        shutil.rmtree(cache, ignore_errors=True)
+
+
+def _bench_world(filename: str, steps: int, walkthroughs: int, seed: int) -> dict[str, float]:
+    """Return the timings for the world in the given file, as described in bench_world."""
+    results = {}
+    start = time.perf_counter()
+    locations, _ = AdventureGame._load_game_data(filename)
+    results['load_s'] = time.perf_counter() - start
+    results['load_locations_per_s'] = len(locations) / results['load_s']
+    del locations
+
+    start = time.perf_counter()
+    game = AdventureGame(filename, 1)
+    results['first_game_cold_s'] = time.perf_counter() - start
+    results['warm_start_s'] = _best_of(lambda: WorldTemplate.load(filename), 1)
+    count = 1000
+    start = time.perf_counter()
+    for _ in range(count):
+        AdventureGame(filename, 1)
+    results['new_game_us'] = (time.perf_counter() - start) / count * 1e6
+
+    rng = random.Random(seed)
+    game.game_state.max_moves = steps + 2  # The game is lost after max_moves - 1 commands, so every step runs
+    latencies = []
+    for command in random_walk(game, steps, rng):
+        start = time.perf_counter()
+        game.step(command)
+        latencies.append(time.perf_counter() - start)
+    results['step_mean_us'] = statistics.fmean(latencies) * 1e6
+    results['step_p50_us'] = _percentile(latencies, 50) * 1e6
+    results['step_p99_us'] = _percentile(latencies, 99) * 1e6
+
+    walkthrough = random_walk(AdventureGame(filename, 1), 50, rng)
+    start = time.perf_counter()
+    for _ in range(walkthroughs):
+        AdventureGameSimulation(filename, 1, walkthrough).get_id_log()
+    results['simulation_walkthroughs_per_s'] = walkthroughs / (time.perf_counter() - start)
+    return results
+
+
+def bench_event_list(length: int, repeat: int = 3) -> dict[str, float]:
+    """Return the timings for an EventList of the given length, per operation in microseconds, taking the best of
+    repeat runs.
+
+    >>> sorted(bench_event_list(10))
+    ['add_event_us', 'get_id_log_us', 'remove_last_event_us']
+    """
+    events = [Event(i, "Room", None) for i in range(length)]
+    add_times, log_times, remove_times = [], [], []
+    for _ in range(repeat):
+        log = EventList()
+        start = time.perf_counter()
+        for event in events:
+            log.add_event(event, "go east")
+        add_times.append(time.perf_counter() - start)
+
+        log_times.append(_best_of(log.get_id_log, 1))
+
+        start = time.perf_counter()
+        for _ in range(length):
+            log.remove_last_event()
+        remove_times.append(time.perf_counter() - start)
+
+    return {'add_event_us': min(add_times) / length * 1e6,
+            'get_id_log_us': min(log_times) * 1e6,
+            'remove_last_event_us': min(remove_times) / length * 1e6}
+
+
+def run_benchmarks(scales: list[int], world_dir: str, event_list_lengths: Optional[list[int]] = None,
+                   seed: int = 0, report: Optional[Callable[[str], None]] = None) -> dict[str, Any]:
+    """Run the benchmarks for the given world sizes and event list lengths, and return the results.
+
+    report, if given, is called with a line of text as each benchmark finishes.
+    """
+    results = {}
+    for size in scales:
+        name = f'world_{size}'
+        results[name] = bench_world(world_file(world_dir, size, seed), seed=seed)
+        if report is not None:
+            report(f'{name}: ' + ', '.join(f'{key}={value:.4g}' for key, value in results[name].items()))
+    for length in event_list_lengths if event_list_lengths is not None else EVENT_LIST_LENGTHS:
+        name = f'event_list_{length}'
+        results[name] = bench_event_list(length)
+        if report is not None:
+            report(f'{name}: ' + ', '.join(f'{key}={value:.4g}' for key, value in results[name].items()))
+
+    return {
+        'meta': {'python': sys.version.split()[0], 'implementation': platform.python_implementation(),
+                 'platform': platform.platform(), 'machine': platform.machine(), 'time': time.time(), 'seed': seed},
+        'results': results
+    }
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any],
+            threshold: float = REGRESSION_THRESHOLD) -> list[str]:
+    """Return a description of every result in current that is worse than the same result in baseline by more than
+    the given factor. Results missing from either run are ignored.
+
+    >>> old = {'results': {'world_10': {'step_mean_us': 10.0, 'load_locations_per_s': 1000.0}}}
+    >>> new = {'results': {'world_10': {'step_mean_us': 20.0, 'load_locations_per_s': 990.0}}}
+    >>> compare(old, new)
+    ['world_10 step_mean_us: 10 -> 20 (2.00x worse)']
+    """
+    regressions = []
+    for name, values in current['results'].items():
+        old_values = baseline['results'].get(name, {})
+        for key, value in values.items():
+            old = old_values.get(key)
+            if not old or not value:
+                continue
+            ratio = old / value if key.endswith('_per_s') else value / old
+            if ratio > threshold:
+                regressions.append(f'{name} {key}: {old:.4g} -> {value:.4g} ({ratio:.2f}x worse)')
+    return regressions
+
+
+if __name__ == "__main__":
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (Delete the "#" and space before each line.)
+    # IMPORTANT: keep this code indented inside the "if __name__ == '__main__'" block
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'disable': ['R1705', 'E9998', 'E9999']
+    # })
+    parser = argparse.ArgumentParser(description='Benchmark the game on synthetic worlds of several sizes.')
+    parser.add_argument('--scales', default=','.join(str(size) for size in SCALES),
+                        help='comma-separated world sizes, in locations')
+    parser.add_argument('--event-lists', default=','.join(str(length) for length in EVENT_LIST_LENGTHS),
+                        help='comma-separated event list lengths')
+    parser.add_argument('--world-dir', default=os.path.join(tempfile.gettempdir(), 'adventure_benchmarks'),
+                        help='where generated worlds are cached')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmarks.json', help='where to write the results')
+    parser.add_argument('--compare', default=None, help='a previous results file to check for regressions')
+    args = parser.parse_args()
+
+    run = run_benchmarks([int(size) for size in args.scales.split(',') if size],
+                         args.world_dir, [int(length) for length in args.event_lists.split(',') if length],
+                         args.seed, print)
+    with open(args.output, 'w') as f:
+        json.dump(run, f, indent=2)
+    print("Results written to", args.output)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            found = compare(json.load(f), run)
+        for line in found:
+            print("REGRESSION", line)
+        if found:
+            raise SystemExit(1)
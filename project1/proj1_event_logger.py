@@ -22,8 +22,18 @@ This file is Copyright (c) 2025 CSC111 Teaching Team
 """
 
 from __future__ import annotations
+from array import array
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Iterator, Optional
+
+from output import OutputSink, STDOUT
+
+
+# The command strings interned by every EventList, indexed by command id. Logs only hold the commands players can
+# enter, so the same few strings are shared by every log in the process.
+_COMMAND_NAMES: list[str] = []
+# A mapping from each interned command string to its command id
+_COMMAND_IDS: dict[str, int] = {}
 
 
 @dataclass
@@ -37,6 +47,8 @@ class Event:
     - next_command: String command which leads this event to the next event, None if this is the last game event
     - next: Event object representing the next event in the game, or None if this is the last game event
     - prev: Event object representing the previous event in the game, None if this is the first game event
+
+    EventList does not link the events it stores; the events it returns always have next and prev set to None.
     """
 
     id_num: int
@@ -48,20 +60,57 @@ class Event:
 
 class EventList:
     """
-    A linked list of game events.
+    A compact log of game events.
+
+    Rather than keeping one linked Event node per step, the log stores each event's location id and the id of its
+    next command in parallel arrays, so appending, removing the last event and indexing are all O(1). Commands are
+    interned in a table shared by every log, so a command that is used many times is only stored once.
+
+    When a describe function is given, descriptions are not stored at all: each event costs 8 bytes, and its
+    description is looked up from its location id whenever the event is read. Otherwise the description given with
+    each event is kept.
+
+    >>> descriptions = {1: "Starting Room", 2: "Hallway"}
+    >>> event_list = EventList(describe=descriptions.get)
+    >>> event_list.add_location(1)
+    >>> event_list.add_location(2, "go east")
+    >>> event_list[0]
+    Event(id_num=1, description='Starting Room', next_command='go east', next=None, prev=None)
+
+    When a capacity is given, the log is a fixed-size ring buffer: once it is full, adding an event overwrites the
+    oldest one. The capacity is therefore also how many steps can be undone.
 
     Instance Attributes:
-        - first: The first event in the linked list, or None if the list is empty
-        - last: The last event in the linked list, or None if the list is empty
+        - capacity: The maximum number of events kept, or None if the log is unbounded
+        - describe: The function giving the description of the location with a given id, or None if each event's
+          description is stored
+
     Representation Invariants:
-        - self.first is None == self.last is None  # If first is None, last must also be None
+        - self.capacity is None or self.capacity > 0
+        - self.capacity is None or len(self) <= self.capacity
     """
-    first: Optional[Event]
-    last: Optional[Event]
-
-    def __init__(self) -> None:
+    capacity: Optional[int]
+    describe: Optional[Callable[[int], Optional[str]]]
+    # Private Instance Attributes:
+    #   - _ids: The location id of each event, indexed by physical slot
+    #   - _commands: The interned id of each event's next command (-1 for None), indexed by physical slot
+    #   - _descriptions: The description of each event, indexed by physical slot, or None if self.describe is given
+    #   - _start: The physical slot of the oldest event (always 0 when the log is unbounded)
+    #   - _size: The number of events currently in the log
+    _ids: array
+    _commands: array
+    _descriptions: Optional[list[Optional[str]]]
+    _start: int
+    _size: int
+
+    def __init__(self, capacity: Optional[int] = None,
+                 describe: Optional[Callable[[int], Optional[str]]] = None) -> None:
         """
-        Initialize a new empty event list.
+        Initialize a new empty event list, keeping at most capacity events if capacity is given, and looking
+        descriptions up with describe if it is given.
+
+        Preconditions:
+            - capacity is None or capacity > 0
 
         >>> event_list = EventList()
         >>> event_list.first is None
@@ -74,12 +123,88 @@ class EventList:
         True
         """
 
-        self.first = None
-        self.last = None
+        self.capacity = capacity
+        self.describe = describe
+        self._start = 0
+        self._size = 0
+        if capacity is None:
+            self._ids = array('i')
+            self._commands = array('i')
+            self._descriptions = [] if describe is None else None
+        else:
+            self._ids = array('i', [0]) * capacity
+            self._commands = array('i', [-1]) * capacity
+            self._descriptions = [None] * capacity if describe is None else None
+
+    def __len__(self) -> int:
+        """Return the number of events in this event list.
+
+        >>> event_list = EventList()
+        >>> event_list.add_event(Event(1, "Starting Room", None))
+        >>> len(event_list)
+        1
+        """
+        return self._size
+
+    def __getitem__(self, index: int) -> Event:
+        """Return the event at the given index, where 0 is the oldest event still in this list.
+        Negative indices count back from the most recent event.
+
+        The returned Event is a snapshot: changing it does not change this event list.
+
+        >>> event_list = EventList()
+        >>> event_list.add_event(Event(1, "Starting Room", None))
+        >>> event_list.add_event(Event(2, "Hallway", None), "go east")
+        >>> event_list[0]
+        Event(id_num=1, description='Starting Room', next_command='go east', next=None, prev=None)
+        >>> event_list[-1].id_num
+        2
+        """
+
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('event index out of range')
+        slot = self._slot(index)
+        id_num = self._ids[slot]
+        command_id = self._commands[slot]
+        description = self.describe(id_num) if self._descriptions is None else self._descriptions[slot]
+        return Event(id_num, description, _COMMAND_NAMES[command_id] if command_id >= 0 else None)
+
+    def __iter__(self) -> Iterator[Event]:
+        """Return an iterator over the events in this list, in chronological order."""
+        return (self[i] for i in range(self._size))
+
+    @property
+    def first(self) -> Optional[Event]:
+        """The oldest event in this list, or None if the list is empty."""
+        return self[0] if self._size else None
+
+    @property
+    def last(self) -> Optional[Event]:
+        """The most recent event in this list, or None if the list is empty."""
+        return self[self._size - 1] if self._size else None
+
+    def arrivals(self, start: int) -> list[tuple[int, Optional[str]]]:
+        """Return the location id of each event from the given index on, with the command used to reach it (None for
+        the first event in this list), without creating any Events.
 
-    def display_events(self) -> None:
+        >>> event_list = EventList()
+        >>> event_list.add_location(1)
+        >>> event_list.add_location(2, "go east")
+        >>> event_list.arrivals(0)
+        [(1, None), (2, 'go east')]
         """
-        Display all events in chronological order.
+
+        arrivals = []
+        for index in range(max(start, 0), self._size):
+            command_id = self._commands[self._slot(index - 1)] if index > 0 else -1
+            arrivals.append((self._ids[self._slot(index)], _COMMAND_NAMES[command_id] if command_id >= 0 else None))
+        return arrivals
+
+    def display_events(self, output: OutputSink = STDOUT) -> None:
+        """
+        Display all events in chronological order, writing them to the given output sink.
 
         >>> event_list = EventList()
         >>> event_list.display_events()  # Should print nothing since the list is empty
@@ -98,10 +223,20 @@ class EventList:
         Location: 3, Command: None
         """
 
-        curr = self.first
-        while curr:
-            print(f"Location: {curr.id_num}, Command: {curr.next_command}")
-            curr = curr.next
+        for line in self.describe_events():
+            output.write(line)
+
+    def describe_events(self) -> list[str]:
+        """
+        Return the lines display_events prints, one per event, in chronological order.
+
+        >>> event_list = EventList()
+        >>> event_list.add_event(Event(1, "Starting Room", None))
+        >>> event_list.describe_events()
+        ['Location: 1, Command: None']
+        """
+
+        return [f"Location: {event.id_num}, Command: {event.next_command}" for event in self]
 
     def is_empty(self) -> bool:
         """
@@ -121,7 +256,7 @@ class EventList:
         True
         """
 
-        return self.first is None
+        return self._size == 0
 
     def add_event(self, event: Event, command: Optional[str] = None) -> None:
         """
@@ -129,6 +264,8 @@ class EventList:
         The given command is the command which was used to reach this new event, or None if this is the first
         event in the game.
 
+        If this list is at capacity, the oldest event is dropped to make room.
+
         >>> event_list = EventList()
         >>> event_list.get_id_log()  # Should be empty initially
         []
@@ -144,20 +281,63 @@ class EventList:
         >>> event_list.add_event(event2, "go east")  # Adds event with a command
         >>> event_list.get_id_log()
         [1, 2]
+
+        >>> ring = EventList(capacity=2)
+        >>> for i in range(1, 5):
+        ...     ring.add_event(Event(i, "Room", None), "go east")
+        >>> ring.get_id_log()
+        [3, 4]
+        """
+
+        self._append(event.id_num, event.description, event.next_command, command)
+
+    def add_location(self, id_num: int, command: Optional[str] = None) -> None:
+        """
+        Add an event at the location with the given id to the end of this event list, without creating an Event.
+        The given command is the command which was used to reach this new event, or None if this is the first
+        event in the game.
+
+        This is the same as add_event(Event(id_num, None, None), command), and is meant for lists with a describe
+        function.
+
+        >>> event_list = EventList()
+        >>> event_list.add_location(1)
+        >>> event_list.add_location(2, "go east")
+        >>> event_list.describe_events()
+        ['Location: 1, Command: go east', 'Location: 2, Command: None']
         """
 
-        if self.is_empty():
-            # If the list is empty, set this event as the first and last event.
-            self.first = event
-            self.last = event
+        self._append(id_num, None, None, command)
+
+    def _append(self, id_num: int, description: Optional[str], next_command: Optional[str],
+                command: Optional[str]) -> None:
+        """Add an event with the given fields to the end of this event list, reached by the given command."""
+        if self._size > 0 and command is not None:
+            # Update the current last event's next command only if it has not been set already.
+            last_slot = self._slot(self._size - 1)
+            if self._commands[last_slot] < 0:
+                self._commands[last_slot] = _intern(command)
+
+        command_id = _intern(next_command) if next_command is not None else -1
+        if self.capacity is None:
+            self._ids.append(id_num)
+            self._commands.append(command_id)
+            if self._descriptions is not None:
+                self._descriptions.append(description)
+            self._size += 1
+            return
+
+        if self._size == self.capacity:
+            # Overwrite the oldest event
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
         else:
-            # Update the current last event's next pointer and next command only if it has not been set already.
-            assert self.last is not None
-            if self.last.next_command is None:
-                self.last.next_command = command
-            self.last.next = event
-            event.prev = self.last
-            self.last = event
+            slot = self._slot(self._size)
+            self._size += 1
+        self._ids[slot] = id_num
+        self._commands[slot] = command_id
+        if self._descriptions is not None:
+            self._descriptions[slot] = description
 
     def remove_last_event(self) -> None:
         """
@@ -182,24 +362,21 @@ class EventList:
         []
         """
 
-        if self.is_empty():
+        if self._size == 0:
             return
 
-        if self.first == self.last:
-            # If there's only one event, remove it
-            self.first = None
-            self.last = None
-            return
+        if self.capacity is None:
+            self._ids.pop()
+            self._commands.pop()
+            if self._descriptions is not None:
+                self._descriptions.pop()
+        elif self._descriptions is not None:
+            self._descriptions[self._slot(self._size - 1)] = None
+        self._size -= 1
 
-        # Traverse the list to find the second-to-last event
-        curr = self.first
-        while curr.next is not self.last:
-            curr = curr.next
-
-        # Update the last event
-        curr.next = None
-        curr.next_command = None  # Remove the command linking to the removed event
-        self.last = curr
+        if self._size > 0:
+            # Remove the command linking to the removed event
+            self._commands[self._slot(self._size - 1)] = -1
 
     def get_id_log(self) -> list[int]:
         """
@@ -221,14 +398,75 @@ class EventList:
         [1, 2, 3]
         """
 
-        id_log = []
-        curr = self.first
+        if self.capacity is None or self._start + self._size <= self.capacity:
+            return self._ids[self._start:self._start + self._size].tolist()
+        return (self._ids[self._start:] + self._ids[:self._start + self._size - self.capacity]).tolist()
+
+    def get_raw_log(self) -> tuple[list[int], list[int], list[str]]:
+        """
+        Return the location id of each event in this list, the index of each event's next command in the returned
+        list of commands (-1 for None), and the list of the commands used by these events, without creating any
+        Events.
+
+        >>> event_list = EventList()
+        >>> event_list.add_location(1)
+        >>> event_list.add_location(2, "go east")
+        >>> event_list.add_location(1, "go west")
+        >>> event_list.get_raw_log()
+        ([1, 2, 1], [0, 1, -1], ['go east', 'go west'])
+        """
 
-        while curr:
-            id_log.append(curr.id_num)
-            curr = curr.next
+        local_ids: dict[int, int] = {}
+        commands = []
+        command_ids = []
+        for index in range(self._size):
+            command_id = self._commands[self._slot(index)]
+            if command_id >= 0:
+                local_id = local_ids.get(command_id)
+                if local_id is None:
+                    local_id = local_ids[command_id] = len(commands)
+                    commands.append(_COMMAND_NAMES[command_id])
+                command_id = local_id
+            command_ids.append(command_id)
+        return self.get_id_log(), command_ids, commands
+
+    @classmethod
+    def from_raw_log(cls, ids: list[int], command_ids: list[int], commands: list[str],
+                     capacity: Optional[int] = None,
+                     describe: Optional[Callable[[int], Optional[str]]] = None) -> EventList:
+        """
+        Return a new event list holding the events given in the form returned by get_raw_log, keeping at most
+        capacity events if capacity is given, and looking descriptions up with describe if it is given.
+
+        Preconditions:
+            - len(ids) == len(command_ids)
+            - all(-1 <= command_id < len(commands) for command_id in command_ids)
+
+        >>> event_list = EventList.from_raw_log([1, 2], [0, -1], ['go east'])
+        >>> event_list.describe_events()
+        ['Location: 1, Command: go east', 'Location: 2, Command: None']
+        """
 
-        return id_log
+        log = cls(capacity, describe)
+        for id_num, command_id in zip(ids, command_ids):
+            log._append(id_num, None, commands[command_id] if command_id >= 0 else None, None)
+        return log
+
+    def _slot(self, index: int) -> int:
+        """Return the physical array slot holding the event at the given logical index."""
+        if self.capacity is None:
+            return index
+        return (self._start + index) % self.capacity
+
+
+def _intern(command: str) -> int:
+    """Return the id of the given command, interning it if it has not been seen before."""
+    command_id = _COMMAND_IDS.get(command)
+    if command_id is None:
+        command_id = len(_COMMAND_NAMES)
+        _COMMAND_NAMES.append(command)
+        _COMMAND_IDS[command] = command_id
+    return command_id
 
 
 if __name__ == "__main__":
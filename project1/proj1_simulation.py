@@ -9,6 +9,12 @@ playthrough of the game. Please consult the project handout for instructions and
 You can copy/paste your code from the ex1_simulation file into this one, and modify it as needed
 to work with your game.
 
+The doctests in this module turn the world cache (see world_cache.py) off, so that running them
+does not write to the user's cache directory:
+
+    >>> import os
+    >>> os.environ['ADVENTURE_WORLD_CACHE'] = ''
+
 Copyright and Usage Information
 ===============================
 
@@ -21,9 +27,10 @@ please consult our Course Syllabus.
 This file is Copyright (c) 2025 CSC111 Teaching Team
 """
 from __future__ import annotations
-from proj1_event_logger import Event, EventList
+from proj1_event_logger import EventList
 from adventure import AdventureGame
 from game_entities import Location
+from output import OutputSink, STDOUT
 
 
 class AdventureGameSimulation:
@@ -38,21 +45,22 @@ class AdventureGameSimulation:
     def __init__(self, game_data_file: str, initial_location_id: int, commands: list[str]) -> None:
         """Initialize a new game simulation based on the given game data, that runs through the given commands.
         """
-        self._events = EventList()
         self._game = AdventureGame(game_data_file, initial_location_id)
 
-        # Add first event (initial location, no previous command)
-        initial_location = self._game.get_location()
-        first_event = Event(initial_location.id_num, initial_location.long_description, None)
-        self._events.add_event(first_event)
+        # The game's log already holds the first event (initial location, no previous command)
+        self._events = self._game.log
 
         # Generate the remaining events
-        self.generate_events(commands, initial_location)
+        self.generate_events(commands, self._game.get_location())
 
     def generate_events(self, commands: list[str], current_location: Location) -> None:
         """
         Generate all events in this simulation.
 
+        Every command is run through AdventureGame.step, so taking, using and retrieving items are simulated exactly
+        as in the real game; an event is added each time the player moves. current_location must be the game's
+        current location.
+
         >>> sim = AdventureGameSimulation('game_data.json', 1, [])
         >>> sim._events.get_id_log()  # No commands given, should only contain initial location
         [1]
@@ -69,17 +77,9 @@ class AdventureGameSimulation:
         'go east'
         """
 
+        assert current_location.id_num == self._game.current_location_id
         for command in commands:
-            if command in current_location.available_commands:
-                next_location_id = current_location.available_commands[command]
-                next_location = self._game.get_location(next_location_id)
-
-                # Create new event and add to the event list
-                new_event = Event(next_location.id_num, next_location.long_description, command)
-                self._events.add_event(new_event, command)
-
-                # Update current location
-                current_location = next_location
+            self._game.step(command)
 
     def get_id_log(self) -> list[int]:
         """
@@ -93,9 +93,9 @@ class AdventureGameSimulation:
 
         return self._events.get_id_log()
 
-    def run(self) -> None:
+    def run(self, output: OutputSink = STDOUT) -> None:
         """
-        Run the game simulation and log location descriptions.
+        Run the game simulation and log location descriptions, writing them to the given output sink.
 
         >>> sim = AdventureGameSimulation('game_data.json', 1, ["go east","go east"])
         >>> sim.run()
@@ -108,15 +108,13 @@ class AdventureGameSimulation:
 
         # Note: We have completed this method for you. Do NOT modify it for ex1.
 
-        current_event = self._events.first  # Start from the first event in the list
-
-        while current_event:
-            print(current_event.description)
-            if current_event is not self._events.last:
-                print("You choose:", current_event.next_command)
+        last_index = len(self._events) - 1
 
-            # Move to the next event in the linked list
-            current_event = current_event.next
+        for i, current_event in enumerate(self._events):
+            output.write(str(current_event.description))
+            if i != last_index:
+                output.write(f"You choose: {current_event.next_command}")
+        output.flush()
 
 
 if __name__ == "__main__":
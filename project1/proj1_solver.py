@@ -0,0 +1,415 @@
+"""CSC111 Project 1: Text Adventure Game - Walkthrough Solver
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains a solver that finds the shortest winning walkthrough of a world, or
+shows that the world cannot be won before the player runs out of moves.
+
+Every state of a game that matters for winning (the player's location, which items the player
+holds, which locations are locked, whether the CD player is on, whether the USB has been ejected,
+whether the game is waiting for a password, and the score) is packed into a single integer. The
+solver runs a breadth-first search over these integers, so the first winning state it reaches is
+one with the fewest moves, and a transposition table of the states already seen (which also
+records how each was reached) keeps it from searching any state twice. A state is also skipped
+when a state that differs only by holding more items has already been reached in no more moves.
+
+Movement is applied directly to the packed integers. Every other command (taking and using items,
+and each location's special commands) is run by a real AdventureGame, so the solver always
+follows the game's actual rules. The solver relies on a few properties of those rules, which let
+it record only which kinds of item the player holds rather than where every item is:
+
+    - items are never used up, put down or destroyed, so holding one of an item is as good as
+      holding several, and an item is never worth taking twice
+    - holding an item never stops the player from winning, and what a command does never depends
+      on which other items the player holds, so the outcome of each command is worked out once per
+      state of everything else and reused
+    - the score never goes down
+
+Run this module as a script to print a walkthrough in the format read by proj1_batch:
+
+    python proj1_solver.py game_data.json --start 1
+
+The doctests in this module turn the world cache (see world_cache.py) off, so that running them
+does not write to the user's cache directory:
+
+    >>> import os
+    >>> os.environ['ADVENTURE_WORLD_CACHE'] = ''
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import argparse
+import json
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from adventure import AdventureGame, GameState, USB_PASSWORD, WINNING_SCORE, WIN_LOCATION_ID
+from game_entities import ItemBag
+from output import NullSink
+from proj1_simulation import AdventureGameSimulation
+from world_template import SessionLocations
+
+
+class SolverError(Exception):
+    """Raised when a command changes the game in a way the solver cannot represent."""
+
+
+@dataclass
+class Solution:
+    """The result of a search for a winning walkthrough.
+
+    Instance Attributes:
+        - commands: The shortest winning list of commands, or None if the world cannot be won in time
+        - states: The number of distinct states searched
+        - elapsed: The number of seconds the search took
+    """
+    commands: Optional[list[str]]
+    states: int
+    elapsed: float
+
+
+class WalkthroughSolver:
+    """A breadth-first solver for one world and starting location.
+
+    A state is packed into an integer, from the lowest bits up, as:
+
+        the index of the player's location (location_bits bits)
+        whether the CD player is on, the USB has been ejected and the game is waiting for a password (1 bit each)
+        the score (score_bits bits)
+        whether each location that starts locked is still locked (1 bit each)
+        whether the player holds each kind of item that starts at a location (1 bit each)
+
+    >>> solver = WalkthroughSolver('game_data.json', 1)
+    >>> solver.location_of(solver.initial_state)
+    1
+    >>> walkthrough = solver.solve().commands
+    >>> walkthrough[:3]
+    ['go east', 'go east', 'go south']
+    >>> AdventureGameSimulation('game_data.json', 1, walkthrough)._game.won
+    True
+
+    Instance Attributes:
+        - initial_state: The packed starting state
+        - max_moves: The number of commands the player can enter before running out of moves
+    """
+    initial_state: int
+    max_moves: int
+    # Private Instance Attributes:
+    #   - _game: The game used to run commands other than movement
+    #   - _locations: The locations of _game
+    #   - _ids: The location ID at each location index
+    #   - _index: A mapping from each location ID to its index
+    #   - _moves: The (command, destination index, lock bit) of each movement at each location index. The lock
+    #             bit is the state bit that is set while the destination is locked, or 0 if it is never locked.
+    #   - _specials: The commands other than movement and taking items that are worth trying at each location index
+    #   - _names: The name of each kind of item, indexed by its bit in the held-items field
+    #   - _name_bits: A mapping from each item name to its bit in the held-items field
+    #   - _items_at: The items at each location index when the game starts, as (name, quantity) pairs
+    #   - _locks: The (location ID, state bit) of each location that starts locked
+    #   - _lock_bits: A mapping from the ID of each location that starts locked to its state bit
+    #   - _lock_mask: The mask of all lock bits
+    #   - _applied_locks: The lock bits of the locations currently locked in _game
+    #   - _changed_locks: The IDs of the locations whose lock has changed in _game since this was last cleared
+    #   - _flag_shift, _score_shift, _lock_shift, _held_shift: The position of the lowest bit of each field
+    #   - _location_mask, _score_mask: Masks for the location and score fields
+    #   - _outcomes: The outcome of each command run so far, keyed by the command and the state without its
+    #                held-items field. See _run.
+    _game: AdventureGame
+    _locations: SessionLocations
+    _ids: list[int]
+    _index: dict[int, int]
+    _moves: list[list[tuple[str, int, int]]]
+    _specials: list[list[str]]
+    _names: list[str]
+    _name_bits: dict[str, int]
+    _items_at: list[tuple[tuple[str, int], ...]]
+    _locks: list[tuple[int, int]]
+    _lock_bits: dict[int, int]
+    _lock_mask: int
+    _applied_locks: int
+    _changed_locks: set[int]
+    _flag_shift: int
+    _score_shift: int
+    _lock_shift: int
+    _held_shift: int
+    _location_mask: int
+    _score_mask: int
+    _outcomes: dict[tuple[str, int], Optional[tuple[int, int, bool]]]
+
+    _CD_PLAYER_ON = 0
+    _USB_EJECTED = 1
+    _AWAITING_PASSWORD = 2
+
+    def __init__(self, game_data_file: str, initial_location_id: int) -> None:
+        """Initialize a solver for games in the given world that start at the given location."""
+        # The solver sets the game's state itself before every command, so there is nothing to undo
+        self._game = AdventureGame(game_data_file, initial_location_id, undo_depth=0)
+        self._game.output = NullSink()
+        if not isinstance(self._game.locations, SessionLocations):
+            raise SolverError('the solver needs a game backed by a shared world template')
+        self._locations = self._game.locations
+        template = self._locations.template
+        self.max_moves = GameState().max_moves - 1  # See AdventureGame.moves_left
+
+        self._ids = list(template.locations)
+        self._index = {id_num: index for index, id_num in enumerate(self._ids)}
+        location_bits = max(1, (len(self._ids) - 1).bit_length())
+        self._location_mask = (1 << location_bits) - 1
+        self._flag_shift = location_bits
+        self._score_shift = location_bits + 3
+        score_bits = max(1, WINNING_SCORE.bit_length())
+        self._score_mask = (1 << score_bits) - 1
+        self._lock_shift = self._score_shift + score_bits
+
+        locked_ids = [id_num for id_num, location in template.locations.items() if location.locked]
+        self._locks = [(id_num, 1 << (self._lock_shift + i)) for i, id_num in enumerate(locked_ids)]
+        self._lock_bits = dict(self._locks)
+        self._lock_mask = sum(bit for _, bit in self._locks)
+        self._applied_locks = self._lock_mask
+        self._changed_locks = set()
+        self._locations.add_listener(self._location_changed)
+        self._held_shift = self._lock_shift + len(locked_ids)
+        self._outcomes = {}
+
+        self._moves = []
+        self._specials = []
+        self._names = []
+        self._name_bits = {}
+        self._items_at = []
+        for id_num in self._ids:
+            location = template.locations[id_num]
+            self._moves.append([(command, self._index[target], self._lock_bits.get(target, 0))
+                                for command, target in location.available_commands.items()
+                                if target in self._index])
+            self._specials.append([command for command in location.special_commands
+                                   if not command.startswith('take ')])
+            self._items_at.append(location.items)
+            for name, _ in location.items:
+                if name not in self._name_bits:
+                    self._name_bits[name] = 1 << len(self._names)
+                    self._names.append(name)
+
+        self.initial_state = self._index[initial_location_id] | self._applied_locks
+
+    def location_of(self, state: int) -> int:
+        """Return the ID of the player's location in the given state."""
+        return self._ids[state & self._location_mask]
+
+    def score_of(self, state: int) -> int:
+        """Return the score in the given state."""
+        return (state >> self._score_shift) & self._score_mask
+
+    def _flag(self, state: int, flag: int) -> bool:
+        """Return whether the given flag is set in the given state."""
+        return bool(state >> (self._flag_shift + flag) & 1)
+
+    def _inventory(self, state: int) -> list[str]:
+        """Return the names of the items the player holds in the given state."""
+        names = []
+        held = state >> self._held_shift
+        while held:
+            lowest = held & -held
+            names.append(self._names[lowest.bit_length() - 1])
+            held ^= lowest
+        return names
+
+    def _actions(self, state: int) -> list[str]:
+        """Return the commands other than movement worth trying in the given state."""
+        if self._flag(state, self._AWAITING_PASSWORD):
+            return [USB_PASSWORD]
+        index = state & self._location_mask
+        held = state >> self._held_shift
+        actions = ['take ' + name.lower() for name, _ in self._items_at[index] if not held & self._name_bits[name]]
+        actions.extend('use ' + name.lower() for name in self._inventory(state))
+        actions.extend(self._specials[index])
+        return actions
+
+    def _run(self, state: int, command: str) -> Optional[tuple[int, bool]]:
+        """Return the state resulting from the given command in the given state, and whether the player has won.
+        Return None if the command is invalid or leaves the game unwinnable."""
+        rest = state & ((1 << self._held_shift) - 1)
+        key = (command, rest)
+        if key in self._outcomes:
+            outcome = self._outcomes[key]
+        else:
+            outcome = self._play(state, command)
+            self._outcomes[key] = outcome
+        if outcome is None:
+            return None
+        new_rest, taken, won = outcome
+        return new_rest | (((state >> self._held_shift) | taken) << self._held_shift), won
+
+    def _play(self, state: int, command: str) -> Optional[tuple[int, int, bool]]:
+        """Run the given command in the given state with the game. Return the resulting state without its
+        held-items field, the held-items bits of the items taken, and whether the player has won, or None if the
+        command is invalid or leaves the game unwinnable."""
+        game = self._game
+        index = state & self._location_mask
+        id_num = self._ids[index]
+        game.current_location_id = id_num
+        game.flags = {}
+        game.cd_player_on = self._flag(state, self._CD_PLAYER_ON)
+        game.usb_ejected = self._flag(state, self._USB_EJECTED)
+        game.awaiting_password = self._flag(state, self._AWAITING_PASSWORD)
+        game.game_state.score = self.score_of(state)
+        game.game_state.moves = 0
+        game.game_state.ongoing = True
+        game.won = False
+        game.lost = False
+        game.inventory = self._inventory(state)
+        self._locations[id_num].state.items = ItemBag.from_snapshot(self._items_at[index])
+        different_locks = (state ^ self._applied_locks) & self._lock_mask
+        if different_locks:
+            for lock_id, bit in self._locks:
+                if different_locks & bit:
+                    self._locations[lock_id].state.locked = bool(state & bit)
+        self._applied_locks = state & self._lock_mask
+        self._changed_locks.clear()
+
+        result = game.step(command)
+        for lock_id in self._changed_locks:
+            if lock_id not in self._lock_bits:
+                raise SolverError(f'{command!r} locked location {lock_id}, which does not start locked')
+            if self._locations[lock_id].state.locked:
+                self._applied_locks |= self._lock_bits[lock_id]
+            else:
+                self._applied_locks &= ~self._lock_bits[lock_id]
+
+        if not result.valid or game.game_state.score > WINNING_SCORE or \
+                (not game.game_state.ongoing and not game.won):
+            return None
+
+        for name, value in game.flags.items():
+            if value and name not in {'cd_player_on', 'usb_ejected'}:
+                raise SolverError(f'{command!r} set the flag {name!r}, which the solver does not track')
+        new_index = self._index.get(game.current_location_id)
+        if new_index is None:
+            return None
+        new_state = new_index | (game.game_state.score << self._score_shift) | self._applied_locks
+        for flag, value in ((self._CD_PLAYER_ON, game.cd_player_on), (self._USB_EJECTED, game.usb_ejected),
+                            (self._AWAITING_PASSWORD, game.awaiting_password)):
+            if value:
+                new_state |= 1 << (self._flag_shift + flag)
+
+        held = 0
+        for name in game.inventory:
+            bit = self._name_bits.get(name)
+            if bit is None:
+                raise SolverError(f'{command!r} gave the player {name!r}, which does not start at any location')
+            held |= bit
+        before = state >> self._held_shift
+        if held & before != before:
+            raise SolverError(f'{command!r} took an item away from the player')
+        return new_state, held & ~before, game.won
+
+    def solve(self) -> Solution:
+        """Return the shortest winning walkthrough from the initial state, searching breadth first."""
+        start = time.perf_counter()
+        parents: dict[int, tuple[int, str]] = {self.initial_state: (-1, '')}
+        # The held-items fields of the states reached so far, keyed by the rest of each state
+        holdings: dict[int, list[int]] = {}
+        self._dominated(self.initial_state, holdings)
+        frontier = [self.initial_state]
+        location_mask = self._location_mask
+
+        for _ in range(self.max_moves):
+            next_frontier = []
+            for state in frontier:
+                index = state & location_mask
+                score = self.score_of(state)
+                if not self._flag(state, self._AWAITING_PASSWORD):
+                    for command, destination, lock_bit in self._moves[index]:
+                        if state & lock_bit:
+                            continue  # Moving into a locked location changes nothing
+                        new_state = (state & ~location_mask) | destination
+                        if new_state in parents or self._dominated(new_state, holdings):
+                            continue
+                        parents[new_state] = (state, command)
+                        if score == WINNING_SCORE and self._ids[destination] == WIN_LOCATION_ID:
+                            return Solution(_walk_back(parents, new_state), len(parents), time.perf_counter() - start)
+                        next_frontier.append(new_state)
+
+                for command in self._actions(state):
+                    outcome = self._run(state, command)
+                    if outcome is None or outcome[0] in parents or self._dominated(outcome[0], holdings):
+                        continue
+                    new_state, won = outcome
+                    parents[new_state] = (state, command)
+                    if won:
+                        return Solution(_walk_back(parents, new_state), len(parents), time.perf_counter() - start)
+                    next_frontier.append(new_state)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+        return Solution(None, len(parents), time.perf_counter() - start)
+
+    def _location_changed(self, id_num: int, field: Optional[str]) -> None:
+        """Record that the given field of the location with the given ID has changed in _game."""
+        if field == 'locked':
+            self._changed_locks.add(id_num)
+
+    def _dominated(self, state: int, holdings: dict[int, list[int]]) -> bool:
+        """Return whether a state that differs from the given state only by holding the same items or more is
+        in holdings. If not, add the given state to holdings."""
+        rest = state & ((1 << self._held_shift) - 1)
+        held = state >> self._held_shift
+        seen = holdings.setdefault(rest, [])
+        for other in seen:
+            if other & held == held:
+                return True
+        seen.append(held)
+        return False
+
+
+def _walk_back(parents: dict[int, tuple[int, str]], state: int) -> list[str]:
+    """Return the commands leading from the initial state to the given state in the transposition table."""
+    commands = []
+    parent, command = parents[state]
+    while parent != -1:
+        commands.append(command)
+        parent, command = parents[parent]
+    commands.reverse()
+    return commands
+
+
+def solve(game_data_file: str, initial_location_id: int = 1) -> Optional[list[str]]:
+    """Return the shortest winning walkthrough of the given world from the given location, or None if the world
+    cannot be won within the move limit."""
+    return WalkthroughSolver(game_data_file, initial_location_id).solve().commands
+
+
+if __name__ == "__main__":
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (Delete the "#" and space before each line.)
+    # IMPORTANT: keep this code indented inside the "if __name__ == '__main__'" block
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'disable': ['R1705', 'E9998', 'E9999']
+    # })
+    parser = argparse.ArgumentParser(description='Find the shortest winning walkthrough of a world.')
+    parser.add_argument('game_data', help='the game data JSON file or compiled world file')
+    parser.add_argument('--start', type=int, default=1, help='the ID of the starting location')
+    args = parser.parse_args()
+
+    solution = WalkthroughSolver(args.game_data, args.start).solve()
+    if solution.commands is None:
+        print(f"No win within the move limit ({solution.states} states searched in {solution.elapsed:.2f}s)")
+        raise SystemExit(1)
+    print(json.dumps({'name': 'solver', 'commands': solution.commands,
+                      'expected_log': AdventureGameSimulation(args.game_data, args.start,
+                                                              solution.commands).get_id_log(),
+                      'initial_location': args.start}))
+    print(f"{len(solution.commands)} moves, {solution.states} states searched in {solution.elapsed:.2f}s")
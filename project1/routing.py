@@ -0,0 +1,302 @@
+"""CSC111 Project 1: Text Adventure Game - Routing
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the routing index that finds the shortest sequence of movement
+commands between two locations.
+
+The movement commands of a world never change, so they are read into a RouteGraph once per
+world and shared by every game. A paged world (see paged_world.py) or compact world (see
+compact_world.py) is not read in at all: its movement commands are read straight from the world
+file or the store's exit arrays whenever a search reaches a location, so that finding a route
+never decodes the locations it passes through. Each game has its own RoutingIndex, since locked locations
+differ between games. The index runs a breadth-first search from a location the first time a
+route from it is needed, and keeps the resulting tree of shortest routes for later requests, so
+that a route is found by walking the tree back from its destination. Only the most recently
+used trees are kept.
+
+When a location is locked or unlocked, only the trees whose routes could change are dropped: a
+newly locked location invalidates the trees that pass through it, and a newly unlocked location
+invalidates the trees that were stopped by it.
+
+The doctests in this module turn the world cache (see world_cache.py) off, so that running them
+does not write to the user's cache directory:
+
+    >>> import os
+    >>> os.environ['ADVENTURE_WORLD_CACHE'] = ''
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+from collections import OrderedDict, deque
+from typing import Callable, Iterator, Mapping, Optional, Union
+from weakref import WeakKeyDictionary
+
+from compact_world import CompactLocations
+from paged_world import PagedLocations
+from world_template import SessionLocations, WorldTemplate
+
+# The number of search trees a RoutingIndex keeps by default
+DEFAULT_CAPACITY = 128
+
+
+class RouteGraph:
+    """The movement commands and location names of a world, shared by every game played in it.
+
+    Instance Attributes:
+        - edges: A mapping from each location ID to its (command, destination ID) pairs
+        - names: A mapping from each case-folded location name to the IDs of the locations with that name
+    """
+    edges: Mapping[int, tuple[tuple[str, int], ...]]
+    names: dict[str, list[int]]
+
+    def __init__(self, template: WorldTemplate) -> None:
+        """Initialize the graph of the given world.
+
+        >>> import tempfile
+        >>> from paged_world import paged_template
+        >>> from world_cache import warm
+        >>> template = paged_template(warm('game_data.json', tempfile.mkdtemp()))
+        >>> graph = RouteGraph(template)
+        >>> graph.edges[1], graph.find_names('your room')
+        ((('go east', 20),), [1])
+        >>> template.locations.loads
+        0
+        """
+        self.names = {}
+        if isinstance(template.locations, (PagedLocations, CompactLocations)):
+            self.edges = _ExitTable(template.locations)
+            for id_num, name in template.locations.names():
+                self.names.setdefault(name.casefold(), []).append(id_num)
+            return
+        self.edges = {}
+        for id_num, location in template.locations.items():
+            self.edges[id_num] = tuple(location.available_commands.items())
+            self.names.setdefault(location.name.casefold(), []).append(id_num)
+
+    def find_names(self, name: str) -> list[int]:
+        """Return the IDs of the locations called name, ignoring case. If there are none, return the IDs of the
+        locations whose names contain name instead.
+
+        >>> from world_template import shared_template
+        >>> graph = route_graph(shared_template('game_data.json'))
+        >>> graph.find_names('college st. w')
+        [57, 61]
+        >>> graph.find_names('bahen')
+        [8]
+        >>> graph.find_names('robarts st')
+        [50, 51, 52, 53, 54]
+        """
+        folded = name.strip().casefold()
+        exact = self.names.get(folded)
+        if exact is not None:
+            return list(exact)
+        if not folded:
+            return []
+        return [id_num for location_name, ids in self.names.items() if folded in location_name for id_num in ids]
+
+
+class _ExitTable(Mapping):
+    """A read-only mapping from location ID to (command, destination ID) pairs, read from the world file of a paged
+    world or the exit arrays of a compact world each time they are looked up."""
+    # Private Instance Attributes:
+    #   - _locations: The paged or compact locations of the world
+    _locations: Union[PagedLocations, CompactLocations]
+
+    def __init__(self, locations: Union[PagedLocations, CompactLocations]) -> None:
+        """Initialize a new mapping over the given paged or compact locations."""
+        self._locations = locations
+
+    def __getitem__(self, id_num: int) -> tuple[tuple[str, int], ...]:
+        """Return the movement commands of the location with the given ID."""
+        return self._locations.exits(id_num)
+
+    def __iter__(self) -> Iterator[int]:
+        """Return an iterator over all location IDs."""
+        return iter(self._locations)
+
+    def __len__(self) -> int:
+        """Return the number of locations."""
+        return len(self._locations)
+
+
+# The graph of each world loaded so far
+_GRAPHS: WeakKeyDictionary[WorldTemplate, RouteGraph] = WeakKeyDictionary()
+
+
+def route_graph(template: WorldTemplate) -> RouteGraph:
+    """Return the route graph of the given world, building it only the first time it is needed."""
+    graph = _GRAPHS.get(template)
+    if graph is None:
+        graph = RouteGraph(template)
+        _GRAPHS[template] = graph
+    return graph
+
+
+class _RouteTree:
+    """The shortest routes from one location to every location reachable from it.
+
+    Instance Attributes:
+        - parents: A mapping from each reachable location ID to the ID it is reached from, the command that reaches
+          it and its distance from the source, in breadth-first order. The source maps to (None, None, 0).
+        - blocked: The IDs of the locked locations the search could not enter
+    """
+    parents: dict[int, tuple[Optional[int], Optional[str], int]]
+    blocked: set[int]
+
+    def __init__(self) -> None:
+        """Initialize a new empty tree."""
+        self.parents = {}
+        self.blocked = set()
+
+
+class RoutingIndex:
+    """The shortest routes between the locations of one game, avoiding locked locations.
+
+    The player may start a route in a locked location (they are already inside it), but a route never enters one.
+
+    >>> from world_template import shared_template
+    >>> session = shared_template('game_data.json').new_session()
+    >>> index = RoutingIndex(session)
+    >>> index.route(1, 21)
+    ['go east', 'go east', 'go south']
+    >>> index.route(1, 4) is None  # Hasan's room starts locked
+    True
+    >>> session[4].state.locked = False
+    >>> index.route(1, 4)
+    ['go east', 'go south']
+    >>> index.route(1, 1)
+    []
+
+    Instance Attributes:
+        - capacity: The maximum number of search trees kept
+    """
+    capacity: int
+    # Private Instance Attributes:
+    #   - _locations: The locations of the game
+    #   - _graph: The movement commands of the game's world
+    #   - _edges: The movement commands of locations that have been assigned or deleted since the game started,
+    #             which replace those in _graph
+    #   - _trees: The search trees kept, keyed by source location ID, from least to most recently used
+    _locations: SessionLocations
+    _graph: RouteGraph
+    _edges: dict[int, tuple[tuple[str, int], ...]]
+    _trees: OrderedDict[int, _RouteTree]
+
+    def __init__(self, locations: SessionLocations, capacity: int = DEFAULT_CAPACITY) -> None:
+        """Initialize a new routing index over the given locations, keeping at most capacity search trees.
+
+        Preconditions:
+            - capacity > 0
+        """
+        self.capacity = capacity
+        self._locations = locations
+        self._graph = route_graph(locations.template)
+        self._edges = {}
+        self._trees = OrderedDict()
+        locations.add_listener(self._location_changed)
+
+    @property
+    def graph(self) -> RouteGraph:
+        """The movement commands and location names of this game's world."""
+        return self._graph
+
+    def route(self, source: int, destination: int) -> Optional[list[str]]:
+        """Return the shortest list of commands leading from source to destination, or None if destination cannot be
+        reached from source."""
+        parents = self._tree(source).parents
+        if destination not in parents:
+            return None
+        commands = []
+        parent, command, _ = parents[destination]
+        while parent is not None:
+            commands.append(command)
+            parent, command, _ = parents[parent]
+        commands.reverse()
+        return commands
+
+    def distance(self, source: int, destination: int) -> Optional[int]:
+        """Return the number of moves from source to destination, or None if destination cannot be reached."""
+        entry = self._tree(source).parents.get(destination)
+        return entry[2] if entry is not None else None
+
+    def nearest(self, source: int, is_wanted: Callable[[int], bool]) -> Optional[int]:
+        """Return the ID of the closest location to source (including source itself) for which is_wanted returns
+        True, or None if no such location can be reached. Ties are broken by search order.
+
+        >>> from world_template import shared_template
+        >>> index = RoutingIndex(shared_template('game_data.json').new_session())
+        >>> index.nearest(1, lambda id_num: id_num in {57, 61})
+        57
+        """
+        for id_num in self._tree(source).parents:
+            if is_wanted(id_num):
+                return id_num
+        return None
+
+    def reachable(self, source: int) -> Iterator[int]:
+        """Return an iterator over the IDs of the locations reachable from source, closest first."""
+        return iter(list(self._tree(source).parents))
+
+    def _tree(self, source: int) -> _RouteTree:
+        """Return the search tree from source, searching only if it is not already kept."""
+        tree = self._trees.get(source)
+        if tree is not None:
+            self._trees.move_to_end(source)
+            return tree
+
+        tree = _RouteTree()
+        parents = tree.parents
+        parents[source] = (None, None, 0)
+        queue = deque([source])
+        locations = self._locations
+        while queue:
+            current = queue.popleft()
+            distance = parents[current][2] + 1
+            for command, destination in self._edges_from(current):
+                if destination in parents or destination in tree.blocked:
+                    continue
+                if destination not in locations:
+                    continue
+                if locations.is_locked(destination):
+                    tree.blocked.add(destination)
+                    continue
+                parents[destination] = (current, command, distance)
+                queue.append(destination)
+
+        self._trees[source] = tree
+        if len(self._trees) > self.capacity:
+            self._trees.popitem(last=False)
+        return tree
+
+    def _edges_from(self, id_num: int) -> tuple[tuple[str, int], ...]:
+        """Return the (command, destination ID) pairs of the location with the given ID."""
+        edges = self._edges.get(id_num)
+        if edges is None:
+            edges = self._graph.edges.get(id_num, ())
+        return edges
+
+    def _location_changed(self, id_num: int, field: Optional[str]) -> None:
+        """Drop the search trees whose routes may have changed now that the given field of the given location has
+        changed. A field of None means the location was assigned or deleted."""
+        if field == 'visited':
+            return
+        if field is None:
+            location = self._locations.get(id_num)
+            self._edges[id_num] = tuple(location.available_commands.items()) if location is not None else ()
+            self._trees.clear()
+            return
+        for source in [source for source, tree in self._trees.items()
+                       if id_num in tree.parents or id_num in tree.blocked]:
+            del self._trees[source]
+
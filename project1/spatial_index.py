@@ -0,0 +1,131 @@
+"""CSC111 Project 1: Text Adventure Game - Spatial Index
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the spatial index that finds the locations at or near a position on
+the map.
+
+Every location with a grid_position is placed in a grid hash: the map is divided into square
+cells of CELL_SIZE rows by CELL_SIZE columns, and each occupied cell keeps the locations inside
+it. A query only visits the cells that overlap it, so it takes time proportional to the area
+asked about and the number of locations found, however large the world is. Grid positions never
+change during a game, so the index is built once per world and shared by every game.
+
+The doctests in this module turn the world cache (see world_cache.py) off, so that running them
+does not write to the user's cache directory:
+
+    >>> import os
+    >>> os.environ['ADVENTURE_WORLD_CACHE'] = ''
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+from typing import Iterable, Optional
+from weakref import WeakKeyDictionary
+
+from compact_world import CompactLocations
+from paged_world import PagedLocations
+from world_template import WorldTemplate
+
+# The number of rows and columns covered by each cell of the grid hash
+CELL_SIZE = 16
+
+
+class SpatialIndex:
+    """The locations of a world, indexed by their grid positions.
+
+    >>> index = SpatialIndex([(1, (0, 0)), (20, (0, 1)), (4, (1, 1)), (60, (5, 2)), (61, (5, 2))])
+    >>> index.at(5, 2)
+    [60, 61]
+    >>> sorted(index.rectangle(0, 0, 1, 1))
+    [1, 4, 20]
+    >>> sorted(index.near(0, 0, 1))
+    [1, 4, 20]
+    >>> index.position(4)
+    (1, 1)
+
+    Instance Attributes:
+        - cell_size: The number of rows and columns covered by each cell
+    """
+    cell_size: int
+    # Private Instance Attributes:
+    #   - _cells: The (row, column, location ID) of every location in each occupied cell, keyed by the cell's
+    #             (row, column) in the grid hash
+    #   - _positions: The grid position of every indexed location, keyed by location ID
+    _cells: dict[tuple[int, int], list[tuple[int, int, int]]]
+    _positions: dict[int, tuple[int, int]]
+
+    def __init__(self, positions: Iterable[tuple[int, tuple[int, int]]], cell_size: int = CELL_SIZE) -> None:
+        """Initialize a new index of the given (location ID, grid position) pairs.
+
+        Preconditions:
+            - cell_size > 0
+        """
+        self.cell_size = cell_size
+        self._cells = {}
+        self._positions = {}
+        for id_num, (row, column) in positions:
+            self._positions[id_num] = (row, column)
+            self._cells.setdefault((row // cell_size, column // cell_size), []).append((row, column, id_num))
+
+    def __len__(self) -> int:
+        """Return the number of locations in this index."""
+        return len(self._positions)
+
+    def position(self, id_num: int) -> Optional[tuple[int, int]]:
+        """Return the grid position of the location with the given ID, or None if it is not on the map."""
+        return self._positions.get(id_num)
+
+    def at(self, row: int, column: int) -> list[int]:
+        """Return the IDs of the locations at the given grid position."""
+        cell = self._cells.get((row // self.cell_size, column // self.cell_size), ())
+        return [id_num for r, c, id_num in cell if r == row and c == column]
+
+    def rectangle(self, top: int, left: int, bottom: int, right: int) -> list[int]:
+        """Return the IDs of the locations whose rows are between top and bottom and whose columns are between left
+        and right, inclusive."""
+        size = self.cell_size
+        found = []
+        for cell_row in range(top // size, bottom // size + 1):
+            for cell_column in range(left // size, right // size + 1):
+                for r, c, id_num in self._cells.get((cell_row, cell_column), ()):
+                    if top <= r <= bottom and left <= c <= right:
+                        found.append(id_num)
+        return found
+
+    def near(self, row: int, column: int, radius: int) -> list[int]:
+        """Return the IDs of the locations at most radius rows and radius columns away from the given position."""
+        return self.rectangle(row - radius, column - radius, row + radius, column + radius)
+
+
+# The index of each world loaded so far
+_INDEXES: WeakKeyDictionary[WorldTemplate, SpatialIndex] = WeakKeyDictionary()
+
+
+def spatial_index(template: WorldTemplate) -> SpatialIndex:
+    """Return the spatial index of the given world, building it only the first time it is needed.
+
+    >>> from world_template import shared_template
+    >>> spatial_index(shared_template('game_data.json')).at(1, 2)
+    [21]
+    """
+    index = _INDEXES.get(template)
+    if index is None:
+        if isinstance(template.locations, (PagedLocations, CompactLocations)):
+            # Read the positions straight from the world file or store rather than decoding every location
+            index = SpatialIndex(template.locations.grid_positions())
+        else:
+            index = SpatialIndex((id_num, location.grid_position) for id_num, location in template.locations.items()
+                                 if location.grid_position is not None)
+        _INDEXES[template] = index
+    return index
@@ -0,0 +1,152 @@
+"""CSC111 Project 1: Text Adventure Game - Triggers
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the triggers that end the game or make something happen when the
+state of a game reaches some condition, such as winning or running out of moves.
+
+Each trigger declares the game fields its condition depends on. After every valid command, the
+game works out which fields the command changed and only evaluates the triggers that depend on
+one of them, so a world can have hundreds of triggers without each command checking them all.
+The fields are the ones reported in StepResult.delta ('location', 'score', 'moves', 'inventory',
+'flags' and 'awaiting_password'), and 'locations' for a change to whether any location is locked
+or visited.
+
+The "triggers" array of a game data file declares more triggers, for example:
+
+    {"name": "deadline", "when": [{"moves_at_least": 61}],
+     "effects": [{"say": "Hurry! The submission deadline is only 10 moves away."}]}
+
+The conditions in "when" and the effects use the same requirements and effects as item rules
+(see item_rules.py), and the fields each trigger depends on are worked out from its conditions.
+A declared trigger fires only once per game unless it has "once": false, in which case it fires
+whenever a field it depends on changes and its condition holds.
+
+Triggers are checked once per command, in order, and stop being checked once the game ends. A
+trigger sees the changes made by the triggers before it, but those changes do not cause any more
+triggers to be checked.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from game_entities import ItemRegistry
+from item_rules import Effect, Requirement, compile_effects, compile_requirements
+
+# The game field read by each kind of requirement
+_FIELDS = {'locked': 'locations', 'unlocked': 'locations', 'visited': 'locations', 'flag': 'flags',
+           'not_flag': 'flags', 'has': 'inventory', 'at': 'location', 'moves_at_least': 'moves',
+           'score_at_least': 'score'}
+
+
+@dataclass(frozen=True)
+class Trigger:
+    """A condition on the state of a game, with the effects applied when it holds.
+
+    Instance Attributes:
+        - name: The unique name of this trigger
+        - depends_on: The game fields the condition reads
+        - condition: Returns whether the trigger should fire in the given game
+        - effects: The effects applied, in order, when the trigger fires
+        - once: Whether the trigger fires at most once per game
+    """
+    name: str
+    depends_on: frozenset[str]
+    condition: Requirement
+    effects: tuple[Effect, ...]
+    once: bool = False
+
+
+class TriggerSet:
+    """A collection of triggers, indexed by the game fields they depend on.
+
+    >>> triggers = TriggerSet()
+    >>> triggers.add(Trigger('rich', frozenset({'score'}), lambda game: game.game_state.score >= 20, ()))
+    >>> triggers.add(Trigger('tired', frozenset({'moves'}), lambda game: game.game_state.moves >= 5, ()))
+    >>> [trigger.name for trigger in triggers.watching(frozenset({'score', 'inventory'}))]
+    ['rich']
+    """
+    # Private Instance Attributes:
+    #   - _triggers: Every trigger, in the order they were added
+    #   - _names: The names of the triggers in _triggers
+    #   - _by_field: The positions in _triggers of the triggers that depend on each field, in increasing order
+    #   - _watching: The triggers that depend on each set of fields looked up so far. Commands only ever change a
+    #                few combinations of fields, so this stays small.
+    _triggers: list[Trigger]
+    _names: set[str]
+    _by_field: dict[str, list[int]]
+    _watching: dict[frozenset[str], tuple[Trigger, ...]]
+
+    def __init__(self, triggers: Iterable[Trigger] = ()) -> None:
+        """Initialize a new collection of the given triggers."""
+        self._triggers = []
+        self._names = set()
+        self._by_field = {}
+        self._watching = {}
+        for trigger in triggers:
+            self.add(trigger)
+
+    def __len__(self) -> int:
+        """Return the number of triggers in this collection."""
+        return len(self._triggers)
+
+    def add(self, trigger: Trigger) -> None:
+        """Add the given trigger, which is evaluated after every trigger already added.
+
+        Raise ValueError if a trigger with the same name has already been added.
+        """
+        if trigger.name in self._names:
+            raise ValueError(f'there is already a trigger named {trigger.name!r}')
+        for field in trigger.depends_on:
+            self._by_field.setdefault(field, []).append(len(self._triggers))
+        self._triggers.append(trigger)
+        self._names.add(trigger.name)
+        self._watching.clear()
+
+    def watching(self, changed: frozenset[str]) -> tuple[Trigger, ...]:
+        """Return the triggers that depend on any of the given fields, in the order they were added."""
+        triggers = self._watching.get(changed)
+        if triggers is None:
+            positions = set()
+            for field in changed:
+                positions.update(self._by_field.get(field, ()))
+            triggers = self._watching[changed] = tuple(self._triggers[i] for i in sorted(positions))
+        return triggers
+
+
+def compile_triggers(specs: Iterable[dict[str, Any]], registry: ItemRegistry) -> TriggerSet:
+    """Return the triggers declared in the "triggers" array of a game data file. Item names are made canonical with
+    registry.
+
+    Raise ValueError if a trigger is malformed, has no conditions, or shares its name with another trigger.
+
+    >>> triggers = compile_triggers([{'name': 'deadline', 'when': [{'moves_at_least': 61}, {'flag': 'usb_ejected'}],
+    ...                               'effects': [{'say': 'Hurry!'}]}], ItemRegistry([]))
+    >>> [trigger] = triggers.watching(frozenset({'moves'}))
+    >>> trigger.name, sorted(trigger.depends_on), trigger.once
+    ('deadline', ['flags', 'moves'], True)
+    """
+    triggers = TriggerSet()
+    for spec in specs:
+        conditions = spec.get('when', [])
+        if not conditions:
+            raise ValueError(f"trigger {spec.get('name')!r} has no conditions, so it would never be evaluated")
+        depends_on = set()
+        for condition in conditions:
+            for kind, argument in condition.items():
+                depends_on.add(_FIELDS.get(kind, kind))
+        triggers.add(Trigger(spec['name'], frozenset(depends_on), compile_requirements(conditions, registry),
+                             compile_effects(spec.get('effects', []), registry), spec.get('once', True)))
+    return triggers
@@ -0,0 +1,259 @@
+"""CSC111 Project 1: Text Adventure Game - Undo History
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the history that lets a game undo and redo its commands.
+
+Rather than saving a copy of the whole game before each command, the history records every
+change a command makes together with the value it replaced: the game fields reported in
+StepResult.delta, the items added to or removed from the inventory and from each location,
+whether each location is locked or visited, the events added to the log, and the triggers that
+fired. Undoing a command puts back the old values in reverse order, and redoing it applies the
+new values again, so both take time proportional to the number of changes the command made,
+however large the world is.
+
+Changes made between two commands, such as marking the location a command led to as visited when
+it is described at the start of the next turn, belong to the earlier command, since undoing that
+command should also undo them.
+
+Only the last depth commands can be undone, so the history takes up a bounded amount of memory.
+Running a new command after undoing forgets the commands that could have been redone.
+
+The doctests in this module turn the world cache (see world_cache.py) off, so that running them
+does not write to the user's cache directory:
+
+    >>> import os
+    >>> os.environ['ADVENTURE_WORLD_CACHE'] = ''
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+# The default number of commands a game can undo
+DEFAULT_DEPTH = 100
+
+
+@dataclass
+class Change:
+    """The changes made to a game by one command, each with the value it replaced.
+
+    Each kind of change is kept in a tuple, which takes up less memory than a list, since a command only makes a
+    few changes.
+
+    Instance Attributes:
+        - fields: The (name, old value, new value) of each game field the command changed, other than the inventory
+        - inventory: The (item, quantity) of each item added to the inventory, with a negative quantity if removed
+        - items: The (location ID, item, quantity) of each item added to or removed from a location, in order
+        - flags: The (location ID, 'locked' or 'visited', new value) of each change to a location, in order
+        - events: The (location ID, command) of each event added to the log, in order
+        - fired: The names of the triggers that fired for the first time
+    """
+    fields: tuple[tuple[str, Any, Any], ...] = ()
+    inventory: tuple[tuple[str, int], ...] = ()
+    items: tuple[tuple[int, str, int], ...] = ()
+    flags: tuple[tuple[int, str, bool], ...] = ()
+    events: tuple[tuple[int, Optional[str]], ...] = ()
+    fired: tuple[str, ...] = ()
+
+
+class UndoHistory:
+    """The changes made by the most recent commands of one game, which can be undone and redone.
+
+    >>> from adventure import AdventureGame
+    >>> game = AdventureGame('game_data.json', 1)
+    >>> game.history.depth
+    100
+    >>> game.step("go east").delta['location']
+    (1, 20)
+    >>> game.history.undoable, game.history.redoable
+    (1, 0)
+    >>> game.step("undo").delta
+    {'location': (20, 1), 'moves': (1, 0)}
+    >>> game.history.undoable, game.history.redoable
+    (0, 1)
+
+    Instance Attributes:
+        - depth: The maximum number of commands that can be undone
+    """
+    depth: int
+    # Private Instance Attributes:
+    #   - _undo: The changes made by the commands that can be undone, oldest first
+    #   - _redo: The changes made by the commands that can be redone, most recently undone last
+    #   - _pending: The changes made so far by the command in progress, or None between commands
+    #   - _log_length: The length of the game's log when the command in progress started
+    #   - _replaying: Whether changes are being undone or redone, so should not be recorded
+    _undo: deque[Change]
+    _redo: list[Change]
+    _pending: Optional[Change]
+    _log_length: int
+    _replaying: bool
+
+    def __init__(self, depth: int = DEFAULT_DEPTH) -> None:
+        """Initialize a new empty history that can undo up to depth commands.
+
+        Preconditions:
+            - depth >= 0
+        """
+        self.depth = depth
+        self._undo = deque(maxlen=depth)
+        self._redo = []
+        self._pending = None
+        self._log_length = 0
+        self._replaying = False
+
+    @property
+    def undoable(self) -> int:
+        """The number of commands that can be undone."""
+        return len(self._undo)
+
+    @property
+    def redoable(self) -> int:
+        """The number of commands that can be redone."""
+        return len(self._redo)
+
+    def _current(self) -> Optional[Change]:
+        """Return the changes that a change made now belongs to, or None if it should not be recorded."""
+        if self._replaying:
+            return None
+        if self._pending is not None:
+            return self._pending
+        return self._undo[-1] if self._undo else None
+
+    def begin(self, game: Any) -> None:
+        """Start recording the changes made by a command the given game is about to run."""
+        if self.depth > 0:
+            self._pending = Change()
+            self._log_length = len(game.log)
+
+    def item_moved(self, location_id: int, item: str, quantity: int) -> None:
+        """Record that quantity of the given item was added to the location with the given ID, or removed from it if
+        quantity is negative."""
+        change = self._current()
+        if change is not None:
+            change.items += ((location_id, item, quantity),)
+
+    def flag_changed(self, location_id: int, name: str, value: bool) -> None:
+        """Record that the given flag ('locked' or 'visited') of the location with the given ID changed to value."""
+        change = self._current()
+        if change is not None:
+            change.flags += ((location_id, name, value),)
+
+    def trigger_fired(self, trigger: str) -> None:
+        """Record that the trigger with the given name fired for the first time."""
+        change = self._current()
+        if change is not None:
+            change.fired += (trigger,)
+
+    def commit(self, game: Any, delta: dict[str, tuple[Any, Any]]) -> None:
+        """Finish recording the command in progress, given the (old, new) values of the game fields it changed, as
+        in StepResult.delta. The commands that could be redone are forgotten."""
+        change = self._pending
+        if change is None:
+            return
+        self._pending = None
+        fields = []
+        for name, (old, new) in delta.items():
+            if name == 'inventory':
+                counts = dict(old)
+                for item, count in new:
+                    counts[item] = counts.get(item, 0) - count
+                change.inventory = tuple((item, -count) for item, count in counts.items() if count != 0)
+            else:
+                fields.append((name, old, new))
+        change.fields = tuple(fields)
+        if len(game.log) > self._log_length:
+            change.events = tuple(game.log.arrivals(self._log_length))
+        self._undo.append(change)
+        self._redo.clear()
+
+    def cancel(self) -> None:
+        """Stop recording the command in progress without keeping its changes, because it changed nothing that can
+        be undone (for example, because it was itself an undo)."""
+        self._pending = None
+
+    def undo(self, game: Any) -> Optional[Change]:
+        """Put back everything the given game's most recent command changed, apart from the triggers it fired, and
+        return its changes, or None if there is no command to undo."""
+        if not self._undo:
+            return None
+        change = self._undo.pop()
+        self._replaying = True
+        try:
+            for name, old, _ in reversed(change.fields):
+                _SETTERS.get(name, setattr)(game, name, old)
+            for item, quantity in change.inventory:
+                _add(game.inventory, item, -quantity)
+            for location_id, item, quantity in reversed(change.items):
+                _add(game.locations[location_id].state.items, item, -quantity)
+            for location_id, name, value in reversed(change.flags):
+                setattr(game.locations[location_id].state, name, not value)
+            for _ in change.events:
+                game.log.remove_last_event()
+        finally:
+            self._replaying = False
+        self._redo.append(change)
+        return change
+
+    def redo(self, game: Any) -> Optional[Change]:
+        """Make again the changes of the given game's most recently undone command, apart from the triggers it fired,
+        and return them, or None if there is no command to redo."""
+        if not self._redo:
+            return None
+        change = self._redo.pop()
+        self._replaying = True
+        try:
+            for name, _, new in change.fields:
+                _SETTERS.get(name, setattr)(game, name, new)
+            for item, quantity in change.inventory:
+                _add(game.inventory, item, quantity)
+            for location_id, item, quantity in change.items:
+                _add(game.locations[location_id].state.items, item, quantity)
+            for location_id, name, value in change.flags:
+                setattr(game.locations[location_id].state, name, value)
+            for location_id, command in change.events:
+                game.log.add_location(location_id, command)
+        finally:
+            self._replaying = False
+        self._undo.append(change)
+        return change
+
+
+def _add(bag: Any, item: str, quantity: int) -> None:
+    """Add quantity of the given item to bag, or remove it if quantity is negative."""
+    if quantity > 0:
+        bag.add(item, quantity)
+    elif quantity < 0:
+        bag.remove(item, -quantity)
+
+
+def _set_location(game: Any, _: str, value: int) -> None:
+    """Move the player of the given game to the location with ID value."""
+    game.current_location_id = value
+
+
+def _set_flags(game: Any, _: str, value: frozenset[str]) -> None:
+    """Set exactly the flags of the given game named in value."""
+    game.flags = dict.fromkeys(value, True)
+
+
+def _set_game_state(game: Any, name: str, value: int) -> None:
+    """Set the given field of the given game's GameState to value."""
+    setattr(game.game_state, name, value)
+
+
+# How each field in AdventureGame._observe is set, other than the inventory; the rest are attributes of the game
+_SETTERS: dict[str, Callable[[Any, str, Any], None]] = {'location': _set_location, 'score': _set_game_state,
+                                                        'moves': _set_game_state, 'flags': _set_flags}
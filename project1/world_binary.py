@@ -0,0 +1,518 @@
+"""CSC111 Project 1: Text Adventure Game - Compiled World Files
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the compiler that turns a game data JSON file into a binary world
+file, and the loader that reads such a file through mmap.
+
+A world file is laid out as follows (all integers little-endian):
+
+    header
+    location ids       one int32 per location, sorted, used to binary search for a location
+    location records   one fixed-width record per location, in the same order as the ids
+    exit table         (command, target id) pairs, referenced by range from the location records
+    string refs        references into the string heap, used for lists of strings
+    item table         one fixed-width record per item, with its aliases in the string refs
+    string heap        the UTF-8 encoded names, descriptions and commands, each stored only once,
+                       and the game data's other top-level keys (such as item rules and
+                       triggers), stored as JSON text
+
+Locations and items are only decoded when they are accessed. The header records the size,
+modification time and SHA-256 hash of the JSON file the world was compiled from, so a world
+file whose source has since changed is refused rather than silently loaded.
+
+AdventureGame accepts either a game data JSON file or a world file. ex1's SimpleAdventureGame
+only accepts JSON, since its loader is marked as not to be modified for ex1.
+
+Run this module as a script to compile a world file:
+
+    python world_binary.py game_data.json game_data.world
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Callable, Iterator, MutableMapping, Optional
+
+from game_entities import Location, Item, LocationState
+from world_loader import load_game_data
+
+MAGIC = b'ADVW'
+VERSION = 5
+
+# magic, version, location count, exit count, string ref count, item count, heap size,
+# source size, source mtime (ns), source SHA-256, source path (heap offset, length),
+# other top-level keys (heap offset, length)
+_HEADER = struct.Struct('<4sHIIIIIQQ32sIIII')
+# name, brief description, long description (offset, length each), then the
+# (start, count) ranges of exits, special commands and items, then locked, visited,
+# whether the location has a grid position, and its row and column
+_LOCATION = struct.Struct('<12IBBBii')
+_EXIT = struct.Struct('<IIi')
+_REF = struct.Struct('<II')
+# name, description (offset, length each), start, target, points, then the (start, count) range of aliases
+_ITEM = struct.Struct('<IIIIiiiII')
+_ID = struct.Struct('<i')
+
+_NONE = 0xFFFFFFFF  # The string length used to encode None
+
+
+class StaleWorldError(ValueError):
+    """Raised when a world file no longer matches the game data JSON file it was compiled from."""
+
+
+def is_world_file(filename: str) -> bool:
+    """Return whether the given file is a compiled world file rather than a JSON game data file.
+
+    >>> is_world_file('game_data.json')
+    False
+    """
+    with open(filename, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def compile_world(source: str, target: Optional[str] = None, force: bool = False) -> str:
+    """Compile the game data JSON file source into a world file at target, and return target's filename.
+
+    If target is not given, it is source with its extension replaced by '.world'. If target was already compiled
+    from the current contents of source, it is left alone unless force is True.
+
+    >>> import json, tempfile
+    >>> directory = tempfile.mkdtemp()
+    >>> with open('game_data.json') as f:
+    ...     data = json.load(f)
+    >>> data['locations'][0]['name'] = 'Somewhere Else'
+    >>> with open(os.path.join(directory, 'other.json'), 'w') as f:
+    ...     json.dump(data, f)
+    >>> target = compile_world('game_data.json', os.path.join(directory, 'world.world'))
+    >>> world = BinaryWorld(compile_world(os.path.join(directory, 'other.json'), target))
+    >>> world.location(1).name
+    'Somewhere Else'
+    >>> world.close()
+
+    Preconditions:
+        - source is the filename of a valid game data JSON file
+    """
+    if target is None:
+        target = os.path.splitext(source)[0] + '.world'
+    source_hash = file_hash(source)
+    if not force and os.path.exists(target) and is_world_file(target):
+        try:
+            if read_source_hash(target) == source_hash:
+                return target
+        except ValueError:
+            pass
+
+    other = {}
+    locations, items, _ = load_game_data(source, other=other)
+    source_stat = os.stat(source)
+    data = _encode(locations, items, other, source_stat.st_size, source_stat.st_mtime_ns, source_hash,
+                   os.path.relpath(os.path.abspath(source), os.path.dirname(os.path.abspath(target))))
+
+    # Each process writes its own temporary file, so processes compiling the same world cannot interleave writes
+    tmp = f'{target}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, target)
+    return target
+
+
+def file_hash(filename: str) -> bytes:
+    """Return the SHA-256 digest of the contents of the given file."""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def read_source_hash(filename: str) -> bytes:
+    """Return the SHA-256 hash of the game data JSON file given, or of the JSON file the given world file was
+    compiled from, which is read from the world file's header."""
+    if not is_world_file(filename):
+        return file_hash(filename)
+    world = BinaryWorld(filename, check_source=False)
+    try:
+        return world.source_hash
+    finally:
+        world.close()
+
+
+def _encode(locations: dict[int, Location], items: list[Item], other: dict[str, Any], source_size: int,
+            source_mtime: int, source_hash: bytes, source_path: str) -> bytes:
+    """Return the bytes of a world file holding the given locations, items and other top-level keys."""
+    heap = bytearray()
+    offsets = {}
+
+    def string(s: Optional[str]) -> tuple[int, int]:
+        """Add s to the heap (once) and return its (offset, length)."""
+        if s is None:
+            return 0, _NONE
+        if s not in offsets:
+            encoded = s.encode('utf-8')
+            offsets[s] = (len(heap), len(encoded))
+            heap.extend(encoded)
+        return offsets[s]
+
+    ids = sorted(locations)
+    records = bytearray()
+    exits = bytearray()
+    refs = bytearray()
+    n_exits = n_refs = 0
+    for id_num in ids:
+        loc = locations[id_num]
+        exits_start, specials_start = n_exits, n_refs
+        for command, target in loc.available_commands.items():
+            exits.extend(_EXIT.pack(*string(command), target))
+            n_exits += 1
+        for command in loc.special_commands:
+            refs.extend(_REF.pack(*string(command)))
+            n_refs += 1
+        items_start = n_refs
+        for item_name in loc.state.items.elements():
+            refs.extend(_REF.pack(*string(item_name)))
+            n_refs += 1
+        records.extend(_LOCATION.pack(*string(loc.name), *string(loc.brief_description),
+                                      *string(loc.long_description),
+                                      exits_start, n_exits - exits_start, specials_start, items_start - specials_start,
+                                      items_start, n_refs - items_start, loc.state.locked, loc.state.visited,
+                                      loc.grid_position is not None, *(loc.grid_position or (0, 0))))
+
+    item_records = bytearray()
+    for item in items:
+        target = item.target_position if item.target_position is not None else 0
+        aliases_start = n_refs
+        for alias in item.aliases:
+            refs.extend(_REF.pack(*string(alias)))
+            n_refs += 1
+        item_records.extend(_ITEM.pack(*string(item.name), *string(item.description), item.start_position,
+                                       target, item.target_points, aliases_start, n_refs - aliases_start))
+
+    path_ref = string(source_path)
+    other_ref = string(json.dumps(other) if other else None)
+    header = _HEADER.pack(MAGIC, VERSION, len(ids), n_exits, n_refs, len(items), len(heap),
+                          source_size, source_mtime, source_hash, *path_ref, *other_ref)
+    id_table = b''.join(_ID.pack(id_num) for id_num in ids)
+    return b''.join([header, id_table, records, exits, refs, item_records, heap])
+
+
+class BinaryWorld:
+    """A read-only view of a compiled world file, decoding locations and items only when they are accessed.
+
+    Instance Attributes:
+        - filename: The name of the world file
+        - source_hash: The SHA-256 hash of the JSON file the world was compiled from
+    """
+    filename: str
+    source_hash: bytes
+    # Private Instance Attributes:
+    #   - _file: The open world file
+    #   - _map: The memory map of the world file
+    #   - _ids: The sorted location ids, read directly from the memory map
+    #   - _n_items: The number of items in the world
+    #   - _other: The heap (offset, length) of the JSON text of the game data's other top-level keys
+    #   - _records, _exits, _refs, _items, _heap: The offsets of each section of the file
+    _file: Any
+    _map: mmap.mmap
+    _ids: memoryview
+    _n_items: int
+    _other: tuple[int, int]
+    _records: int
+    _exits: int
+    _refs: int
+    _items: int
+    _heap: int
+
+    def __init__(self, filename: str, check_source: bool = True) -> None:
+        """Open the given world file.
+
+        Raise ValueError if the file is not a world file of a supported version, and StaleWorldError if check_source
+        is True and the JSON file it was compiled from has changed since.
+        """
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            header = self._read_header()
+        except ValueError:
+            self.close()
+            raise
+        magic, version, n_locations, n_exits, n_refs, n_items, _, size, mtime, digest, path_off, path_len, \
+            other_off, other_len = header
+        del magic, version
+        self.source_hash = digest
+
+        ids = _HEADER.size
+        self._records = ids + n_locations * _ID.size
+        self._exits = self._records + n_locations * _LOCATION.size
+        self._refs = self._exits + n_exits * _EXIT.size
+        self._items = self._refs + n_refs * _REF.size
+        self._heap = self._items + n_items * _ITEM.size
+        self._n_items = n_items
+        self._other = (other_off, other_len)
+        self._ids = _int32s(memoryview(self._map)[ids:self._records])
+
+        if check_source:
+            source = os.path.join(os.path.dirname(os.path.abspath(filename)), self._string(path_off, path_len))
+            if not _source_matches(source, size, mtime, digest):
+                self.close()
+                raise StaleWorldError(f'{filename} is out of date with {source}; recompile it')
+
+    def _read_header(self) -> tuple:
+        """Return the unpacked header of the world file, checking its magic number and version."""
+        if len(self._map) < _HEADER.size:
+            raise ValueError(f'{self.filename} is not a world file')
+        header = _HEADER.unpack_from(self._map, 0)
+        if header[0] != MAGIC:
+            raise ValueError(f'{self.filename} is not a world file')
+        if header[1] != VERSION:
+            raise ValueError(f'{self.filename} has world format version {header[1]}, expected {VERSION}')
+        return header
+
+    def close(self) -> None:
+        """Close the world file. Locations and items already decoded remain usable."""
+        if getattr(self, '_ids', None) is not None:
+            self._ids.release()
+            self._ids = None
+        self._map.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        """Return the number of locations in the world."""
+        return len(self._ids)
+
+    def location_ids(self) -> Iterator[int]:
+        """Return an iterator over the ids of all locations in the world, in increasing order."""
+        return iter(self._ids.tolist())
+
+    def __contains__(self, id_num: int) -> bool:
+        """Return whether the world has a location with the given id."""
+        return self.record_index(id_num) is not None
+
+    def record_index(self, id_num: int) -> Optional[int]:
+        """Return the record index of the location with the given id, or None if there is none."""
+        i = bisect.bisect_left(self._ids, id_num)
+        if i < len(self._ids) and self._ids[i] == id_num:
+            return i
+        return None
+
+    def _string(self, offset: int, length: int) -> Optional[str]:
+        """Return the string at the given heap offset and length."""
+        if length == _NONE:
+            return None
+        start = self._heap + offset
+        return self._map[start:start + length].decode('utf-8')
+
+    def _ref_strings(self, start: int, count: int) -> list[str]:
+        """Return the strings referenced by count consecutive entries of the string ref table."""
+        base = self._refs + start * _REF.size
+        return [self._string(*_REF.unpack_from(self._map, base + i * _REF.size)) for i in range(count)]
+
+    def location(self, id_num: int) -> Location:
+        """Decode and return the location with the given id, raising KeyError if there is none."""
+        i = self.record_index(id_num)
+        if i is None:
+            raise KeyError(id_num)
+        return self.location_at(i)
+
+    def location_at(self, i: int) -> Location:
+        """Decode and return the location with the given record index.
+
+        Preconditions:
+            - 0 <= i < len(self)
+        """
+        record = _LOCATION.unpack_from(self._map, self._records + i * _LOCATION.size)
+        return Location(self._ids[i], self._string(record[0], record[1]), self._string(record[2], record[3]),
+                        self._string(record[4], record[5]), dict(self._exits_of(record)),
+                        self._ref_strings(record[8], record[9]),
+                        LocationState(items=self._ref_strings(record[10], record[11]),
+                                      locked=bool(record[12]), visited=bool(record[13])),
+                        (record[15], record[16]) if record[14] else None)
+
+    def _exits_of(self, record: tuple) -> list[tuple[str, int]]:
+        """Return the (command, target ID) pairs of the given location record."""
+        exits = []
+        for j in range(record[6], record[6] + record[7]):
+            command_off, command_len, target = _EXIT.unpack_from(self._map, self._exits + j * _EXIT.size)
+            exits.append((self._string(command_off, command_len), target))
+        return exits
+
+    def exits_at(self, i: int) -> tuple[tuple[str, int], ...]:
+        """Return the (command, target ID) pairs of the location with the given record index, without decoding
+        anything else.
+
+        Preconditions:
+            - 0 <= i < len(self)
+        """
+        return tuple(self._exits_of(_LOCATION.unpack_from(self._map, self._records + i * _LOCATION.size)))
+
+    def state_at(self, i: int) -> tuple[bool, bool, bool]:
+        """Return whether the location with the given record index starts locked, starts visited and starts with
+        any items, without decoding anything else.
+
+        Preconditions:
+            - 0 <= i < len(self)
+        """
+        record = _LOCATION.unpack_from(self._map, self._records + i * _LOCATION.size)
+        return bool(record[12]), bool(record[13]), record[11] > 0
+
+    def names(self) -> Iterator[str]:
+        """Return an iterator over the name of every location, in record order, without decoding anything else."""
+        for i in range(len(self._ids)):
+            record = _LOCATION.unpack_from(self._map, self._records + i * _LOCATION.size)
+            yield self._string(record[0], record[1])
+
+    def grid_positions(self) -> Iterator[Optional[tuple[int, int]]]:
+        """Return an iterator over the grid position of every location, or None for a location that is not on the
+        map, in record order, without decoding anything else."""
+        for i in range(len(self._ids)):
+            record = _LOCATION.unpack_from(self._map, self._records + i * _LOCATION.size)
+            yield (record[15], record[16]) if record[14] else None
+
+    def items(self) -> list[Item]:
+        """Decode and return all items in the world."""
+        items = []
+        for i in range(self._n_items):
+            name_off, name_len, desc_off, desc_len, start, target, points, aliases_start, n_aliases = \
+                _ITEM.unpack_from(self._map, self._items + i * _ITEM.size)
+            items.append(Item(self._string(name_off, name_len), self._string(desc_off, desc_len), start,
+                              target if target else None, points, self._ref_strings(aliases_start, n_aliases)))
+        return items
+
+    def other(self) -> dict[str, Any]:
+        """Decode and return the top-level keys of the world's game data JSON file other than "locations" and
+        "items" (such as "rules" and "triggers"), with their values."""
+        text = self._string(*self._other)
+        return json.loads(text) if text is not None else {}
+
+    def locations(self, convert: Optional[Callable[[Location], Any]] = None) -> LazyLocations:
+        """Return a mapping from location id to location that decodes each location the first time it is accessed.
+
+        If convert is given, each decoded Location is passed through it and the result is stored instead.
+        """
+        return LazyLocations(self, convert)
+
+
+def _int32s(data: memoryview) -> memoryview:
+    """Return a view of the little-endian 32-bit integers in data: data itself on a little-endian machine, and a
+    byteswapped copy on a big-endian one."""
+    ints = data.cast('i')
+    if sys.byteorder == 'little':
+        return ints
+    swapped = array('i', ints)
+    ints.release()
+    swapped.byteswap()
+    return memoryview(swapped)
+
+
+def _source_matches(source: str, size: int, mtime: int, digest: bytes) -> bool:
+    """Return whether the file at source still has the given contents.
+
+    A missing source is treated as a match, so a world file can be shipped without its JSON file.
+    """
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return True
+    if stat.st_size != size:
+        return False
+    return stat.st_mtime_ns == mtime or file_hash(source) == digest
+
+
+class LazyLocations(MutableMapping):
+    """A mapping from location id to location, backed by a BinaryWorld.
+
+    Each location is decoded the first time it is looked up and then kept, so changes to its state persist.
+    Assigning to a key replaces the location for that id, exactly as with a dict.
+    """
+    # Private Instance Attributes:
+    #   - _world: The world file locations are decoded from
+    #   - _convert: A function applied to each decoded Location, or None
+    #   - _decoded: The locations that have been decoded or assigned so far
+    #   - _deleted: The ids of world locations that have been deleted from this mapping
+    _world: BinaryWorld
+    _convert: Optional[Callable[[Location], Any]]
+    _decoded: dict[int, Any]
+    _deleted: set[int]
+
+    def __init__(self, world: BinaryWorld, convert: Optional[Callable[[Location], Any]] = None) -> None:
+        """Initialize a new mapping over the given world."""
+        self._world = world
+        self._convert = convert
+        self._decoded = {}
+        self._deleted = set()
+
+    def __getitem__(self, id_num: int) -> Any:
+        """Return the location with the given id, decoding it if needed."""
+        if id_num in self._decoded:
+            return self._decoded[id_num]
+        if id_num in self._deleted:
+            raise KeyError(id_num)
+        location = self._world.location(id_num)
+        if self._convert is not None:
+            location = self._convert(location)
+        self._decoded[id_num] = location
+        return location
+
+    def __setitem__(self, id_num: int, location: Any) -> None:
+        """Replace the location with the given id."""
+        self._decoded[id_num] = location
+        self._deleted.discard(id_num)
+
+    def __delitem__(self, id_num: int) -> None:
+        """Remove the location with the given id."""
+        if id_num not in self:
+            raise KeyError(id_num)
+        self._decoded.pop(id_num, None)
+        self._deleted.add(id_num)
+
+    def __contains__(self, id_num: object) -> bool:
+        """Return whether there is a location with the given id, without decoding it."""
+        if id_num in self._decoded:
+            return True
+        return id_num not in self._deleted and isinstance(id_num, int) and id_num in self._world
+
+    def __iter__(self) -> Iterator[int]:
+        """Return an iterator over all location ids."""
+        for id_num in self._world.location_ids():
+            if id_num not in self._deleted:
+                yield id_num
+        for id_num in self._decoded:
+            if id_num not in self._world:
+                yield id_num
+
+    def __len__(self) -> int:
+        """Return the number of locations."""
+        return sum(1 for _ in self)
+
+
+if __name__ == "__main__":
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (Delete the "#" and space before each line.)
+    # IMPORTANT: keep this code indented inside the "if __name__ == '__main__'" block
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'disable': ['R1705', 'E9998', 'E9999']
+    # })
+    if len(sys.argv) not in {2, 3}:
+        print("Usage: python world_binary.py SOURCE.json [TARGET.world]")
+        sys.exit(2)
+    print("Compiled", compile_world(sys.argv[1], sys.argv[2] if len(sys.argv) == 3 else None, force=True))
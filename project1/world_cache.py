@@ -0,0 +1,234 @@
+"""CSC111 Project 1: Text Adventure Game - Parsed World Cache
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the on-disk cache of parsed game worlds, which lets a new process
+start a game without parsing the game data JSON file again.
+
+The first time a game data file is loaded, it is compiled into a world file (see world_binary.py)
+in the cache directory. Every later load, in any process, opens that world file instead, which
+only reads its header and decodes locations as they are needed. Cached worlds are named after the
+SHA-256 hash of the JSON file's contents and the world file format version, so a JSON file that
+has been edited, or a cache written by an older version of the game, simply misses the cache and
+is parsed from the JSON file again. If the cache cannot be used at all (for example, because its
+directory cannot be written), worlds are parsed from their JSON files as before.
+
+AdventureGame loads through the cache (see world_template.py). ex1's SimpleAdventureGame does
+not: its loader is marked as not to be modified for ex1, so it always parses its JSON file.
+
+The cache directory is given by the ADVENTURE_WORLD_CACHE environment variable, or is
+adventure_world_cache in the user's cache directory ($XDG_CACHE_HOME, or ~/.cache) if that is not
+set. Setting the variable to an empty string turns the cache off. The directory is created so that
+only its owner can use it, and a directory that belongs to another user, or that other users can
+write to, is not used. A cached world is only used if the hash of the JSON file recorded in its
+header matches the JSON file being loaded.
+
+Run this module as a script to fill the cache ahead of time, for example before starting a pool
+of game servers:
+
+    python world_cache.py game_data.json
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import argparse
+import atexit
+import os
+import tempfile
+from typing import Optional
+
+from world_binary import VERSION, BinaryWorld, compile_world, file_hash
+
+# The environment variable that sets the cache directory
+CACHE_ENVIRONMENT_VARIABLE = 'ADVENTURE_WORLD_CACHE'
+
+
+def cache_directory() -> Optional[str]:
+    """Return the directory of the world cache, or None if the cache is turned off."""
+    directory = os.environ.get(CACHE_ENVIRONMENT_VARIABLE)
+    if directory is None:
+        user_cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        return os.path.join(user_cache, 'adventure_world_cache')
+    return directory or None
+
+
+def cache_path(source: str, directory: str) -> str:
+    """Return the filename the game data JSON file source is cached under in the given directory.
+
+    >>> cache_path('game_data.json', 'cache') == cache_path('game_data.json', 'cache')
+    True
+    """
+    return _cache_path(file_hash(source), directory)
+
+
+def _cache_path(digest: bytes, directory: str) -> str:
+    """Return the filename a game data JSON file with the given SHA-256 hash is cached under in the given
+    directory."""
+    return os.path.join(directory, f'{digest.hex()}.v{VERSION}.world')
+
+
+def warm(source: str, directory: Optional[str] = None) -> str:
+    """Compile the game data JSON file source into the cache, unless it is already there, and return the filename of
+    the cached world.
+
+    Raise ValueError if no directory is given and the cache is turned off, and OSError if the cache directory cannot
+    be written or is not private to this user.
+
+    Preconditions:
+        - source is the filename of a valid game data JSON file
+    """
+    directory = directory or cache_directory()
+    if directory is None:
+        raise ValueError(f'the world cache is turned off because ${CACHE_ENVIRONMENT_VARIABLE} is empty')
+    world = _open_cached(source, directory)
+    world.close()
+    return world.filename
+
+
+def _open_cached(source: str, directory: str) -> BinaryWorld:
+    """Return the cached world for the game data JSON file source in the given directory, compiling it first unless
+    the directory already holds a world compiled from the current contents of source.
+
+    Raise OSError if the directory cannot be written or is not private to this user.
+    """
+    _make_private_directory(directory)
+    digest = file_hash(source)
+    target = _cache_path(digest, directory)
+    if os.path.exists(target):
+        try:
+            world = BinaryWorld(target, check_source=False)
+        except ValueError:
+            pass
+        else:
+            if world.source_hash == digest:
+                return world
+            world.close()
+    compile_world(source, target, force=True)
+    return BinaryWorld(target, check_source=False)
+
+
+def _make_private_directory(directory: str) -> None:
+    """Create the given directory so that only this user can use it, unless it exists.
+
+    Raise OSError if it cannot be created, or if it belongs to another user or other users can write to it, since
+    the worlds in it could then have been put there by someone else.
+    """
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if not hasattr(os, 'getuid'):  # File ownership is not available on this platform
+        return
+    stat = os.stat(directory)
+    if stat.st_uid != os.getuid():
+        raise PermissionError(f'the world cache {directory} belongs to another user')
+    if stat.st_mode & 0o022:
+        raise PermissionError(f'the world cache {directory} can be written by other users')
+
+
+def load_cached(source: str, directory: Optional[str] = None) -> Optional[BinaryWorld]:
+    """Return the cached world for the game data JSON file source, adding it to the cache first if it is not there
+    yet, or None if the cache is turned off or cannot be written, in which case source should be parsed directly.
+
+    >>> import os
+    >>> import tempfile
+    >>> world = load_cached('game_data.json', tempfile.mkdtemp())
+    >>> world.location(1).name
+    'Your Room'
+    >>> world.close()
+    >>> shared = tempfile.mkdtemp()
+    >>> os.chmod(shared, 0o777)
+    >>> load_cached('game_data.json', shared) is None  # Other users could have planted a world here
+    True
+
+    Preconditions:
+        - source is the filename of a valid game data JSON file
+    """
+    directory = directory or cache_directory()
+    if directory is None:
+        return None
+    try:
+        return _open_cached(source, directory)
+    except OSError:
+        return None
+
+
+def world_file(source: str) -> str:
+    """Return the filename of a world file compiled from the game data JSON file source: the cached world if the
+    cache can be used, and otherwise a temporary world file that is deleted when this process exits.
+
+    >>> import os
+    >>> os.environ[CACHE_ENVIRONMENT_VARIABLE], saved = '', os.environ.get(CACHE_ENVIRONMENT_VARIABLE)
+    >>> BinaryWorld(world_file('game_data.json')).location(1).name
+    'Your Room'
+    >>> if saved is None:
+    ...     del os.environ[CACHE_ENVIRONMENT_VARIABLE]
+    ... else:
+    ...     os.environ[CACHE_ENVIRONMENT_VARIABLE] = saved
+
+    Preconditions:
+        - source is the filename of a valid game data JSON file
+    """
+    if cache_directory() is not None:
+        try:
+            return warm(source)
+        except OSError:
+            pass
+    handle, target = tempfile.mkstemp(suffix='.world')
+    os.close(handle)
+    atexit.register(_remove, target)
+    return compile_world(source, target, force=True)
+
+
+def _remove(filename: str) -> None:
+    """Delete the given file, if it can be deleted."""
+    try:
+        os.remove(filename)
+    except OSError:
+        pass
+
+
+def clear(directory: Optional[str] = None) -> int:
+    """Delete every cached world in the given directory, or in the cache directory if it is not given, and return
+    the number deleted."""
+    directory = directory or cache_directory()
+    if directory is None or not os.path.isdir(directory):
+        return 0
+    deleted = 0
+    for name in os.listdir(directory):
+        if name.endswith('.world'):
+            os.remove(os.path.join(directory, name))
+            deleted += 1
+    return deleted
+
+
+if __name__ == "__main__":
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (Delete the "#" and space before each line.)
+    # IMPORTANT: keep this code indented inside the "if __name__ == '__main__'" block
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'disable': ['R1705', 'E9998', 'E9999']
+    # })
+    parser = argparse.ArgumentParser(description='Fill the cache of parsed game worlds.')
+    parser.add_argument('sources', nargs='*', help='game data JSON files to cache')
+    parser.add_argument('--directory', help=f'cache directory (default: ${CACHE_ENVIRONMENT_VARIABLE} or '
+                                            f'adventure_world_cache in the user cache directory)')
+    parser.add_argument('--clear', action='store_true', help='delete every cached world first')
+    args = parser.parse_args()
+
+    cache = args.directory or cache_directory()
+    if cache is None:
+        parser.error(f'the cache is turned off because ${CACHE_ENVIRONMENT_VARIABLE} is empty')
+    if args.clear:
+        print(f"Deleted {clear(cache)} cached worlds from {cache}")
+    for game_data_file in args.sources:
+        print(f"Cached {game_data_file} as {warm(game_data_file, cache)}")
@@ -0,0 +1,287 @@
+"""CSC111 Project 1: Text Adventure Game - World Loader
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the code that reads a game data JSON file and builds the
+Location and Item objects used by the `adventure` module.
+
+The file is parsed incrementally: the elements of the "locations" and "items" arrays are
+decoded and turned into objects one at a time, so the whole JSON tree never has to be held in
+memory alongside the finished objects.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional, TextIO
+
+from game_entities import Location, Item, LocationState
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DECODER = json.JSONDecoder()
+# The text a number can still continue with, and the literals the decoder accepts
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+_LITERALS = ('true', 'false', 'null', 'NaN', 'Infinity', '-Infinity')
+
+
+@dataclass
+class LoadStats:
+    """Statistics collected while loading a game data file.
+
+    Instance Attributes:
+        - timings: A mapping from each load phase ('locations', 'items') to the seconds spent in it
+        - counts: A mapping from each load phase to the number of objects built in it
+        - total: The total number of seconds the load took
+    """
+    timings: dict[str, float] = field(default_factory=dict)
+    counts: dict[str, int] = field(default_factory=dict)
+    total: float = 0.0
+
+
+def location_from_json(loc_data: dict) -> Location:
+    """Return the Location described by the given element of a game data file's "locations" array.
+
+    >>> loc = location_from_json({'id': 2, 'name': 'Hallway', 'brief_description': 'A long hallway.'})
+    >>> loc.id_num, loc.long_description, loc.state.items, loc.grid_position
+    (2, None, ItemBag([]), None)
+    """
+    grid_position = loc_data.get('grid_position')
+    return Location(
+        loc_data['id'],
+        loc_data['name'],
+        loc_data['brief_description'],
+        loc_data.get('long_description', None),
+        loc_data.get('available_commands', {}),
+        loc_data.get('special_commands', []),
+        LocationState(
+            items=loc_data.get('items', []),
+            locked=loc_data.get('locked', False),
+            visited=loc_data.get('visited', False)
+        ),
+        (grid_position[0], grid_position[1]) if grid_position is not None else None
+    )
+
+
+def item_from_json(item_data: dict) -> Item:
+    """Return the Item described by the given element of a game data file's "items" array."""
+    return Item(item_data['name'], item_data['description'], item_data['start_position'],
+                item_data['target_position'], item_data['target_points'], item_data.get('aliases', []))
+
+
+def load_game_data(filename: str, progress: Optional[Callable[[str, int], None]] = None,
+                   progress_every: int = 10000,
+                   other: Optional[dict[str, Any]] = None) -> tuple[dict[int, Location], list[Item], LoadStats]:
+    """Load locations and items from the JSON file with the given filename, building each object as soon as its
+    element has been parsed.
+
+    Return a tuple consisting of (1) a dictionary mapping each location's ID to its Location object, (2) a list of
+    all Item objects, and (3) the statistics for this load.
+
+    If progress is given, it is called as progress(phase, count) every progress_every objects and once more at the
+    end of each phase.
+
+    If other is given, the value of every other top-level key of the file (such as "rules") is stored in it.
+
+    Preconditions:
+        - filename is the filename of a valid game data JSON file
+        - progress_every > 0
+
+    >>> reports = []
+    >>> locations, items, stats = load_game_data('game_data.json', lambda p, n: reports.append((p, n)))
+    >>> locations[1].name, len(items)
+    ('Your Room', 8)
+    >>> reports[-1] == ('items', stats.counts['items'])
+    True
+    >>> other = {}
+    >>> _ = load_game_data('game_data.json', other=other)
+    >>> sorted(other)
+    ['rules']
+    """
+    builders = {'locations': location_from_json, 'items': item_from_json}
+    locations = {}
+    items = []
+    stats = LoadStats()
+    start = time.perf_counter()
+
+    with open(filename, 'r') as f:
+        phase = None
+        phase_start = start
+        for key, value in iter_game_data(f, builders.keys()):
+            if key not in builders:
+                if other is not None:
+                    other[key] = value
+                continue
+            if key != phase:
+                if phase is not None:
+                    _end_phase(stats, phase, phase_start, progress)
+                phase = key
+                phase_start = time.perf_counter()
+                stats.counts.setdefault(phase, 0)
+
+            obj = builders[key](value)
+            if key == 'locations':
+                locations[obj.id_num] = obj
+            else:
+                items.append(obj)
+            stats.counts[key] += 1
+            if progress is not None and stats.counts[key] % progress_every == 0:
+                progress(key, stats.counts[key])
+
+        if phase is not None:
+            _end_phase(stats, phase, phase_start, progress)
+
+    for phase in builders:
+        stats.counts.setdefault(phase, 0)
+        stats.timings.setdefault(phase, 0.0)
+    stats.total = time.perf_counter() - start
+    return locations, items, stats
+
+
+def _end_phase(stats: LoadStats, phase: str, phase_start: float,
+               progress: Optional[Callable[[str, int], None]]) -> None:
+    """Record the time spent in the given phase and report its final count."""
+    stats.timings[phase] = stats.timings.get(phase, 0.0) + time.perf_counter() - phase_start
+    if progress is not None:
+        progress(phase, stats.counts[phase])
+
+
+def iter_game_data(f: TextIO, stream_keys: Any, chunk_size: int = 1 << 16) -> Iterator[tuple[str, Any]]:
+    """Parse the JSON object in the given file incrementally, yielding (key, value) pairs.
+
+    For each top-level key in stream_keys whose value is an array, one pair is yielded per element of that array,
+    in order, and the array itself is never built. Every other top-level key is yielded once with its whole value.
+
+    >>> import io
+    >>> list(iter_game_data(io.StringIO('{"a": [1, {"b": 2}], "c": "x"}'), {'a'}, chunk_size=3))
+    [('a', 1), ('a', {'b': 2}), ('c', 'x')]
+    """
+    stream = _JsonStream(f, chunk_size)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if key in stream_keys and stream.peek() == '[':
+            stream.expect('[')
+            if stream.peek() == ']':
+                stream.expect(']')
+            else:
+                while True:
+                    yield key, stream.value()
+                    if stream.peek() == ',':
+                        stream.expect(',')
+                    else:
+                        stream.expect(']')
+                        break
+        else:
+            yield key, stream.value()
+
+        if stream.peek() == ',':
+            stream.expect(',')
+        else:
+            stream.expect('}')
+            return
+
+
+class _JsonStream:
+    """A buffered reader that decodes JSON values from a text file a piece at a time."""
+    # Private Instance Attributes:
+    #   - _file: The file being read
+    #   - _chunk_size: The number of characters to read from the file at a time
+    #   - _buffer: The text read from the file but not yet consumed (from _pos onwards)
+    #   - _pos: The position of the next unconsumed character in _buffer
+    #   - _eof: Whether the whole file has been read
+    _file: TextIO
+    _chunk_size: int
+    _buffer: str
+    _pos: int
+    _eof: bool
+
+    def __init__(self, f: TextIO, chunk_size: int) -> None:
+        """Initialize a new stream reading from the given file."""
+        self._file = f
+        self._chunk_size = chunk_size
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Read another chunk from the file, discarding consumed text. Return whether anything was read."""
+        if self._eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or '' at the end of the file."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str) -> None:
+        """Consume the given character, raising ValueError if it is not the next one."""
+        if self.peek() != char:
+            raise ValueError(f'Malformed game data: expected {char!r} near character {self._pos}')
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode and return the next JSON value.
+
+        Raise ValueError as soon as the value is found to be malformed, without reading the rest of the file.
+
+        >>> import io
+        >>> stream = _JsonStream(io.StringIO('{"name": "a very long name", "items": [1, -2.5e3, null]}'), 4)
+        >>> stream.value()
+        {'name': 'a very long name', 'items': [1, -2500.0, None]}
+        >>> _JsonStream(io.StringIO('[1 2' + ' ' * 1000), 4).value()
+        Traceback (most recent call last):
+        ...
+        ValueError: Malformed game data: Expecting ',' delimiter near character 3
+        """
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as error:
+                if self._may_continue(error) and self._fill():
+                    continue
+                raise ValueError(f'Malformed game data: {error.msg} near character {error.pos}') from error
+            if end == len(self._buffer) and self._fill():
+                # A number or literal may continue into the next chunk, so decode it again
+                continue
+            self._pos = end
+            return obj
+
+    def _may_continue(self, error: json.JSONDecodeError) -> bool:
+        """Return whether the given error could be caused by the buffer ending part way through a value, so that
+        reading more of the file could fix it."""
+        buffer = self._buffer
+        if error.pos >= len(buffer) or error.msg.startswith('Unterminated string'):
+            return True
+        if error.msg.startswith('Invalid \\uXXXX escape'):
+            return error.pos + 6 > len(buffer)
+        rest = buffer[error.pos:]
+        return _NUMBER_TAIL.fullmatch(rest) is not None or any(literal.startswith(rest) for literal in _LITERALS)
@@ -0,0 +1,582 @@
+"""CSC111 Project 1: Text Adventure Game - Shared World Templates
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the code that lets many games share one copy of the static game
+world.
+
+A WorldTemplate holds everything about a world that never changes during a game (names,
+descriptions, commands and items). It is loaded once per process per game data file and then
+shared by every game created from that file. Each game gets a SessionLocations mapping, whose
+locations read from the template and record only the LocationState fields that game has
+changed.
+
+The doctests in this module turn the world cache (see world_cache.py) off, so that running them
+does not write to the user's cache directory:
+
+    >>> import os
+    >>> os.environ['ADVENTURE_WORLD_CACHE'] = ''
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited. For more information on copyright for CSC111 materials,
+please consult our Course Syllabus.
+
+This file is Copyright (c) 2025 CSC111 Teaching Team
+"""
+from __future__ import annotations
+import hashlib
+import os
+from dataclasses import dataclass
+from functools import cached_property
+from types import MappingProxyType
+from typing import Any, Callable, Iterable, Iterator, Mapping, MutableMapping, Optional
+
+from commands import Command, compile_location_commands
+from game_entities import Location, Item, ItemBag, ItemRegistry, LocationState
+from item_rules import RuleBook
+from triggers import TriggerSet, compile_triggers
+from world_binary import BinaryWorld, file_hash, is_world_file
+from world_cache import load_cached
+from world_loader import load_game_data
+
+
+@dataclass(frozen=True)
+class LocationTemplate:
+    """The unchanging data of one location, shared by every game using the same world.
+
+    Instance Attributes:
+        - id_num: The unique ID of this location
+        - name: The name of this location
+        - brief_description: A short description of the location
+        - long_description: A detailed description of the location, or None
+        - available_commands: A read-only mapping from commands to location IDs
+        - special_commands: Special actions a player can take in this location
+        - items: The (name, quantity) pairs of the items at this location when a game starts, as an ItemBag snapshot
+        - locked: Whether this location is locked when a game starts
+        - visited: Whether this location counts as visited when a game starts
+        - commands: The parsed movement and special commands of this location, keyed by their text
+        - grid_position: The (row, column) of this location on the map, or None if it is not on the map
+    """
+    id_num: int
+    name: str
+    brief_description: str
+    long_description: Optional[str]
+    available_commands: Mapping[str, int]
+    special_commands: tuple[str, ...]
+    items: tuple[tuple[str, int], ...]
+    locked: bool
+    visited: bool
+    commands: Mapping[str, Command]
+    grid_position: Optional[tuple[int, int]] = None
+
+    @cached_property
+    def item_counts(self) -> dict[str, int]:
+        """The number of each item at this location when a game starts, keyed by name. This must not be mutated."""
+        return dict(self.items)
+
+    @staticmethod
+    def from_location(location: Location, registry: ItemRegistry) -> LocationTemplate:
+        """Return the template for the given freshly loaded location, using registry to give its items their
+        canonical names."""
+        special_commands = tuple(location.special_commands)
+        return LocationTemplate(location.id_num, location.name, location.brief_description,
+                                location.long_description, MappingProxyType(location.available_commands),
+                                special_commands,
+                                ItemBag(registry.canonical_name(name) for name in location.state.items.elements())
+                                .snapshot(),
+                                location.state.locked, location.state.visited,
+                                compile_location_commands(location.available_commands, special_commands),
+                                location.grid_position)
+
+
+class WorldTemplate:
+    """The static data of a game world, loaded once and shared by all games created from the same file.
+
+    Instance Attributes:
+        - locations: A mapping from each location ID to its LocationTemplate
+        - items: All Item objects in the world. These must not be mutated.
+        - registry: The lookup table from item names and aliases to items
+        - rules: The compiled rules for taking and using items
+        - triggers: The triggers declared in the world's game data
+        - session_cache_size: The number of Location objects each game keeps, or None to keep every one it creates
+        - source_hash: The SHA-256 hash of the game data JSON file the world was loaded from, or None if unknown
+    """
+    locations: Mapping[int, LocationTemplate]
+    items: list[Item]
+    registry: ItemRegistry
+    rules: RuleBook
+    triggers: TriggerSet
+    session_cache_size: Optional[int]
+    source_hash: Optional[bytes]
+
+    def __init__(self, locations: Mapping[int, LocationTemplate], items: list[Item], registry: ItemRegistry,
+                 other: Optional[dict[str, Any]] = None, session_cache_size: Optional[int] = None,
+                 source_hash: Optional[bytes] = None) -> None:
+        """Initialize a new world template, compiling the item rules and triggers in other, the game data's other
+        top-level keys."""
+        self.locations = locations
+        self.items = items
+        self.registry = registry
+        other = other or {}
+        self.rules = RuleBook(other.get('rules', []), registry)
+        self.triggers = compile_triggers(other.get('triggers', []), registry)
+        self.session_cache_size = session_cache_size
+        self.source_hash = source_hash
+
+    @staticmethod
+    def load(filename: str) -> WorldTemplate:
+        """Load a new world template from the given game data JSON file or compiled world file.
+
+        A JSON file is loaded from the world cache (see world_cache.py), and only parsed directly if the cache is
+        turned off or cannot be written.
+        """
+        world = BinaryWorld(filename) if is_world_file(filename) else load_cached(filename)
+        if world is not None:
+            items = world.items()
+            registry = ItemRegistry(items)
+            return WorldTemplate(world.locations(lambda loc: LocationTemplate.from_location(loc, registry)),
+                                 items, registry, world.other(), source_hash=world.source_hash)
+
+        other = {}
+        locations, items, _ = load_game_data(filename, other=other)
+        registry = ItemRegistry(items)
+        return WorldTemplate(MappingProxyType({id_num: LocationTemplate.from_location(loc, registry)
+                                               for id_num, loc in locations.items()}), items, registry,
+                             other, source_hash=file_hash(filename))
+
+    @cached_property
+    def fingerprint(self) -> bytes:
+        """An 8-byte hash of this world, used to check that a saved game belongs to this world.
+
+        The fingerprint is taken from the hash of the world's game data file where it is known, so that finding it
+        reads no locations; otherwise it is a hash of every location's starting state.
+
+        >>> template = shared_template('game_data.json')
+        >>> template.fingerprint == template.source_hash[:8]
+        True
+        """
+        if self.source_hash is not None:
+            return self.source_hash[:8]
+        digest = hashlib.blake2b(digest_size=8)
+        for id_num, location in self.locations.items():
+            digest.update(repr((id_num, tuple(location.available_commands.items()), location.special_commands,
+                                location.items, location.locked, location.visited)).encode('utf-8'))
+        for item in self.items:
+            digest.update(repr((item.name, item.start_position, item.target_position,
+                                item.target_points)).encode('utf-8'))
+        return digest.digest()
+
+    def starting_state(self, id_num: int) -> tuple[bool, bool, bool]:
+        """Return whether the location with the given ID is locked, is visited and has any items when a game starts.
+
+        >>> shared_template('game_data.json').starting_state(4)
+        (True, False, True)
+        """
+        location = self.locations[id_num]
+        return location.locked, location.visited, bool(location.items)
+
+    def new_session(self) -> SessionLocations:
+        """Return a fresh mapping of locations for one game, in the world's starting state."""
+        return SessionLocations(self, self.session_cache_size)
+
+
+# The templates loaded so far, keyed by (absolute filename, size, modification time)
+_TEMPLATES: dict[tuple[str, int, int], WorldTemplate] = {}
+
+
+def shared_template(filename: str) -> WorldTemplate:
+    """Return the world template for the given file, loading it only if this process has not already done so.
+
+    The template is reloaded if the file has changed since it was last loaded.
+
+    >>> shared_template('game_data.json') is shared_template('game_data.json')
+    True
+    """
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    template = _TEMPLATES.get(key)
+    if template is None:
+        for old_key in [k for k in _TEMPLATES if k[0] == path]:
+            del _TEMPLATES[old_key]
+        template = WorldTemplate.load(path)
+        _TEMPLATES[key] = template
+    return template
+
+
+class OverlayState(LocationState):
+    """The state of one location in one game, read from its template until the game changes it.
+
+    Changed fields are stored in the owning SessionLocations' overlay. Until a game changes a location's items,
+    reading them gives a bag that shares the template's contents; that bag is copied into the overlay the first time
+    an item is added to or removed from it. Assigning any iterable of names replaces the bag with an ItemBag of
+    those names.
+
+    >>> session = shared_template('game_data.json').new_session()
+    >>> 'usb' in session[6].state.items, session.overlay
+    (True, {})
+    >>> session[6].state.items.remove('usb')
+    >>> session.overlay
+    {6: {'items': ItemBag(['lockpick'])}}
+    >>> session[1].state.items = ['key']
+    >>> session[1].state.items.add('key')
+    >>> session[1].state.items.snapshot()
+    (('key', 2),)
+    """
+    # Private Instance Attributes:
+    #   - _template: The template this state starts from
+    #   - _overlay: The changed fields of every location in the game, keyed by location ID
+    #   - _on_change: Called with this location's ID and the field's name when locked or visited changes value,
+    #                 or None
+    __slots__ = ('_template', '_overlay', '_on_change')
+    _template: LocationTemplate
+    _overlay: dict[int, dict[str, Any]]
+    _on_change: Optional[Callable[[int, Optional[str]], None]]
+
+    def __init__(self, template: LocationTemplate, overlay: dict[int, dict[str, Any]],
+                 on_change: Optional[Callable[[int, Optional[str]], None]] = None) -> None:
+        """Initialize the state of the given location, recording changes in overlay."""
+        # LocationState.__init__ is deliberately not called: every field is read from the template or overlay
+        self._template = template
+        self._overlay = overlay
+        self._on_change = on_change
+
+    def _get(self, field: str) -> Any:
+        """Return the current value of the given field."""
+        changes = self._overlay.get(self._template.id_num)
+        if changes is not None and field in changes:
+            return changes[field]
+        return getattr(self._template, field)
+
+    def _set(self, field: str, value: Any) -> None:
+        """Record a new value for the given field."""
+        self._overlay.setdefault(self._template.id_num, {})[field] = value
+
+    def _set_flag(self, field: str, value: bool) -> None:
+        """Record a new value for the given boolean field, reporting it to _on_change if the value changed."""
+        changed = self._get(field) != value
+        self._set(field, value)
+        if changed and self._on_change is not None:
+            self._on_change(self._template.id_num, field)
+
+    @property
+    def items(self) -> ItemBag:
+        """The names of the items at this location."""
+        changes = self._overlay.get(self._template.id_num)
+        if changes is None or 'items' not in changes:
+            return _TemplateBag(self)
+        return changes['items']
+
+    @items.setter
+    def items(self, value: Iterable[str]) -> None:
+        if isinstance(value, _TemplateBag) or not isinstance(value, ItemBag):
+            value = ItemBag(value)
+        self._set('items', value)
+
+    def _changed_items(self) -> ItemBag:
+        """Return the item bag stored in the overlay, copying it from the template first if needed."""
+        changes = self._overlay.get(self._template.id_num)
+        if changes is None or 'items' not in changes:
+            self._set('items', ItemBag.from_snapshot(self._template.items))
+            changes = self._overlay[self._template.id_num]
+        return changes['items']
+
+    @property
+    def locked(self) -> bool:
+        """Whether this location is locked."""
+        return self._get('locked')
+
+    @locked.setter
+    def locked(self, value: bool) -> None:
+        self._set_flag('locked', value)
+
+    @property
+    def visited(self) -> bool:
+        """Whether this location has been visited."""
+        return self._get('visited')
+
+    @visited.setter
+    def visited(self, value: bool) -> None:
+        self._set_flag('visited', value)
+
+
+class _TemplateBag(ItemBag):
+    """The items at a location that a game has not changed yet, read from the location's template without copying.
+
+    The first time an item is added or removed, the template's items are copied into the game's overlay, and this
+    bag reads and changes that copy from then on.
+    """
+    # Private Instance Attributes:
+    #   - _state: The state whose items this bag holds, or None once they have been copied into the overlay
+    __slots__ = ('_state',)
+    _state: Optional[OverlayState]
+
+    def __init__(self, state: OverlayState) -> None:
+        """Initialize a bag sharing the starting items of the given state's template."""
+        # ItemBag.__init__ is deliberately not called: the counts are shared with the template until changed
+        self._counts = state._template.item_counts
+        self._state = state
+
+    def _copy(self) -> None:
+        """Make this bag read and change the overlay's copy of the items, copying them first if needed."""
+        if self._state is not None:
+            self._counts = self._state._changed_items()._counts
+            self._state = None
+
+    def add(self, name: str, quantity: int = 1) -> None:
+        """Add quantity of the given item to this bag, copying it into the overlay first."""
+        self._copy()
+        super().add(name, quantity)
+
+    def remove(self, name: str, quantity: int = 1) -> None:
+        """Remove quantity of the given item from this bag, copying it into the overlay first.
+
+        Raise ValueError if this bag holds fewer than quantity of the item.
+        """
+        self._copy()
+        super().remove(name, quantity)
+
+
+class SessionLocations(MutableMapping):
+    """The locations of one game, sharing all static data with a WorldTemplate.
+
+    Location objects are only created for the locations a game actually accesses, and only the LocationState fields
+    the game changes are stored. A location can still be replaced outright by assigning to its key.
+
+    >>> session = shared_template('game_data.json').new_session()
+    >>> session.overlay
+    {}
+    >>> session[4].state.locked
+    True
+    >>> session[4].state.locked = False
+    >>> session.overlay
+    {4: {'locked': False}}
+    >>> shared_template('game_data.json').new_session()[4].state.locked
+    True
+
+    Listeners are told whenever a location's locked or visited status changes, with the location's ID and the
+    field's name, and whenever a location is assigned or deleted, with the location's ID and None.
+
+    >>> session.add_listener(lambda id_num, field: print('changed', id_num, field))
+    >>> session[4].state.locked = True
+    changed 4 locked
+    >>> session[4].state.locked = True
+
+    If a cache size is given, only about that many of the Location objects created from the template are kept, the
+    oldest being dropped first. Their state stays in the overlay, so a dropped location comes back unchanged the next
+    time it is accessed, as a new Location object. Assigned locations are always kept.
+
+    >>> session = SessionLocations(shared_template('game_data.json'), cache_size=1)
+    >>> session[4].state.locked = False
+    >>> for id_num in [1, 3]:
+    ...     location = session[id_num]
+    >>> session.cached
+    1
+    >>> session[4].state.locked
+    False
+    """
+    # Private Instance Attributes:
+    #   - _template: The world this game is played in
+    #   - _cache_size: The number of Location objects created from the template to keep, or None to keep them all
+    #   - _locations: The Location objects created or assigned so far, keyed by location ID, oldest first
+    #   - _overlay: The changed LocationState fields, keyed by location ID
+    #   - _deleted: The ids of template locations that have been deleted from this mapping
+    #   - _replaced_commands: The command tables of locations that have been assigned, keyed by location ID, or
+    #                         None for an assigned location whose table has not been compiled yet
+    #   - _listeners: The functions called when a location changes, in the order they were added
+    _template: WorldTemplate
+    _cache_size: Optional[int]
+    _locations: dict[int, Location]
+    _overlay: dict[int, dict[str, Any]]
+    _deleted: set[int]
+    _replaced_commands: dict[int, Optional[Mapping[str, Command]]]
+    _listeners: list[Callable[[int, Optional[str]], None]]
+
+    def __init__(self, template: WorldTemplate, cache_size: Optional[int] = None) -> None:
+        """Initialize the locations of a new game in the given world.
+
+        Preconditions:
+            - cache_size is None or cache_size > 0
+        """
+        self._template = template
+        self._cache_size = cache_size
+        self._locations = {}
+        self._overlay = {}
+        self._deleted = set()
+        self._replaced_commands = {}
+        self._listeners = []
+
+    @property
+    def template(self) -> WorldTemplate:
+        """The world this game is played in."""
+        return self._template
+
+    @property
+    def cached(self) -> int:
+        """The number of Location objects created from the template that are currently kept."""
+        return len(self._locations) - len(self._replaced_commands)
+
+    @property
+    def replaced(self) -> set[int]:
+        """The ids of the locations that have been assigned or deleted rather than changed through their state."""
+        return set(self._replaced_commands) | self._deleted
+
+    @property
+    def overlay(self) -> dict[int, dict[str, Any]]:
+        """The LocationState fields this game has changed, keyed by location ID. This must not be mutated."""
+        return self._overlay
+
+    def add_listener(self, listener: Callable[[int, Optional[str]], None]) -> None:
+        """Call listener whenever a location changes: with the location's ID and 'locked' or 'visited' when that
+        field changes value, and with the location's ID and None when the location is assigned or deleted.
+
+        Changes made directly to the state of an assigned location are not reported.
+        """
+        self._listeners.append(listener)
+
+    def _changed(self, id_num: int, field: Optional[str]) -> None:
+        """Tell every listener that the given field of the given location has changed."""
+        for listener in self._listeners:
+            listener(id_num, field)
+
+    def is_locked(self, id_num: int) -> bool:
+        """Return whether the location with the given ID is locked, without creating a Location for it.
+
+        >>> session = SessionLocations(shared_template('game_data.json'), cache_size=1)
+        >>> session[4].state.locked = False
+        >>> for id_num in [1, 3]:
+        ...     location = session[id_num]
+        >>> session.is_locked(4)
+        False
+        """
+        locked = self._state_field(id_num, 'locked')
+        return locked if locked is not None else self._template.starting_state(id_num)[0]
+
+    def is_visited(self, id_num: int) -> bool:
+        """Return whether the location with the given ID has been visited, without creating a Location for it."""
+        visited = self._state_field(id_num, 'visited')
+        return visited if visited is not None else self._template.starting_state(id_num)[1]
+
+    def has_items(self, id_num: int) -> bool:
+        """Return whether there are any items at the location with the given ID, without creating a Location for it.
+
+        >>> session = shared_template('game_data.json').new_session()
+        >>> session.has_items(6), session.has_items(1)
+        (True, False)
+        """
+        items = self._state_field(id_num, 'items')
+        return bool(items) if items is not None else self._template.starting_state(id_num)[2]
+
+    def _state_field(self, id_num: int, field: str) -> Any:
+        """Return the current value of the given LocationState field of the location with the given ID, or None if
+        no Location object is kept for it and this game has not changed the field."""
+        location = self._locations.get(id_num)
+        if location is not None:
+            return getattr(location.state, field)
+        changes = self._overlay.get(id_num)
+        return changes.get(field) if changes is not None else None
+
+    def long_description(self, id_num: int) -> Optional[str]:
+        """Return the long description of the location with the given ID, or None if it has none or there is no such
+        location, without creating a Location for it.
+
+        >>> session = shared_template('game_data.json').new_session()
+        >>> session.long_description(1)
+        'Your private dorm room. Your laptop is here that you need to submit the assignment.'
+        """
+        location = self._locations.get(id_num)
+        if location is not None:
+            return location.long_description
+        template = self._template.locations.get(id_num)
+        return template.long_description if template is not None and id_num not in self._deleted else None
+
+    def commands_for(self, id_num: int) -> Mapping[str, Command]:
+        """Return the table of commands available only at the location with the given ID.
+
+        Template locations use the table compiled when the world was loaded; a location that has been assigned gets
+        its table compiled the first time it is needed.
+        """
+        if id_num not in self._replaced_commands:
+            return self._template.locations[id_num].commands
+        table = self._replaced_commands[id_num]
+        if table is None:
+            location = self._locations[id_num]
+            table = compile_location_commands(location.available_commands, tuple(location.special_commands))
+            self._replaced_commands[id_num] = table
+        return table
+
+    def __getitem__(self, id_num: int) -> Location:
+        """Return the location with the given ID."""
+        location = self._locations.get(id_num)
+        if location is not None:
+            return location
+        if id_num in self._deleted:
+            raise KeyError(id_num)
+
+        template = self._template.locations[id_num]
+        location = Location(template.id_num, template.name, template.brief_description, template.long_description,
+                            None, None, OverlayState(template, self._overlay, self._changed), template.grid_position)
+        # Share the template's commands rather than copying them
+        location.available_commands = template.available_commands
+        location.special_commands = template.special_commands
+        self._locations[id_num] = location
+        if self._cache_size is not None and self.cached > 2 * self._cache_size:
+            self._trim()
+        return location
+
+    def _trim(self) -> None:
+        """Drop the oldest Location objects created from the template until only _cache_size of them are left.
+
+        Trimming only once twice that many have been created keeps the cost of each access constant.
+        """
+        excess = self.cached - self._cache_size
+        dropped = []
+        for id_num in self._locations:
+            if excess == len(dropped):
+                break
+            if id_num not in self._replaced_commands:
+                dropped.append(id_num)
+        for id_num in dropped:
+            del self._locations[id_num]
+
+    def __setitem__(self, id_num: int, location: Location) -> None:
+        """Replace the location with the given ID."""
+        self._locations[id_num] = location
+        self._overlay.pop(id_num, None)
+        self._replaced_commands[id_num] = None
+        self._deleted.discard(id_num)
+        self._changed(id_num, None)
+
+    def __delitem__(self, id_num: int) -> None:
+        """Remove the location with the given ID."""
+        if id_num not in self:
+            raise KeyError(id_num)
+        self._locations.pop(id_num, None)
+        self._overlay.pop(id_num, None)
+        self._replaced_commands.pop(id_num, None)
+        self._deleted.add(id_num)
+        self._changed(id_num, None)
+
+    def __contains__(self, id_num: object) -> bool:
+        """Return whether there is a location with the given ID."""
+        return id_num in self._locations or (id_num not in self._deleted and id_num in self._template.locations)
+
+    def __iter__(self) -> Iterator[int]:
+        """Return an iterator over all location IDs."""
+        for id_num in self._template.locations:
+            if id_num not in self._deleted:
+                yield id_num
+        for id_num in self._locations:
+            if id_num not in self._template.locations:
+                yield id_num
+
+    def __len__(self) -> int:
+        """Return the number of locations."""
+        return sum(1 for _ in self)
+